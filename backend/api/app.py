@@ -1,41 +1,159 @@
-from flask import Flask, request, jsonify, send_from_directory, send_file
-from flask_sqlalchemy import SQLAlchemy
-from flask_cors import CORS
-from werkzeug.security import generate_password_hash, check_password_hash
-import os, json, random
-from collections import defaultdict
-from flask_jwt_extended import  JWTManager, create_access_token, jwt_required, get_jwt_identity
+from flask import Blueprint, Flask, current_app, request, jsonify, send_file, Response
+import os, json
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from datetime import timedelta
-import base64, io
-from fpdf import FPDF
-import math
-import re
-from openai import OpenAI
+import binascii, io, logging
+from sqlalchemy import delete, select, text
+from parsing import SEASON_MASKS, parse_month_mask, parse_cold_tolerance, get_min_temp_by_location, name_pinyin, pinyin_available
+import migrations
+from plant_import import PlantImporter, ImportFormatError, FORMATS, detect_format
+import click
+from paging import keyset_page, PageArgsError
+from plant_detail import PlantDetailService, DetailCache
+from report import ReportBuilder, ReportImage, ReportImageError, normalize_plantlist
+from catalog import PlantCatalog, CATALOG_COLUMNS
+from zones import classify as classify_zones, ZONE_TYPES, ZONE_COLORS
+from image_store import ImageStore, alias_name, iter_base64, iter_stream, sniff_mimetype
+from locations import LocationService
+from model_config import SAMPLE_MODEL_CONFIG, ModelManifest
+from model_pipeline import MANIFEST_NAME, build_models
+import compact
+from assign import Assigner, AssignError, parse_seed
+from result_cache import ResultCache, DiskTier, request_key
+from garden_session import GardenSession, SessionStore, SessionError, LAYERS as SESSION_LAYERS
+from instrumentation import Instrumentation
+from static_assets import StaticAssets, precompress
+import storage
+import search
+from extensions import db, jwt, cors
+from models import Users, Reserve, Plants
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# 前端资源：构建产物优先，没构建时 public 下的模型、纹理也能访问
+FRONTEND_DIST = os.path.join(BASE_DIR, "../../frontend/dist")
+FRONTEND_PUBLIC = os.path.join(BASE_DIR, "../../frontend/public")
+
+logging.basicConfig(
+    level=os.environ.get("LOG_LEVEL", "INFO"),
+    format="%(asctime)s %(levelname)s %(name)s %(message)s",
+)
+log = logging.getLogger("garden")
+
+# 路由和命令都挂在这个蓝图上，由 create_app() 注册；命令不加前缀（flask init-db）
+bp = Blueprint("garden", __name__, cli_group=None)
+
+
+def configure(app):
+    """默认配置；部分可用环境变量覆盖"""
+    # SQLite 配置，DATABASE_URL 可指向别的库（比如基准测试用的临时库）
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get("DATABASE_URL", 'sqlite:///users11.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # 每个 SQLite 连接执行的 PRAGMA（WAL、同步级别、缓存等），见 storage.py
+    app.config["SQLITE_PRAGMAS"] = dict(storage.DEFAULT_PRAGMAS)
+
+    app.config["JWT_SECRET_KEY"] = "123456"  # 随机生成个安全的 key
+
+    # 区域分类半径：建筑/墙周围半日照、水体周围湿润的格子数
+    app.config["ZONE_SHADE_RADIUS"] = 1
+    app.config["ZONE_WET_RADIUS"] = 1
+    # 植物分配：默认模式（random / no_adjacent / ratio / spacing），格子边长（厘米）
+    app.config["ASSIGN_MODE"] = "random"
+    app.config["GARDEN_CELL_CM"] = 100
+    # 候选植物在数据库里筛选（按位标志列下推 WHERE），不在每个进程里常驻整张目录；
+    # 默认用进程内的目录索引，筛选条件宽时快一个数量级，但每次植物表写入后要整表重建
+    app.config["CATALOG_PUSHDOWN"] = os.environ.get("CATALOG_PUSHDOWN", "0") == "1"
+    # /plants_data 结果缓存：内存上限（字节）；磁盘层路径为 None 时不启用
+    app.config["RESULT_CACHE_MAX_BYTES"] = 64 * 1024 * 1024
+    app.config["RESULT_CACHE_DISK"] = os.environ.get("RESULT_CACHE_DISK")
+    app.config["RESULT_CACHE_DISK_MAX_BYTES"] = 512 * 1024 * 1024
+    # 日志与指标：METRICS_ENABLED=0 时计时块变成空操作；LOG_SAMPLE_RATE 为输出请求明细日志的比例
+    app.config["METRICS_ENABLED"] = os.environ.get("METRICS_ENABLED", "1") != "0"
+    app.config["LOG_SAMPLE_RATE"] = float(os.environ.get("LOG_SAMPLE_RATE", "0"))
+    # 编辑会话：最多保留的会话数、闲置过期秒数
+    app.config["GARDEN_SESSION_MAX"] = 256
+    app.config["GARDEN_SESSION_TTL"] = 3600
+
+    # 报告字体与截图目录
+    app.config["REPORT_FONT"] = os.environ.get("REPORT_FONT", os.path.join(app.root_path, "SimHei.ttf"))
+    app.config["SAVED_IMAGE_DIR"] = os.path.join(app.root_path, "saved_image")
+
+    # DeepSeek 配置，测试时把 DEEPSEEK_BASE_URL 指向本地 mock
+    app.config["DEEPSEEK_API_KEY"] = os.environ.get("DEEPSEEK_API_KEY", "sk-48811da9f30a46c8a40fa6bbc95318c9")
+    app.config["DEEPSEEK_BASE_URL"] = os.environ.get("DEEPSEEK_BASE_URL", "https://api.deepseek.com")
+    app.config["PLANT_DETAIL_CACHE"] = os.path.join(app.instance_path, "plant_detail_cache.db")
+    app.config["PLANT_DETAIL_TTL"] = 30 * 24 * 3600
+    app.config["PLANT_DETAIL_MAX_ENTRIES"] = 10000
+
+
+# 依赖配置的服务，进程内共用一份，由 create_app() 按配置创建
+metrics = None
+result_cache = None
+garden_sessions = None
+image_store = None
+plant_details = None
+
+
+def init_services(app):
+    global metrics, result_cache, garden_sessions, image_store, plant_details
+    config = app.config
+
+    metrics = Instrumentation(
+        enabled=config["METRICS_ENABLED"],
+        sample_rate=config["LOG_SAMPLE_RATE"],
+    )
+    metrics.init_app(app)
+
+    result_disk = None
+    if config["RESULT_CACHE_DISK"]:
+        result_disk = DiskTier(config["RESULT_CACHE_DISK"], config["RESULT_CACHE_DISK_MAX_BYTES"])
+    result_cache = ResultCache(max_bytes=config["RESULT_CACHE_MAX_BYTES"], disk=result_disk)
+
+    garden_sessions = SessionStore(
+        max_sessions=config["GARDEN_SESSION_MAX"], ttl=config["GARDEN_SESSION_TTL"]
+    )
+    image_store = ImageStore(config["SAVED_IMAGE_DIR"])
+    # OpenAI 客户端在第一次请求详情时才导入、创建
+    plant_details = PlantDetailService(
+        api_key=config["DEEPSEEK_API_KEY"],
+        base_url=config["DEEPSEEK_BASE_URL"],
+        cache=DetailCache(
+            config["PLANT_DETAIL_CACHE"],
+            ttl=config["PLANT_DETAIL_TTL"],
+            max_entries=config["PLANT_DETAIL_MAX_ENTRIES"],
+        ),
+    )
+
+
+def create_app(config=None):
+    """
+    应用工厂：读配置、绑定扩展、创建服务、注册路由和命令
+    不连数据库也不建表（flask init-db），fpdf / openai 第一次用到时才导入
+    config: 覆盖默认配置的 dict
+    """
+    app = Flask(__name__, static_folder=FRONTEND_DIST, template_folder=FRONTEND_DIST)
+    configure(app)
+    app.config.update(config or {})
 
-app = Flask(__name__, static_folder="../../frontend/dist", template_folder="../../frontend/dist")
-CORS(app)
+    cors.init_app(app)
+    db.init_app(app)
+    jwt.init_app(app)
+    with app.app_context():
+        # 只注册连接事件，第一次真正连接时才执行 PRAGMA
+        storage.configure_engine(db.engine, app.config["SQLITE_PRAGMAS"])
 
-# SQLite 配置
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///users11.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    init_services(app)
+    app.register_blueprint(bp)
+    return app
 
-db = SQLAlchemy(app)
 
-app.config["JWT_SECRET_KEY"] = "123456"  # 随机生成个安全的 key
-jwt = JWTManager(app)
+static_assets = StaticAssets([FRONTEND_DIST, FRONTEND_PUBLIC])
 
 
 
-@app.route("/", defaults={"path": ""})
-@app.route("/<path:path>")
+@bp.route("/", defaults={"path": ""})
+@bp.route("/<path:path>")
 def serve(path):
-    print(66666666)
-    if path != "" and os.path.exists(app.static_folder + "/" + path):
-        print(app.static_folder + "/" + path)
-        return send_from_directory(app.static_folder, path)
-    else:
-        print(app.static_folder + "/index.html")
-        return send_from_directory(app.static_folder, "index.html")
+    return static_assets.response(path, request)
 
 
 
@@ -49,74 +167,48 @@ def ok(data=None, **extra):
 def err(msg="error", code=1, status=400):
     return jsonify({"code": code, "msg": msg}), status
 
-# ORM 模型
-class Users(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(80), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
-    telephone  = db.Column(db.String(128), nullable=False)
 
-    def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
 
-    def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
-    
-class Reserve(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(80), nullable=False)
-    reserve_type = db.Column(db.String(128), nullable=False)
-    detail = db.Column(db.Text, nullable=False)
-    reserve_time = db.Column(db.String(128), nullable=False)
-    status = db.Column(db.String(128), nullable=False)
-
-
-
-class Plants(db.Model):
-
-    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    name = db.Column(db.String, nullable=True)                 # 植物名称
-    family = db.Column(db.String, nullable=True)               # 科
-    genus = db.Column(db.String, nullable=True)                # 属
-    latin_name = db.Column(db.String, nullable=True)           # 拉丁名
-    lifecycle = db.Column(db.String, nullable=True)            # 生命周期
-    classification = db.Column(db.String, nullable=True)       # 植物分类
-    garden_type = db.Column(db.String, nullable=True)          # 花园类型
-    sunlight = db.Column(db.String, nullable=True)             # 日照
-    water_need = db.Column(db.String, nullable=True)           # 需水量
-    cold_resistance = db.Column(db.String, nullable=True)      # 耐寒能力
-    self_sowing = db.Column(db.String, nullable=True)          # 自播能力
-    lodging_resistance = db.Column(db.String, nullable=True)   # 抗倒伏情况
-    crown_width_cm = db.Column(db.String, nullable=True)       # 冠幅（cm）
-    height_spring = db.Column(db.String, nullable=True)        # 植株高度-春
-    height_summer = db.Column(db.String, nullable=True)        # 植株高度-夏
-    height_autumn = db.Column(db.String, nullable=True)        # 植株高度-秋
-    height_winter = db.Column(db.String, nullable=True)        # 植株高度-冬
-    ornamental_period = db.Column(db.String, nullable=True)    # 观赏期
-    flower_color = db.Column(db.String, nullable=True)         # 花朵颜色
-    flower_height_cm = db.Column(db.String, nullable=True)     # 花朵高度（cm）
-    usage = db.Column(db.Text, nullable=True)                  # 用途/特点
-    control_methods = db.Column(db.Text, nullable=True)        # 防治方法
-    common_diseases = db.Column(db.Text, nullable=True)        # 常见病害
-    pruning = db.Column(db.String, nullable=True)              # 修剪节点
-    watering_frequency = db.Column(db.String, nullable=True)   # 浇水频率
-    needs_support = db.Column(db.String, nullable=True)        # 是否需要支架
-    color = db.Column(db.String, nullable=True)                # 颜色
-    model_config = db.Column(db.Text, nullable=True)
-    
+# 建表和旧库升级不在启动时做，部署或升级后跑一次 flask init-db
+def init_db():
+    """建表、补列、补索引和触发器；需在 app 上下文里调用"""
+    db.create_all()
+    migrations.upgrade(db.engine, db.metadata)
+    log.info("数据库表创建完成")
 
 
-# 创建数据库表
-def create_tables():
-    """创建数据库表"""
-    with app.app_context():
-        db.create_all()
-        print("数据库表创建完成")
+def load_catalog_rows():
+    """只取目录需要的列"""
+    return db.session.query(*(getattr(Plants, c) for c in CATALOG_COLUMNS)).all()
+
+
+def query_catalog_rows(where, params):
+    """筛选条件下推到数据库，只取候选植物"""
+    return (
+        db.session.query(*(getattr(Plants, c) for c in CATALOG_COLUMNS))
+        .filter(text(where)).params(**params).order_by(Plants.id).all()
+    )
+
+
+def plants_version():
+    """植物表版本号，由触发器在每次写入时递增"""
+    return migrations.read_plants_version(db.session.connection())
+
 
-# 初始化数据库
-create_tables()
+def catalog_version():
+    """植物表版本号 + 模型 manifest 版本；任一变化，分配结果里的模型配置就可能不同"""
+    return plants_version(), model_manifest.version()
 
-@app.route("/login", methods=["POST"])
+# 模型 manifest（flask build-models 生成），model_config 里的 asset 引用按它解析
+MODELS_DIR = os.path.join(FRONTEND_PUBLIC, "models")
+model_manifest = ModelManifest(os.path.join(MODELS_DIR, MANIFEST_NAME))
+
+# 植物目录索引，植物表写入后（包括进程外的写入）或 manifest 重新生成后失效
+plant_catalog = PlantCatalog(
+    load_catalog_rows, version=plants_version, manifest=model_manifest.current, query=query_catalog_rows,
+)
+
+@bp.route("/login", methods=["POST"])
 def login():
     data = request.json
     if not data:
@@ -146,7 +238,7 @@ def login():
         return jsonify({"success": False, "message": "用户名或密码错误"}), 401
 
 # 注册接口
-@app.route("/register", methods=["POST"])
+@bp.route("/register", methods=["POST"])
 def register():
     data = request.json
     if not data:
@@ -172,19 +264,19 @@ def register():
         db.session.commit()
         return jsonify({"success": True, "message": "注册成功"})
     except Exception as e:
-        print(e)
+        log.exception("注册失败")
         db.session.rollback()
         return jsonify({"success": False, "message": f"注册失败: {str(e)}"}), 500
 
 # 获取所有用户接口（用于测试）
-@app.route("/users", methods=["GET"])
+@bp.route("/users", methods=["GET"])
 def get_users():
-    users = Users.query.all()
+    users = db.session.execute(select(Users.id, Users.username).order_by(Users.id)).all()
     users_list = [{"id": user.id, "username": user.username} for user in users]
     return jsonify({"success": True, "users": users_list})
 
 # 健康检查接口
-@app.route("/health", methods=["GET"])
+@bp.route("/health", methods=["GET"])
 def health_check():
     return jsonify({"success": True, "message": "服务正常运行"})
 
@@ -373,490 +465,283 @@ def health_check():
 
 
 def match_season(view_season: str, db_value: str) -> bool:
-
-    season_map = {
-        "spring": range(3, 6+1),   # 3-6月
-        "summer": range(6, 9+1),   # 6-9月
-        "autumn": range(9, 11+1),  # 9-11月
-        "winter": [12, 1, 2],      # 12月,1月,2月
-    }
-
-    def parse_view_season(text: str):
-        text = text.strip()
-
-        # 全年
-        if "全年" in text:
-            return list(range(1, 13))
-        # 秋冬
-        if "秋冬" in text:
-            return [9, 10, 11, 12]
-        # 食用/药用类不算观赏期
-        if "食用" in text:
-            return []
-
-        # 匹配 "5-9月" 这种
-        m = re.match(r"(\d+)-(\d+)月", text)
-        if m:
-            start, end = int(m.group(1)), int(m.group(2))
-            if start <= end:
-                return list(range(start, end+1))
-            else:  # 跨年，比如 11-2月
-                return list(range(start, 13)) + list(range(1, end+1))
-
-        # 单月 "6月"
-        m = re.match(r"(\d+)月", text)
-        if m:
-            return [int(m.group(1))]
-
-        return []
-    
-    season_months = season_map.get(view_season, [])
-    plant_months = parse_view_season(db_value)
-
-    return bool(set(season_months) & set(plant_months))
+    return bool(SEASON_MASKS.get(view_season, 0) & parse_month_mask(db_value))
 
 
 def match_lat(lat, cold_resistance):
-
-
-    def parse_cold_tolerance(text: str) -> int:
-        """
-        提取耐寒字段里的最低温度（摄氏度）
-        比如 '耐寒（可耐 -20℃低温）' -> -20
-        '不耐寒（10℃以下生长受影响）' -> 5
-        """
-        text = text.strip()
-
-        # 匹配 -20℃ 这类
-        m = re.search(r"(-?\d+)℃", text)
-        if m:
-            return int(m.group(1))
-
-        # 特殊处理
-        if "不耐寒" in text:
-            # 默认 5℃ 作为临界
-            return 5
-        if "较耐寒" in text:
-            return -5
-
-        return 99  # 无法识别时，给个大温度，表示要求不严格
-
-    def get_min_temp_by_location(lat):
-        if lat >= 50:   # 比如东北/内蒙古寒区
-            return -35
-        elif lat >= 40: # 北京、山东、陕西
-            return -20
-        elif lat >= 30: # 长江流域
-            return -10
-        elif lat >= 20: # 两广/云南
-            return 0
-        else:           # 海南等
-            return 5
-
     min_temp = get_min_temp_by_location(float(lat))
     plant_limit = parse_cold_tolerance(cold_resistance)
 
-    print(lat)
-    print(min_temp)
-    print(cold_resistance)
-    print(plant_limit)
     # 只要植物耐寒温度 <= 当地最低温度，就算适合
     return plant_limit <= min_temp
 
 
-def partition(data):
-    import random
-
-    # 颜色映射（可以再扩展6类颜色）
-    color_map = {
-        "全阴干": "#6BAF92",
-        "全阴湿": "#A88ED0",
-        "半日照干": "#F3A6B0",
-        "半日照湿": "#E58B4A",
-        "全日照干": "#FFD166",
-        "全日照湿": "#118AB2",
-    }
-
-    def get_neighbors(x, y, radius=1):
-        coords = []
-        for dx in range(-radius, radius + 1):
-            for dy in range(-radius, radius + 1):
-                if dx == 0 and dy == 0:
-                    continue
-                coords.append((x + dx, y + dy))
-        return coords
-
-    # 阴影格子
-    shade_set = set()
-    half_shade_set = set()
-    for b in data["buildingPositions"]:
-        shade_set.add((math.ceil(b["x"]), math.ceil(b["y"])))  # 完全遮挡
-        half_shade_set.update(get_neighbors(math.ceil(b["x"]), math.ceil(b["y"]), radius=1))
-    for w in data["wallPositions"]:
-        shade_set.add((math.ceil(w["x"]), math.ceil(w["y"])))
-        half_shade_set.update(get_neighbors(math.ceil(w["x"]), math.ceil(w["y"]), radius=1))
-
-    print (shade_set)
-    print (half_shade_set)
-
-    # 湿地区格子
-    wet_set = set()
-    for water in data["waterPositions"]:
-        wet_set.update(get_neighbors(water["x"], water["y"], radius=1))
-
-    # 区域分类
-    flower_zones = []
-    for f in data["flowerPositions"]:
-        pos = (f["x"], f["y"])
-        is_wet = pos in wet_set
-
-        # 判定光照类型
-        if pos in shade_set:
-            light = "全阴"
-        elif pos in half_shade_set:
-            light = "半日照"
-        else:
-            light = "全日照"
-
-        # 湿度类型
-        wet_str = "湿" if is_wet else "干"
-
-        zone_type = f"{light}{wet_str}"
-
-        flower_zones.append({
-            "position": {"x": f["x"], "y": f["y"]},
-            "type": zone_type,
-            "color": color_map.get(zone_type, "#FFFFFF")
-        })
-
-    # 植物分组
-    all_plants = Plants.query.all()
-
-    print(data)
-    selectedPlants = data.get('property', {}).get("selectedPlants")
+def assign_plants(data):
+    """
+    区域分类并为每个花卉格子挑选植物，返回 (ZoneGrid, [PlantRecord 或 None])
+    property.seed 相同则结果相同；property.assignMode 选分配模式，
+    ratio 模式的目标比例放在 property.ratios（{植物名: 权重}）
+    """
+    # 区域分类（NumPy 栅格，一次性分类所有花卉格子）
+    with metrics.stage("classify"):
+        grid = classify_zones(
+            data,
+            shade_radius=current_app.config["ZONE_SHADE_RADIUS"],
+            wet_radius=current_app.config["ZONE_WET_RADIUS"],
+        )
 
-    if selectedPlants:
-        all_plants = [p for p in all_plants if p.name in selectedPlants]
+    assigner = make_assigner(data.get('property', {}))
+    with metrics.stage("assign"):
+        picks = assigner.assign(grid)
+    return grid, picks
+
+
+def make_assigner(prop):
+    # 植物分组（目录索引里求交集）
+    with metrics.stage("filter"):
+        plants_by_zone = plant_catalog.candidates(
+            selected_plants=prop.get("selectedPlants"),
+            view_season=prop.get("viewSeason"),
+            style=prop.get("style"),
+            lat=prop.get("lat"),
+            pushdown=current_app.config["CATALOG_PUSHDOWN"],
+        )
 
+    return Assigner(
+        plants_by_zone,
+        seed=parse_seed(prop.get("seed")),
+        mode=prop.get("assignMode") or current_app.config["ASSIGN_MODE"],
+        ratios=prop.get("ratios"),
+        cell_cm=current_app.config["GARDEN_CELL_CM"],
+    )
 
-    viewSeason = data.get('property', {}).get("viewSeason")
-    if viewSeason and viewSeason != 'none':
-        all_plants = [p for p in all_plants if match_season(viewSeason, p.ornamental_period)]
 
-    style = data.get('property', {}).get("style")
-    print(style)
-    if style and style != 'none':
-        style_dic = {
-            "meadow": "混合草甸",
-            "insectFriendly": "昆虫友好花园",
-            "rainGarden": "雨水花园",
-            "children": "儿童花园",
-            "healing": "疗愈花园",
-            "rock": "岩石花园",
-            "edible": "可食花园",
+def plant_info(plant):
+    """格子里的植物信息；没有植物时为占位的“无”"""
+    if plant is None:
+        return {
+            "id": "",
+            "name":"无",
+            "latin_name": "",
+            "family": "",
+            "genus": "",
+            "color": "#FFFFFF"
         }
-
-        style = style_dic.get(style)
-        print(style)
-        
-        all_plants = [p for p in all_plants if style in p.garden_type.split("、")]
-        # for p in all_plants:
-        #     print(p.garden_type.split("、"))
-        #     print(style in p.garden_type.split("、"))
-
-    lat = data.get('property', {}).get("lat")
-    if lat:
-        all_plants = [p for p in all_plants if match_lat(lat, p.cold_resistance)]
-
-
-
-    
-    print(all_plants)
-    zone_query_map = {
-        "全阴干": {"sunlight": ["低"], "water_need": ["低"]},
-        "全阴湿": {"sunlight": ["低"], "water_need": ["高"]},
-        "半日照干": {"sunlight": ["中"], "water_need": ["低", "中", "中、低"]},
-        "半日照湿": {"sunlight": ["中"], "water_need": ["高", "中", "高、中"]},
-        "全日照干": {"sunlight": ["高"], "water_need": ["低"]},
-        "全日照湿": {"sunlight": ["高"], "water_need": ["高"]},
+    return {
+        "id": plant.id,
+        "name": plant.name,
+        "latin_name": plant.latin_name,
+        "family": plant.family,
+        "genus": plant.genus,
+        "color": "#6BAF92"
     }
 
-    plants_by_zone = {z: [] for z in zone_query_map}
-    for plant in all_plants:
-        for zone_type, q in zone_query_map.items():
-            if (set(plant.sunlight.split("、")) & set(q["sunlight"])) and (plant.water_need in q["water_need"]):
-                plants_by_zone[zone_type].append(plant)
-    
-    print(plants_by_zone)
 
-    # 最终结果
+def partition(data):
+    grid, picks = assign_plants(data)
+
+    # 最终结果：格子只带 model_id，模型配置按植物 id 放一张共享的表
     final_result = []
-    for f in flower_zones:
-        zone_type = f["type"]
-        candidates = plants_by_zone.get(zone_type, [])
-        if candidates:
-            plant = random.choice(candidates)
-            f["plant"] = {
-                "id": plant.id,
-                "name": plant.name,
-                "latin_name": plant.latin_name,
-                "family": plant.family,
-                "genus": plant.genus,
-                "color": "#6BAF92"
-            }
-            f['models'] = [
-        {
-            "season": 0,
-            "keyPrefix": "mint1",
-            "models": [
-                {                
-                    "resource": "/models/tree/",
-                    "name": "tree",
-                    "upAxis": "y",
-                    "target": 1,
-                    "offset": [-0.1, 0, 0],
-                },
-            ],
-        },
-        {
-            "season": 1,
-            "keyPrefix": "mint1",
-            "models": [
-                                {
-                    "resource": "/models/tree/",
-                    "name": "tree",
-                    "upAxis": "y",
-                    "target": 1,
-                    "offset": [-0.1, 0, 0],
-                },                {
-                    "resource": "/models/tree/",
-                    "name": "tree",
-                    "upAxis": "y",
-                    "target": 1,
-                    "offset": [-0.2, 0, 0],
-                },
-            ],
-        },
-        {
-            "season": 2,
-            "keyPrefix": "mint3",
-            "models": [
-                {                
-                    "resource": "/models/tree/",
-                    "name": "tree",
-                    "upAxis": "y",
-                    "target": 1,
-                    "offset": [-0.1, 0, 0],
-                },{              
-                    "resource": "/models/tree/",
-                    "name": "tree",
-                    "upAxis": "y",
-                    "target": 1,
-                    "offset": [-0.2, 0, 0],
-                },{                
-                    "resource": "/models/tree/",
-                    "name": "tree",
-                    "upAxis": "y",
-                    "target": 1,
-                    "offset": [-0.3, 0, 0],
-                }
-            ],
-        },
-        {
-            "season": 3,
-            "keyPrefix": "mint4",
-            "models": [
-                {
-                                
-                    "resource": "/models/tree/",
-                    "name": "tree",
-                    "upAxis": "y",
-                    "target": 1,
-                    "offset": [-0.1, 0, 0],
-                },{              
-                    "resource": "/models/tree/",
-                    "name": "tree",
-                    "upAxis": "y",
-                    "target": 1,
-                    "offset": [-0.2, 0, 0],
-                },{                
-                    "resource": "/models/tree/",
-                    "name": "tree",
-                    "upAxis": "y",
-                    "target": 1,
-                    "offset": [-0.3, 0, 0],
-                }, {                
-                    "resource": "/models/tree/",
-                    "name": "tree",
-                    "upAxis": "y",
-                    "target": 1,
-                    "offset": [-0.4, 0, 0],
-                }
-            ],
-        },
-    ]
-        else:
-            f["plant"] ={
-                "id": "",
-                "name":"无",
-                "latin_name": "",
-                "family": "",
-                "genus": "",
-                "color": "#FFFFFF"
-            }
-            f["models"] = []
+    model_configs = {}
+    for f, plant in zip(grid.to_dicts(), picks):
+        f["plant"] = plant_info(plant)
+        f["model_id"] = None
+        if plant is not None:
+            f["model_id"] = plant.id
+            model_configs[plant.id] = plant.model_config
         final_result.append(f)
 
+    return final_result, model_configs
 
-    return final_result
 
+# 会影响分配结果的配置项，也算进缓存键
+RESULT_CACHE_OPTIONS = ("ZONE_SHADE_RADIUS", "ZONE_WET_RADIUS", "ASSIGN_MODE", "GARDEN_CELL_CM")
 
 
-
-@app.route("/plants_data", methods=["POST"])
+@bp.route("/plants_data", methods=["POST"])
 def plants_data():
-    data = request.json
-    print(data)
+    with metrics.stage("parse"):
+        data = request.json
 
-    data = partition(data)
+    try:
+        return plants_response(data)
+    except AssignError as e:
+        return err(str(e))
+
+
+def plants_response(data):
+    # 紧凑列式格式：?format=columns 或 Accept 指定
+    columns = compact.wants_columns(request.args, request.accept_mimetypes)
+    mimetype = compact.response_mimetype(request.accept_mimetypes) if columns else "application/json"
+
+    # 同样的布局、筛选条件、种子、植物表和模型 manifest 版本，结果一定相同
+    key = request_key(
+        data,
+        catalog_version(),
+        mimetype=mimetype,
+        options=[current_app.config[k] for k in RESULT_CACHE_OPTIONS],
+    )
+    cached = result_cache.get(key)
+    if cached is not None:
+        return Response(cached[1], mimetype=cached[0])
+
+    if columns:
+        grid, picks = assign_plants(data)
+        with metrics.stage("serialize"):
+            body = compact.encode(
+                {"success": True, "message": "获取模型配置成功", "format": "columns",
+                 "data": compact.to_columns(grid, picks)},
+                mimetype,
+            )
+    else:
+        data, model_configs = partition(data)
+        with metrics.stage("serialize"):
+            body = jsonify({"success": True, "message": "获取模型配置成功", "data": data,
+                            "model_configs": model_configs}).get_data()
+
+    result_cache.put(key, mimetype, body)
+    return Response(body, mimetype=mimetype)
+
+
+# 编辑会话：服务端保留栅格和分配结果，编辑时只发增量
+def session_cells(session, keys=None):
+    """会话里的格子 -> (与 /plants_data 相同的格子列表, 模型配置表)"""
+    cells, model_configs = [], {}
+    for (x, y), code, plant in session.cells(keys):
+        cells.append({
+            "position": {"x": x, "y": y},
+            "type": ZONE_TYPES[code],
+            "color": ZONE_COLORS[code],
+            "plant": plant_info(plant),
+            "model_id": None if plant is None else plant.id,
+        })
+        if plant is not None:
+            model_configs[plant.id] = plant.model_config
+    return cells, model_configs
 
-    # print(data)
 
-    return jsonify({"success": True, "message": "获取模型配置成功", "data": data})
+@bp.post("/api/garden_sessions")
+def create_garden_session():
+    """用完整布局建会话，返回 session_id 和全部格子"""
+    data = request.get_json() or {}
+    prop = data.get("property", {})
+    session = GardenSession(
+        prop,
+        shade_radius=current_app.config["ZONE_SHADE_RADIUS"],
+        wet_radius=current_app.config["ZONE_WET_RADIUS"],
+    )
+    try:
+        session.apply(add={k: v for k, v in data.items() if k in SESSION_LAYERS})
+        session.reassign(make_assigner(prop), list(session.flowers))
+    except (SessionError, AssignError) as e:
+        return err(str(e))
+    session.catalog_version = catalog_version()
+
+    cells, model_configs = session_cells(session)
+    return ok({"session_id": garden_sessions.add(session), "cells": cells,
+               "model_configs": model_configs})
 
 
-@app.route("/get_model_config", methods=["POST"])
+@bp.post("/api/garden_sessions/<sid>/delta")
+def garden_session_delta(sid):
+    """
+    增量编辑：{"add": {布局字段: [...]}, "remove": {...}}
+    只重新分类改动点周围的格子，返回变化的格子和被删掉的花卉位置
+    """
+    session = garden_sessions.get(sid)
+    if session is None:
+        return err("会话不存在或已过期", status=404)
+    body = request.get_json() or {}
+    if not isinstance(body, dict):
+        return err("请求体必须是对象")
+
+    with session.lock:
+        try:
+            changed, removed = session.apply(body.get("add"), body.get("remove"))
+            assigner = make_assigner(session.prop)
+            version = catalog_version()
+            # 植物表或 manifest 变了、或按比例分配（依赖全部格子）时整体重排
+            if version != session.catalog_version or assigner.mode == "ratio":
+                updated = session.reassign(assigner, list(session.flowers))
+                session.catalog_version = version
+            else:
+                updated = session.reassign(assigner, changed)
+        except (SessionError, AssignError) as e:
+            return err(str(e))
+
+        keys = sorted(set(changed) | set(updated), key=lambda c: (c[1], c[0]))
+        cells, model_configs = session_cells(session, keys)
+
+    return ok({"cells": cells, "removed": [{"x": x, "y": y} for x, y in removed],
+               "model_configs": model_configs})
+
+
+@bp.delete("/api/garden_sessions/<sid>")
+def delete_garden_session(sid):
+    garden_sessions.pop(sid)
+    return ok()
+
+
+@bp.get("/api/cache_stats")
+def cache_stats():
+    """结果缓存命中情况，用来调整缓存大小"""
+    return ok(result_cache.stats())
+
+
+@bp.route("/get_model_config", methods=["POST"])
 def get_model_config():
     # data = request.json
     # if not data:
     #     return jsonify({"success": False, "message": "请求参数必须为 JSON"}), 400
 
 
-    plants = Plants.query.all()
-    for plant in plants:
-        print(plant.name)
-
-    model_config = [
-        {
-            "season": 0,
-            "keyPrefix": "mint1",
-            "models": [
-                {
-                    "resource": "/models/mint/",
-                    "name": "mint_1",
-                    "upAxis": "y",
-                    "target": 1,
-                    "offset": [-0.1, 0, 0],
-                },
-                {
-                    "resource": "/models/tree/",
-                    "name": "tree",
-                    "upAxis": "y",
-                    "target": 1,
-                    "offset": [-0.1, 0, 0],
-                },
-                {
-                    "resource": "/models/mint/",
-                    "name": "mint_2",
-                    "upAxis": "y",
-                    "target": 1,
-                    "offset": [0.2, 0, 0],
-                },
-            ],
-        },
-        {
-            "season": 1,
-            "keyPrefix": "mint1",
-            "models": [
-                {
-                    "resource": "/models/mint/",
-                    "name": "mint_2",
-                    "upAxis": "y",
-                    "target": 1,
-                    "offset": [-0.2, 0, 0],
-                },
-            ],
-        },
-        {
-            "season": 2,
-            "keyPrefix": "mint3",
-            "models": [
-                {
-                    "resource": "/models/mint/",
-                    "name": "mint_3",
-                    "upAxis": "y",
-                    "target": 1,
-                    "offset": [-0.3, 0, 0],
-                },
-                {
-                    "resource": "/models/mint/",
-                    "name": "mint_1",
-                    "upAxis": "y",
-                    "target": 1,
-                    "offset": [0.4, 0, 0],
-                },
-            ],
-        },
-        {
-            "season": 3,
-            "keyPrefix": "mint4",
-            "models": [
-                {
-                    "resource": "/models/mint/",
-                    "name": "mint_4",
-                    "upAxis": "y",
-                    "target": 1,
-                    "offset": [-0.5, 0, 0],
-                },
-            ],
-        },
-    ]
-
-    return jsonify({"success": True, "message": "获取模型配置成功", "data": model_config})
-
-
-
-@app.route("/location_msg")
-def get_data():
-    # 假设文件路径在当前目录下的 data.json
-    file_path = os.path.join(os.path.dirname(__file__), "cn.json")
-
-    # 打开并读取 json 文件
-    with open(file_path, "r", encoding="utf-8") as f:
-        cities = json.load(f)  # 解析成 Python 字典/列表
-    # 构建省市树
-    tree = defaultdict(list)
-    for city in cities:
-        province = city["admin_name_zh"]
-        tree[province].append({
-            "city": city["city_zh"],
-            "lat": city["lat"],
-            "lng": city["lng"],
-            "population": city["population"],
-            "population_proper": city["population_proper"]
-        })
+    return jsonify({"success": True, "message": "获取模型配置成功", "data": SAMPLE_MODEL_CONFIG})
 
-    # 转成标准结构
-    province_tree = []
-    for province, city_list in tree.items():
-        province_tree.append({
-            "province": province,
-            "cities": city_list
-        })
 
-    # return jsonify(province_tree)
-    return jsonify({"success": True, "message": "获取模型配置成功", "data": province_tree})
 
+# 省市数据在第一次请求时加载
+locations = LocationService(os.path.join(BASE_DIR, "cn.json"))
 
-@app.get("/api/users")
+
+@bp.route("/location_msg")
+def get_data():
+    """省市树：预序列化、预压缩的字节，带 ETag，客户端可拿到 304"""
+    encoding, body, etag = locations.tree_body(request.accept_encodings)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype="application/json")
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+    response.set_etag(etag)
+    response.vary.add("Accept-Encoding")
+    response.cache_control.no_cache = True
+    return response
+
+
+@bp.route("/location_nearest")
+def location_nearest():
+    """离给定经纬度最近的城市：?lat=&lng=&k=1"""
+    lat = request.args.get("lat", type=float)
+    lng = request.args.get("lng", type=float)
+    if lat is None or lng is None or not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return err("lat/lng 无效")
+    k = max(1, min(request.args.get("k", 1, type=int), 50))
+    return ok(locations.nearest(lat, lng, k))
+
+
+@bp.get("/api/users")
 # @jwt_required()
 def list_users():
-    users = Users.query.all()
+    # 只查返回的列，不带出密码哈希
+    users = db.session.execute(
+        select(Users.id, Users.username, Users.telephone).order_by(Users.id)
+    ).all()
     return ok([{"id": u.id, "username": u.username, "telephone": u.telephone} for u in users])
 
 
 # 删除用户
-@app.post("/api/delete_user")
+@bp.post("/api/delete_user")
 # @jwt_required()
 def delete_user():
     data = request.json
@@ -874,7 +759,7 @@ def delete_user():
 
 # —— CRUD 接口 —— 
 
-@app.post("/api/create_reserve")
+@bp.post("/api/create_reserve")
 @jwt_required()
 def create_reserve():
     current_user = get_jwt_identity()
@@ -891,17 +776,20 @@ def create_reserve():
     db.session.commit()
     return ok({"id": reserve.id})
 
-@app.get("/api/reserves")
+# 预约列表（按 id 键集分页，可 fields= 投影）
+@bp.get("/api/reserves")
 def list_reserve():
-    plants = Reserve.query.all()
-    result = [
-        {col.name: getattr(p, col.name) for col in Reserve.__table__.columns}
-        for p in plants
-    ]
-    return ok(result)
+    try:
+        result, next_cursor = keyset_page(
+            db.session, Reserve, request.args,
+            exact=("username", "reserve_type", "status"),
+        )
+    except PageArgsError as e:
+        return err(str(e))
+    return ok(result, next_cursor=next_cursor)
 
 # 更新植物
-@app.post("/api/update_reserves")
+@bp.post("/api/update_reserves")
 def update_reserve():
     data = request.json
     pid = data.get("id")
@@ -918,7 +806,7 @@ def update_reserve():
     return ok(result)
 
 # 删除植物
-@app.post("/api/delete_reserve")
+@bp.post("/api/delete_reserve")
 def delete_reserve():
     reserve = Reserve.query.get(request.json.get("id"))
     if not reserve:
@@ -930,35 +818,56 @@ def delete_reserve():
 
 
 # 创建植物
-@app.post("/api/create_plant")
+@bp.post("/api/create_plant")
 def create_plant():
     data = request.get_json() or {}
     plant = Plants(**data)
     db.session.add(plant)
     db.session.commit()
+    plant_catalog.invalidate()
     return ok({"id": plant.id})
 
-# 获取所有植物（可分页）
-@app.get("/api/plants")
+# 获取植物列表
+# ?limit=&cursor= 按 id 键集分页，?fields=name,latin_name 只查这些列，
+# family/genus 精确过滤，sunlight/water_need/garden_type 按 '、' 分隔的值过滤
+@bp.get("/api/plants")
 def list_plants():
-    plants = Plants.query.all()
-    result = [
-        {col.name: getattr(p, col.name) for col in Plants.__table__.columns}
-        for p in plants
-    ]
-    return ok(result)
+    try:
+        result, next_cursor = keyset_page(
+            db.session, Plants, request.args,
+            exact=("family", "genus"),
+            multi=("sunlight", "water_need", "garden_type"),
+        )
+    except PageArgsError as e:
+        return err(str(e))
+    return ok(result, next_cursor=next_cursor)
+
+# 搜索植物：?q=&limit=&offset=，名称、拉丁名、拼音、科属、用途、病害等全文检索，按相关度排序
+@bp.get("/api/plants/search")
+def search_plants_api():
+    try:
+        q, limit, offset = search.parse_args(request.args)
+    except search.SearchArgsError as e:
+        return err(str(e))
+    conn = db.session.connection()
+    rows, next_offset = search.search_plants(
+        conn, q, limit, offset, fts=search.has_search_index(conn),
+    )
+    return ok(rows, next_offset=next_offset)
 
 # 获取单个植物
-@app.get("/api/plants/<int:pid>")
+@bp.get("/api/plants/<int:pid>")
 def get_plant(pid):
-    plant = Plants.query.get(pid)
+    # 只读：直接查列，不建 ORM 实例
+    plant = db.session.execute(
+        select(*Plants.__table__.columns).where(Plants.id == pid)
+    ).mappings().first()
     if not plant:
         return err("植物不存在", status=404)
-    result = {col.name: getattr(plant, col.name) for col in Plants.__table__.columns}
-    return ok(result)
+    return ok(dict(plant))
 
 # 更新植物
-@app.post("/api/update_plant")
+@bp.post("/api/update_plant")
 def update_plant():
     data = request.json
     pid = data.get("id")
@@ -971,184 +880,316 @@ def update_plant():
         if hasattr(plant, k):
             setattr(plant, k, v)
     db.session.commit()
+    plant_catalog.invalidate()
     result = {col.name: getattr(plant, col.name) for col in Plants.__table__.columns}
     return ok(result)
 
 # 删除植物
-@app.post("/api/delete_plant")
+@bp.post("/api/delete_plant")
 def delete_plant():
-    plant = Plants.query.get(request.json.get("id"))
-    if not plant:
+    # 按主键直接删，不先把整行（含长文本列）读出来
+    deleted = db.session.execute(delete(Plants).where(Plants.id == request.json.get("id")))
+    if not deleted.rowcount:
         return err("植物不存在", status=404)
-    db.session.delete(plant)
     db.session.commit()
+    plant_catalog.invalidate()
     return ok({"deleted": request.json.get("id")})
 
 
-@app.route("/api/save_image", methods=["POST"])
-def save_image():
-    body = request.get_json()
-    filename = body["filename"]
-    data = body["data"]
-    img_bytes = base64.b64decode(data)
-    
-    # 确保目录存在
-    os.makedirs("./saved_image", exist_ok=True)
-    
-    # 写入文件
-    with open(f"./saved_image/{filename}", "wb") as f:
-        f.write(img_bytes)
-    
-    return {"status": "ok"}
+def import_plants(stream, fmt, upsert=False, chunk_size=500):
+    importer = PlantImporter(db.session, Plants, chunk_size=chunk_size, upsert=upsert)
+    try:
+        return importer.run(stream, fmt)
+    finally:
+        # 部分块可能已经提交
+        if importer.inserted or importer.updated:
+            plant_catalog.invalidate()
+
+
+# 批量导入植物（CSV / JSON Lines）
+@bp.post("/api/import_plants")
+def import_plants_api():
+    upload = request.files.get("file")
+    if upload:
+        stream = upload.stream
+        fmt = request.args.get("format") or detect_format(upload.filename, upload.mimetype)
+    else:
+        stream = io.BufferedReader(request.stream)
+        fmt = request.args.get("format") or detect_format(content_type=request.content_type)
+    if fmt not in FORMATS:
+        return err("format 必须是 csv 或 jsonl")
 
+    upsert = request.args.get("upsert") in ("1", "true")
+    chunk_size = request.args.get("chunk_size", 500, type=int)
+    try:
+        result = import_plants(stream, fmt, upsert=upsert, chunk_size=chunk_size)
+    except ImportFormatError as e:
+        return err(str(e))
+    return ok(result)
 
-@app.route("/api/save_pdf", methods=["POST"])
-def save_pdf():
+
+@bp.route("/api/save_image", methods=["POST"])
+def save_image():
     """
-    接收 JSON: { "images": [ { "filename": "spring.png", "data": "base64..." }, ... ] }
-    返回生成的 PDF
+    保存截图，返回内容 hash；相同内容只存一份
+    JSON：{filename, data: base64}；multipart：file 字段；
+    其他 Content-Type 按原始字节读取，文件名用 ?filename=
+    带文件名时同时保留旧的按文件名引用方式
     """
-    body = request.get_json()
-    images = body.get("images", [])
-    plantlist = body.get("plantlist", [])
-    print(plantlist)
-
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    # pdf.set_font("Arial", "B", 14)
-    path = './SimHei.ttf'
-    pdf.add_font("NotoSans", "", path, uni=True)
-    
-    pdf.set_font("NotoSans", size=14)
-    pdf.add_page()
-    pdf.multi_cell(0, 10, "种植清单", align="C")
-    pdf.ln(5)
-
-    # 表头
-    pdf.set_font("NotoSans", size=12)
-    pdf.cell(100, 10, "植物名称", border=1, align="C")
-    pdf.cell(40, 10, "数量", border=1, align="C")
-    pdf.ln()
-
-    # 渲染列表
-    for item in plantlist:
-        pdf.cell(100, 10, item["name"], border=1, align="C")
-        pdf.cell(40, 10, str(item["count"]), border=1, align="C")
-        pdf.ln()
-
-    pdf.add_page()
-    pdf.set_font("NotoSans", size=14)
-    pdf.multi_cell(0, 10, "养护清单", align="C")
-    pdf.ln(5)
-
-    pdf.set_fill_color(200, 220, 255)  # 淡蓝色背景
-    pdf.cell(40, 10, "植物名称", border=1, align="C", fill=True)
-    pdf.cell(50, 10, "常见病害", border=1, align="C", fill=True)
-    pdf.cell(50, 10, "修剪建议", border=1, align="C", fill=True)
-    pdf.cell(50, 10, "防治方法", border=1, align="C", fill=True)
-    pdf.ln()
-
-    # 表格内容
-    pdf.set_font("NotoSans", size=10)
-
-    for item in plantlist:
-        plant = Plants.query.filter_by(name=item["name"]).first()
-        if not plant:
-            continue
-
-        # 名称（带数量）
-        pdf.cell(40, 10, f"{plant.name} × {item['count']}", border=1, align="L")
-
-        # 常见病害
-        pdf.cell(50, 10, plant.common_diseases or "-", border=1, align="L")
-
-        # 修剪建议
-        pdf.cell(50, 10, plant.pruning or "-", border=1, align="L")
-
-        # 防治方法
-        pdf.cell(50, 10, plant.control_methods or "-", border=1, align="L")
-
-        pdf.ln()
-
-    season_dic = {
-        '0': '春', '1': '夏', '2': '秋', '3': '冬'
-    }
-
-    for img in images:
-        filename = img["filename"]
-        data = img["data"]
-        img_bytes = base64.b64decode(data)
-        season = season_dic.get(filename.split(".")[0])
-        title = f"{season}季实景效果"
-        if season is None:
-            title = "花园平面效果"
+    if request.is_json:
+        body = request.get_json()
+        filename = body.get("filename")
+        chunks = iter_base64(body["data"])
+    elif request.files:
+        upload = request.files.get("file") or next(iter(request.files.values()))
+        filename = request.form.get("filename") or upload.filename
+        chunks = iter_stream(upload.stream)
+    else:
+        filename = request.args.get("filename")
+        chunks = iter_stream(request.stream)
 
-        # 使用 BytesIO 临时存储图片
-        img_io = io.BytesIO(img_bytes)
+    try:
+        # 文件名先校验，避免存下对象后才发现别名不合法
+        if filename:
+            alias_name(filename)
+        digest, size, _ = image_store.put(chunks)
+        if filename:
+            image_store.alias(filename, digest)
+    except (ValueError, binascii.Error) as e:
+        return err(f"图片数据无效: {e}")
+
+    return {"status": "ok", "hash": digest, "size": size, "url": f"/api/images/{digest}"}
+
+
+@bp.route("/api/images/<digest>")
+def get_image(digest):
+    """按 hash 取图，内容不可变：强缓存 + ETag，支持 Range"""
+    path = image_store.find(digest)
+    if path is None:
+        return err("图片不存在", status=404)
+    response = send_file(path, mimetype=sniff_mimetype(path), conditional=True,
+                         etag=digest, max_age=365 * 24 * 3600)
+    response.cache_control.immutable = True
+    return response
+
+
+def saved_image_path(ref):
+    """/api/save_image 保存过的图片：内容 hash 或文件名"""
+    return image_store.resolve(ref)
+
+
+def image_from_item(item):
+    """JSON 里的一张图：{"filename", "data": base64} 或 {"filename", "ref": 已保存图片的 hash 或文件名}"""
+    filename = item.get("filename", "")
+    if item.get("ref"):
+        path = saved_image_path(item["ref"])
+        if path is None:
+            raise ValueError(f"图片不存在: {item['ref']}")
+        return ReportImage.from_path(filename or item["ref"], path)
+    return ReportImage.from_base64(filename, item["data"])
+
+
+def report_request():
+    """
+    解析报告请求，返回 (plantlist, [ReportImage])
+    multipart：plantlist 为 JSON 字符串，images 为上传文件（按上传顺序成页），
+    refs 为可选的 JSON 列表，引用已保存的截图，排在上传图片之后
+    JSON：{ "plantlist": [...], "images": [ {filename, data 或 ref}, ... ] }
+    """
+    if request.files or request.form:
+        plantlist = json.loads(request.form.get("plantlist") or "[]")
+        images = [ReportImage.from_upload(f) for f in request.files.getlist("images")]
+        images += [image_from_item(item) for item in json.loads(request.form.get("refs") or "[]")]
+        return normalize_plantlist(plantlist), images
+
+    body = request.get_json() or {}
+    plantlist = normalize_plantlist(body.get("plantlist", []))
+    return plantlist, [image_from_item(item) for item in body.get("images", [])]
+
+
+# SQLite 单条语句的参数个数有上限，名称分批查
+NAME_BATCH = 500
+
+
+def care_plants_by_name(names):
+    """一次 IN 查询取养护清单需要的列；同名植物取 id 最小的一株"""
+    names = list(dict.fromkeys(names))
+    result = {}
+    for i in range(0, len(names), NAME_BATCH):
+        rows = (
+            db.session.query(Plants.id, Plants.name, Plants.common_diseases,
+                             Plants.pruning, Plants.control_methods)
+            .filter(Plants.name.in_(names[i:i + NAME_BATCH]))
+            .order_by(Plants.id.desc())
+        )
+        result.update((r.name, r) for r in rows)
+    return result
 
-        pdf.add_page()
 
-        pdf.multi_cell(0, 10, title, align="C")
-        pdf.ln(5)  # 空一行
-        pdf.image(img_io, x=10, y=50, w=180)  # 调整位置和宽度
+@bp.route("/api/save_pdf", methods=["POST"])
+def save_pdf():
+    """
+    接收种植清单和季节截图，逐页生成 PDF 并流式返回
+    图片可以 multipart 上传、base64 内嵌，或引用 /api/save_image 保存过的文件
+    """
+    try:
+        plantlist, images = report_request()
+    except (ValueError, KeyError) as e:
+        return err(f"请求参数错误: {e}")
 
-    # 将 PDF 写入 BytesIO
-    pdf_io = io.BytesIO()
-    pdf.output(pdf_io)
-    pdf_io.seek(0)
+    report = ReportBuilder(current_app.config["REPORT_FONT"])
+    report.plant_list(plantlist)
+    report.care_list(plantlist, care_plants_by_name(item["name"] for item in plantlist))
+    try:
+        for image in images:
+            report.image_page(image)
+    except ReportImageError as e:
+        return err(str(e))
 
     return send_file(
-        pdf_io,
+        report.to_tempfile(),
         as_attachment=True,
         download_name="seasons.pdf",
         mimetype="application/pdf"
     )
 
 
-plant_cache = {}
-
 def query_deepseek(name: str):
-    if name in plant_cache:
-        print(f"缓存命中: {name}")
-        return plant_cache[name]
-
-    client = OpenAI(
-        api_key="sk-48811da9f30a46c8a40fa6bbc95318c9", 
-        base_url="https://api.deepseek.com"
-    )
+    return plant_details.get(name)
 
-    print(f"请求 DeepSeek: {name}")
-
-    try:
-        response = client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[
-                {"role": "system", "content": "你是一个植物专家"},
-                {"role": "user", "content": f"给出{name}的详细信息，包括基本特征、生长习性、常见病害、修剪建议、防治方法。"},
-            ],
-            stream=False
-        )
-        answer = response.choices[0].message.content.strip()
-    except Exception as e:
-        print(f"DeepSeek API 调用失败: {e}")
-        answer = "植物信息获取失败，请稍后再试。"
 
-    # 写入缓存
-    plant_cache[name] = answer
-    return answer
+def sse_events(events):
+    """(事件, 文本) -> server-sent events"""
+    for event, chunk in events:
+        data = json.dumps({"text": chunk}, ensure_ascii=False)
+        yield f"event: {event}\ndata: {data}\n\n"
 
 
-
-
-# 获取单个植物
-@app.get("/api/get_plant_detail")
+# 获取单个植物详情
+# ?wait=0 时不等待上游：未缓存则后台请求并返回 202，前端稍后再取
+# ?stream=1 时以 server-sent events 边生成边返回：delta* 然后 done 或 error
+@bp.get("/api/get_plant_detail")
 def get_plant_detail():
     name = request.args.get("name")
-    answer = query_deepseek(name)
-    result = f"这是一个植物，{name}"
-    return ok(answer)
+    if not name:
+        return err("缺少 name")
+
+    if request.args.get("stream") == "1":
+        return Response(
+            sse_events(plant_details.stream(name)),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
 
+    if request.args.get("wait") == "0":
+        future = plant_details.submit(name)
+        if not future.done():
+            return jsonify({"code": 0, "msg": "pending", "data": None}), 202
+        return ok(future.result())
+
+    return ok(query_deepseek(name))
+
+
+@bp.cli.command("warm-plant-details")
+def warm_plant_details_command():
+    """为所有植物预热 DeepSeek 详情缓存"""
+    names = [n for (n,) in db.session.query(Plants.name).distinct()]
+    futures = plant_details.prewarm(names)
+    click.echo(f"共 {len(names)} 种植物，需要请求 {len(futures)} 个")
+    for future in futures:
+        future.result()
+    click.echo(f"缓存条数 {len(plant_details.cache)}")
+
+
+@bp.cli.command("precompress-assets")
+@click.option("--min-size", default=1024, show_default=True, help="小于它的文件不压缩（字节）")
+def precompress_assets_command(min_size):
+    """为前端构建产物和模型生成 .gz / .br"""
+    total = 0
+    for root in static_assets.roots:
+        if not os.path.isdir(root):
+            continue
+        for rel, encoding, before, after in precompress(root, min_size=min_size):
+            click.echo(f"{rel} [{encoding}] {before} -> {after}")
+            total += 1
+    click.echo(f"共生成 {total} 个压缩文件")
+
+
+@bp.cli.command("build-models")
+@click.option("--force", is_flag=True, help="忽略已有输出，全部重建")
+def build_models_command(force):
+    """把 OBJ 模型转成多级 LOD 的 GLB，并写 manifest.json"""
+    manifest, rebuilt = build_models(MODELS_DIR, force=force)
+    for key in rebuilt:
+        lods = manifest["assets"][key]["lods"]
+        sizes = ", ".join(f"{lod['triangles']} 面 {lod['bytes'] // 1024} KB" for lod in lods)
+        click.echo(f"{key}: {sizes}")
+    click.echo(f"共 {len(manifest['assets'])} 个模型，本次重建 {len(rebuilt)} 个")
+
+
+@bp.cli.command("check-queries")
+def check_queries_command():
+    """用 EXPLAIN QUERY PLAN 检查热点查询是否走索引"""
+    with db.engine.connect() as conn:
+        for name, value in storage.current_pragmas(conn).items():
+            click.echo(f"PRAGMA {name} = {value}")
+        failed = 0
+        for name, used, plan in storage.check_query_plans(conn):
+            click.echo(f"{'OK  ' if used else 'FAIL'} {name}: {' | '.join(plan)}")
+            failed += not used
+    if failed:
+        raise click.ClickException(f"{failed} 个查询没有用到索引")
+
+
+@bp.cli.command("rebuild-search-index")
+def rebuild_search_index_command():
+    """重算名称拼音并重建全文索引（装上 pypinyin 之后跑一次）"""
+    if not pinyin_available():
+        raise click.ClickException("没有安装 pypinyin，无法生成名称拼音（pip install pypinyin）")
+    with db.engine.begin() as conn:
+        rows = conn.execute(db.select(Plants.id, Plants.name)).all()
+        conn.execute(
+            db.update(Plants).where(Plants.id == db.bindparam("pid")).values(name_pinyin=db.bindparam("py")),
+            [{"pid": pid, "py": name_pinyin(name)} for pid, name in rows],
+        )
+        if not search.create_search_index(conn):
+            raise click.ClickException("当前 SQLite 不支持 FTS5 trigram")
+        search.rebuild_search_index(conn)
+    click.echo(f"已重建 {len(rows)} 种植物的搜索索引")
+
+
+@bp.cli.command("import-plants")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(FORMATS), help="默认按扩展名判断")
+@click.option("--upsert", is_flag=True, help="按 latin_name 更新已有植物")
+@click.option("--chunk-size", default=500, show_default=True)
+def import_plants_command(path, fmt, upsert, chunk_size):
+    """从 CSV / JSON Lines 批量导入植物"""
+    fmt = fmt or detect_format(path)
+    if fmt not in FORMATS:
+        raise click.UsageError("无法判断格式，请指定 --format")
+    with open(path, "rb") as f:
+        try:
+            result = import_plants(f, fmt, upsert=upsert, chunk_size=chunk_size)
+        except ImportFormatError as e:
+            raise click.ClickException(str(e))
+    for e in result["errors"]:
+        click.echo(f"第 {e['line']} 行: {e['error']}", err=True)
+    click.echo(f"新增 {result['inserted']}，更新 {result['updated']}，失败 {result['failed']}")
+
+
+@bp.cli.command("init-db")
+def init_db_command():
+    """建表并升级旧库（新增的列、索引、触发器、全文索引）"""
+    init_db()
+    click.echo("数据库已初始化")
+
+
+# flask --app app / gunicorn app:app 用这个实例；也可以 flask --app "app:create_app()"
+app = create_app()
 
 
 if __name__ == "__main__":
+    with app.app_context():
+        init_db()
     app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
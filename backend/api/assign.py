@@ -0,0 +1,272 @@
+"""花卉格子的植物分配
+
+同样的输入（格子、候选植物、种子、模式）总是得到同样的结果，便于缓存。
+每个格子的随机数由 (seed, x, y) 哈希得到（splitmix64，NumPy 向量化），
+与格子的处理顺序无关：增删别处的格子不会让其余格子重新洗牌。
+
+模式：
+- random       每格在候选里按哈希挑一株
+- no_adjacent  相邻（含对角）格子不种同一种植物
+- ratio        按目标比例分配各区域的格子数（最大余数法）
+- spacing      同种植物之间至少相隔其冠幅对应的格数
+约束模式按行扫描贪心放置，已种植物的 id 记在 NumPy 栅格里，每格只切片检查周围固定大小的邻域，
+整体近似线性；约束无法满足时退回哈希挑中的那株。
+"""
+import math
+
+import numpy as np
+
+from zones import MAX_COORD, MAX_RASTER_CELLS, ZONE_TYPES
+
+
+MODES = ("random", "no_adjacent", "ratio", "spacing")
+
+# 一个格子的边长（厘米），用于把冠幅换算成格数
+CELL_SIZE_CM = 100
+
+# 冠幅换算的间隔上限（格），避免个别大冠幅植物让邻域过大
+MAX_SPACING = 5
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+_PRIME_X = np.uint64(0xD6E8FEB86659FD93)
+_PRIME_Y = np.uint64(0xA0761D6478BD642F)
+
+
+class AssignError(ValueError):
+    pass
+
+
+def parse_seed(raw):
+    if raw in (None, ""):
+        return 0
+    try:
+        return int(raw) & 0xFFFFFFFFFFFFFFFF
+    except (TypeError, ValueError):
+        raise AssignError("seed 必须是整数")
+
+
+def _splitmix64(z):
+    z = z + _GOLDEN
+    z = (z ^ (z >> np.uint64(30))) * _MIX1
+    z = (z ^ (z >> np.uint64(27))) * _MIX2
+    return z ^ (z >> np.uint64(31))
+
+
+def cell_hashes(seed, xs, ys):
+    """每个格子一个 64 位哈希，只取决于 seed 和坐标"""
+    xk = np.asarray(xs, dtype=np.float64).view(np.uint64)
+    yk = np.asarray(ys, dtype=np.float64).view(np.uint64)
+    with np.errstate(over="ignore"):
+        z = _splitmix64(np.uint64(seed)) ^ (xk * _PRIME_X) ^ (yk * _PRIME_Y)
+        return _splitmix64(z)
+
+
+def spacing_cells(crown_cm, cell_cm=CELL_SIZE_CM):
+    """冠幅（厘米）-> 同种植物最小间隔（格）"""
+    if not crown_cm:
+        return 0
+    return min(MAX_SPACING, math.ceil(crown_cm / cell_cm))
+
+
+def largest_remainder(total, weights):
+    """把 total 按权重分成整数份，和恰好为 total"""
+    weights = np.asarray(weights, dtype=np.float64)
+    if weights.sum() <= 0:
+        weights = np.ones_like(weights)
+    exact = total * weights / weights.sum()
+    quotas = np.floor(exact).astype(np.int64)
+    rest = total - int(quotas.sum())
+    if rest:
+        # 余数大的先分；余数相同时下标小的先分
+        order = np.lexsort((np.arange(len(exact)), -(exact - quotas)))
+        quotas[order[:rest]] += 1
+    return quotas
+
+
+class PlacedGrid:
+    """
+    已种格子 -> 植物 id，供约束模式查邻域
+    整数坐标的格子记在覆盖本批格子（外扩 reach）的 int64 栅格里，-1 为空；
+    包围盒过大或坐标不在整数格子上时记在字典里，逐格查
+    """
+
+    def __init__(self, xs, ys, placed, reach):
+        self.reach = reach
+        self.cells = {}
+        self.raster = None
+        xs, ys = np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64)
+        on_grid = (xs == np.floor(xs)) & (ys == np.floor(ys)) & \
+            (np.abs(xs) <= MAX_COORD) & (np.abs(ys) <= MAX_COORD)
+        if on_grid.any():
+            gx, gy = xs[on_grid].astype(np.int64), ys[on_grid].astype(np.int64)
+            self.origin = (int(gx.min()) - reach, int(gy.min()) - reach)
+            shape = (int(gx.max()) + reach + 1 - self.origin[0],
+                     int(gy.max()) + reach + 1 - self.origin[1])
+            if shape[0] * shape[1] <= MAX_RASTER_CELLS:
+                self.raster = np.full(shape, -1, dtype=np.int64)
+        if placed:
+            self._load(placed, xs, ys, len(xs) * (2 * reach + 1) ** 2)
+
+    def _load(self, placed, xs, ys, probes):
+        """已种格子多于本批邻域总格数时（会话里的小增量）只查邻域，否则整表遍历"""
+        if len(placed) > probes:
+            r = self.reach
+            items = (
+                ((x + dx, y + dy), placed.get((x + dx, y + dy)))
+                for x, y in zip(xs.tolist(), ys.tolist())
+                for dx in range(-r, r + 1)
+                for dy in range(-r, r + 1)
+            )
+        else:
+            items = placed.items()
+        for (x, y), pid in items:
+            if pid is not None:
+                self.put(x, y, pid)
+
+    def index(self, x, y):
+        """栅格下标，不在栅格范围内时为 None；同一格反复查时先算好传给 put / blocked"""
+        # 非整数坐标（含 inf / nan，取余为 nan）不进栅格
+        if self.raster is None or x % 1 or y % 1:
+            return None
+        ix, iy = int(x) - self.origin[0], int(y) - self.origin[1]
+        w, h = self.raster.shape
+        if 0 <= ix < w and 0 <= iy < h:
+            return ix, iy
+        return None
+
+    def put(self, x, y, pid, at=False):
+        if at is False:
+            at = self.index(x, y)
+        if at is None:
+            self.cells[(x, y)] = pid
+        else:
+            self.raster[at] = pid
+
+    def blocked(self, x, y, pid, spacing, at=False):
+        """(x, y) 周围 spacing 格内（切比雪夫距离，含自身）是否已有 pid"""
+        if at is False:
+            at = self.index(x, y)
+        if at is not None:
+            ix, iy = at
+            # 窗口很小，转成 list 再查比 NumPy 的逐元素比较快（省掉 ufunc 调用开销）
+            window = self.raster[ix - spacing:ix + spacing + 1, iy - spacing:iy + spacing + 1]
+            return pid in window.ravel().tolist()
+        return any(
+            self.cells.get((x + dx, y + dy)) == pid
+            for dx in range(-spacing, spacing + 1)
+            for dy in range(-spacing, spacing + 1)
+        )
+
+
+class Assigner:
+    """
+    plants_by_zone: {区域类型: [PlantRecord, ...]}（按 id 排序）
+    ratios: ratio 模式下 {植物名或 id: 权重}，未列出的植物权重为 0
+    """
+
+    def __init__(self, plants_by_zone, seed=0, mode="random", ratios=None, cell_cm=CELL_SIZE_CM):
+        if mode not in MODES:
+            raise AssignError(f"不支持的分配模式: {mode}")
+        if ratios is not None and not isinstance(ratios, dict):
+            raise AssignError("ratios 必须是 {植物名: 权重}")
+        self.candidates = [plants_by_zone.get(z, []) for z in ZONE_TYPES]
+        self.seed = seed
+        self.mode = mode
+        self.ratios = ratios or {}
+        self.cell_cm = cell_cm
+
+    def assign(self, grid):
+        """返回与 grid 格子一一对应的 [PlantRecord 或 None]"""
+        return self.assign_cells(grid.xs, grid.ys, grid.codes)
+
+    def assign_cells(self, xs, ys, codes, placed=None):
+        """
+        为一批格子挑选植物；placed 为其余已种格子 {(x, y): 植物 id}，
+        约束模式下这批格子也要与它们保持间隔
+        """
+        codes = np.asarray(codes)
+        hashes = cell_hashes(self.seed, xs, ys)
+        if self.mode == "ratio":
+            index = self._ratio_index(codes, hashes)
+        else:
+            index = self._hash_index(codes, hashes)
+
+        if self.mode in ("no_adjacent", "spacing"):
+            return self._spread(xs, ys, codes, index, placed)
+        return self._picks(codes, index)
+
+    def _spacing(self, plant):
+        if self.mode == "no_adjacent":
+            return 1
+        return spacing_cells(plant.crown_cm, self.cell_cm)
+
+    def _hash_index(self, codes, hashes):
+        """每格在本区域候选中的下标，-1 表示没有候选"""
+        index = np.full(len(codes), -1, dtype=np.int64)
+        for code, cands in enumerate(self.candidates):
+            if not cands:
+                continue
+            mask = codes == code
+            index[mask] = (hashes[mask] % np.uint64(len(cands))).astype(np.int64)
+        return index
+
+    def _weight(self, plant):
+        w = self.ratios.get(plant.name, self.ratios.get(str(plant.id), 0))
+        try:
+            return max(0.0, float(w))
+        except (TypeError, ValueError):
+            raise AssignError(f"比例必须是数字: {plant.name}")
+
+    def _ratio_index(self, codes, hashes):
+        """按比例定好各植物的格数，再按哈希顺序把格子分给它们"""
+        index = np.full(len(codes), -1, dtype=np.int64)
+        for code, cands in enumerate(self.candidates):
+            if not cands:
+                continue
+            cells = np.flatnonzero(codes == code)
+            if not len(cells):
+                continue
+            weights = [self._weight(p) for p in cands] if self.ratios else [1] * len(cands)
+            quotas = largest_remainder(len(cells), weights)
+            order = cells[np.argsort(hashes[cells], kind="stable")]
+            index[order] = np.repeat(np.arange(len(cands)), quotas)
+        return index
+
+    def _picks(self, codes, index):
+        return [
+            self.candidates[c][i] if i >= 0 else None
+            for c, i in zip(codes.tolist(), index.tolist())
+        ]
+
+    def _spread(self, xs, ys, codes, index, placed=None):
+        """
+        行扫描贪心：从哈希挑中的候选开始轮换，
+        选第一株与已放置的同种植物距离（切比雪夫）都大于其间隔的
+        """
+        spacing = {p.id: self._spacing(p) for cands in self.candidates for p in cands}
+        reach = max(spacing.values(), default=0)
+        # 新放置的只写进 grid，不改调用方的 placed
+        grid = PlacedGrid(xs, ys, placed, reach)
+        xs, ys, codes = np.asarray(xs).tolist(), np.asarray(ys).tolist(), codes.tolist()
+        index = index.tolist()
+        picks = [None] * len(codes)
+
+        for i in sorted(range(len(codes)), key=lambda i: (ys[i], xs[i])):
+            start = index[i]
+            if start < 0:
+                continue
+            cands = self.candidates[codes[i]]
+            x, y = xs[i], ys[i]
+            at = grid.index(x, y)
+
+            choice = cands[start]
+            for k in range(len(cands)):
+                plant = cands[(start + k) % len(cands)]
+                if not grid.blocked(x, y, plant.id, spacing[plant.id], at):
+                    choice = plant
+                    break
+            picks[i] = choice
+            grid.put(x, y, choice.id, at)
+        return picks
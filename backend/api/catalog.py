@@ -0,0 +1,242 @@
+"""植物目录索引
+
+整张植物表只在首次使用时加载一次，每株植物的属性预先解析好
+（月份位掩码、最低耐受温度、花园类型集合、日照/需水位标志、模型配置），
+并按区域类型、花园风格、月份建立倒排索引。
+花园请求只需做几次集合求交，不再每次全表查询 ORM。
+植物增删改提交后调用 invalidate()，下次访问时重建；
+传入 version() 时每次访问还会比对植物表版本号，进程外的写入也能发现；
+传入 manifest() 时模型 manifest 重新生成后也会重建。
+
+传入 query() 时也可以不建内存索引，把筛选条件下推成 SQL（candidate_filter），
+只有候选植物才从数据库取出来，见 candidates(pushdown=True)。
+日照/需水/花园类型用写入时解析好的位标志列，条件写成 IN 列表，可以走索引。
+"""
+import threading
+
+from parsing import (
+    LEVELS, GARDEN_TYPES, SEASON_MONTHS, SEASON_MASKS,
+    parse_month_mask, parse_cold_tolerance, parse_crown_width, parse_level_flags,
+    get_min_temp_by_location, split_values, values_to_flags, masks_with_any,
+)
+from model_config import parse_model_config
+
+
+# 前端风格 -> 花园类型
+STYLE_MAP = {
+    "meadow": "混合草甸",
+    "insectFriendly": "昆虫友好花园",
+    "rainGarden": "雨水花园",
+    "children": "儿童花园",
+    "healing": "疗愈花园",
+    "rock": "岩石花园",
+    "edible": "可食花园",
+}
+
+# 区域类型 -> 日照/需水要求
+ZONE_QUERY_MAP = {
+    "全阴干": {"sunlight": ["低"], "water_need": ["低"]},
+    "全阴湿": {"sunlight": ["低"], "water_need": ["高"]},
+    "半日照干": {"sunlight": ["中"], "water_need": ["低", "中", "中、低"]},
+    "半日照湿": {"sunlight": ["中"], "water_need": ["高", "中", "高、中"]},
+    "全日照干": {"sunlight": ["高"], "water_need": ["低"]},
+    "全日照湿": {"sunlight": ["高"], "water_need": ["高"]},
+}
+
+# 区域类型 -> (日照位标志, 允许的需水位标志)
+# 需水按取值集合比较，'中、高' 和 '高、中' 等价
+ZONE_FLAGS = {
+    zone_type: (
+        values_to_flags(q["sunlight"], LEVELS),
+        frozenset(parse_level_flags(w) for w in q["water_need"]),
+    )
+    for zone_type, q in ZONE_QUERY_MAP.items()
+}
+
+# 目录需要的列
+CATALOG_COLUMNS = (
+    "id", "name", "latin_name", "family", "genus",
+    "garden_type", "sunlight", "water_need", "cold_resistance", "ornamental_period",
+    "ornamental_months", "cold_limit", "sunlight_flags", "water_flags",
+    "model_config", "crown_width_cm",
+)
+
+
+def _in_list(values):
+    return "(" + ", ".join(str(v) for v in sorted(values)) + ")" if values else "(NULL)"
+
+
+# 属于任一区域：每个区域一组 IN 条件，OR 起来
+ZONE_CONDITION = "(" + " OR ".join(
+    f"(sunlight_flags IN {_in_list(masks_with_any(sun, len(LEVELS)))}"
+    f" AND water_flags IN {_in_list(water)})"
+    for sun, water in ZONE_FLAGS.values()
+) + ")"
+
+
+def candidate_filter(selected_plants=None, view_season=None, style=None, lat=None):
+    """
+    candidates() 的筛选条件写成 SQL：返回 (WHERE 子句, 参数)
+    位标志都是整数常量，直接拼进 SQL；名称、温度走参数
+    """
+    clauses, params = [ZONE_CONDITION], {}
+
+    if selected_plants:
+        names = sorted(set(selected_plants))
+        params.update({f"name{i}": n for i, n in enumerate(names)})
+        clauses.append("name IN (" + ", ".join(f":name{i}" for i in range(len(names))) + ")")
+
+    if view_season and view_season != 'none':
+        clauses.append(f"(ornamental_months & {SEASON_MASKS.get(view_season, 0)}) != 0")
+
+    if style and style != 'none':
+        flags = values_to_flags({STYLE_MAP.get(style)}, GARDEN_TYPES)
+        clauses.append(f"garden_type_flags IN {_in_list(masks_with_any(flags, len(GARDEN_TYPES)))}")
+
+    if lat:
+        params["min_temp"] = get_min_temp_by_location(float(lat))
+        clauses.append("cold_limit <= :min_temp")
+
+    return " AND ".join(clauses), params
+
+
+class PlantRecord:
+    """目录中的一株植物（只读，已解析）"""
+    __slots__ = (
+        "id", "name", "latin_name", "family", "genus",
+        "month_mask", "min_temp", "garden_types", "sunlight_flags", "water_flags",
+        "model_config", "crown_cm",
+    )
+
+    def __init__(self, row, manifest=None):
+        self.id = row.id
+        self.name = row.name
+        self.latin_name = row.latin_name
+        self.family = row.family
+        self.genus = row.genus
+
+        # 优先用写入时解析好的派生列，旧数据才现场解析
+        self.month_mask = row.ornamental_months
+        if self.month_mask is None:
+            self.month_mask = parse_month_mask(row.ornamental_period)
+        self.min_temp = row.cold_limit
+        if self.min_temp is None:
+            self.min_temp = parse_cold_tolerance(row.cold_resistance)
+        self.garden_types = split_values(row.garden_type)
+        self.sunlight_flags = row.sunlight_flags
+        if self.sunlight_flags is None:
+            self.sunlight_flags = parse_level_flags(row.sunlight)
+        self.water_flags = row.water_flags
+        if self.water_flags is None:
+            self.water_flags = parse_level_flags(row.water_need)
+        self.model_config = parse_model_config(row.model_config, manifest)
+        self.crown_cm = parse_crown_width(row.crown_width_cm)
+
+    def in_zone(self, zone_type):
+        sunlight, water = ZONE_FLAGS[zone_type]
+        return bool(self.sunlight_flags & sunlight) and self.water_flags in water
+
+
+def group_by_zone(records):
+    """{区域类型: [PlantRecord, ...]}，保持 records 的顺序"""
+    return {
+        zone_type: [rec for rec in records if rec.in_zone(zone_type)]
+        for zone_type in ZONE_QUERY_MAP
+    }
+
+
+class _Snapshot:
+    """某一时刻的目录与倒排索引"""
+
+    def __init__(self, rows, version=None, manifest=None):
+        self.version = version
+        self.records = {}
+        self.by_name = {}
+        self.by_zone = {z: set() for z in ZONE_QUERY_MAP}
+        self.by_style = {}
+        self.by_month = {m: set() for m in range(1, 13)}
+
+        for row in rows:
+            rec = PlantRecord(row, manifest)
+            self.records[rec.id] = rec
+            self.by_name.setdefault(rec.name, set()).add(rec.id)
+            for zone_type, ids in self.by_zone.items():
+                if rec.in_zone(zone_type):
+                    ids.add(rec.id)
+            for garden_type in rec.garden_types:
+                self.by_style.setdefault(garden_type, set()).add(rec.id)
+            for month in range(1, 13):
+                if rec.month_mask & (1 << (month - 1)):
+                    self.by_month[month].add(rec.id)
+
+        self.all_ids = frozenset(self.records)
+
+
+class PlantCatalog:
+
+    def __init__(self, loader, version=None, manifest=None, query=None):
+        # loader() 返回带 CATALOG_COLUMNS 属性的行；version() 返回植物表版本号；
+        # manifest() 返回当前的模型 Manifest；
+        # query(where, params) 返回满足 WHERE 条件的行（按 id 排序），下推筛选时用
+        self._loader = loader
+        self._query = query
+        self._version = version
+        self._manifest = manifest
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._generation = 0
+
+    def invalidate(self):
+        """植物表有写入后调用"""
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+
+    def snapshot(self):
+        manifest = self._manifest() if self._manifest else None
+        version = (self._version() if self._version else None, manifest)
+        snap = self._snapshot
+        if snap is not None and snap.version == version:
+            return snap
+        with self._lock:
+            snap = self._snapshot
+            if snap is None or snap.version != version:
+                generation = self._generation
+                snap = _Snapshot(self._loader(), version, manifest)
+                # 构建期间被 invalidate 过就不保存，下次再建
+                if generation == self._generation:
+                    self._snapshot = snap
+            return snap
+
+    def candidates(self, selected_plants=None, view_season=None, style=None, lat=None, pushdown=False):
+        """
+        按筛选条件返回每个区域的候选植物
+        {区域类型: [PlantRecord, ...]}，每个列表按 id 排序
+        pushdown 时在数据库里筛选，不用内存索引
+        """
+        if pushdown and self._query is not None:
+            where, params = candidate_filter(selected_plants, view_season, style, lat)
+            manifest = self._manifest() if self._manifest else None
+            return group_by_zone([PlantRecord(row, manifest) for row in self._query(where, params)])
+
+        snap = self.snapshot()
+        ids = snap.all_ids
+
+        if selected_plants:
+            ids = ids & set().union(*(snap.by_name.get(n, ()) for n in selected_plants))
+
+        if view_season and view_season != 'none':
+            months = SEASON_MONTHS.get(view_season, [])
+            ids = ids & set().union(*(snap.by_month[m] for m in months))
+
+        if style and style != 'none':
+            ids = ids & snap.by_style.get(STYLE_MAP.get(style), set())
+
+        if lat:
+            min_temp = get_min_temp_by_location(float(lat))
+            ids = {i for i in ids if snap.records[i].min_temp <= min_temp}
+
+        return {
+            zone_type: [snap.records[i] for i in sorted(ids & zone_ids)]
+            for zone_type, zone_ids in snap.by_zone.items()
+        }
@@ -0,0 +1,97 @@
+"""/plants_data 的紧凑格式（列式）
+
+每个格子不再是一个 dict，而是几列等长数组：
+x、y、zone（区域编码，见 zones.ZONE_TYPES）、plant（植物表下标，-1 表示无植物），
+区域和植物各带一张字典表。用 orjson 直接序列化 NumPy 数组；
+客户端 Accept 为 MessagePack 且装了 msgpack 时用 MessagePack。
+"""
+import json
+
+import numpy as np
+
+from zones import ZONE_TYPES, ZONE_COLORS
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+COLUMNS_MIME = "application/vnd.garden.columns+json"
+MSGPACK_MIMES = ("application/msgpack", "application/x-msgpack")
+
+PLANT_COLOR = "#6BAF92"
+
+ZONE_TABLE = [{"type": t, "color": c} for t, c in zip(ZONE_TYPES, ZONE_COLORS)]
+
+
+def _accepts(accept_mimetypes, mimes):
+    """Accept 里显式列出了其中之一（不算 */* 通配）"""
+    return any(value in mimes and q > 0 for value, q in accept_mimetypes)
+
+
+def wants_columns(args, accept_mimetypes):
+    """?format=columns，或 Accept 里明确要列式 / MessagePack"""
+    if args.get("format") == "columns":
+        return True
+    return _accepts(accept_mimetypes, (COLUMNS_MIME, *MSGPACK_MIMES))
+
+
+def to_columns(grid, picks):
+    """ZoneGrid + 每格选中的植物 -> 列式 dict（数组仍是 NumPy）"""
+    index = {}
+    plants = []
+    model_configs = {}
+    plant_col = np.full(len(picks), -1, dtype=np.int32)
+    for i, plant in enumerate(picks):
+        if plant is None:
+            continue
+        k = index.get(plant.id)
+        if k is None:
+            k = index[plant.id] = len(plants)
+            plants.append({
+                "id": plant.id,
+                "name": plant.name,
+                "latin_name": plant.latin_name,
+                "family": plant.family,
+                "genus": plant.genus,
+                "color": PLANT_COLOR,
+            })
+            model_configs[plant.id] = plant.model_config
+        plant_col[i] = k
+
+    return {
+        "n": len(picks),
+        "x": np.ascontiguousarray(grid.xs),
+        "y": np.ascontiguousarray(grid.ys),
+        "zone": np.ascontiguousarray(grid.codes),
+        "plant": plant_col,
+        "zones": ZONE_TABLE,
+        "plants": plants,
+        "model_configs": model_configs,
+    }
+
+
+def _lists(columns):
+    return {k: v.tolist() if isinstance(v, np.ndarray) else v for k, v in columns.items()}
+
+
+def response_mimetype(accept_mimetypes):
+    """按 Accept 决定用哪种编码返回"""
+    if msgpack is not None and _accepts(accept_mimetypes, MSGPACK_MIMES):
+        return MSGPACK_MIMES[1]
+    return COLUMNS_MIME
+
+
+def encode(payload, mimetype=COLUMNS_MIME):
+    if mimetype in MSGPACK_MIMES:
+        return msgpack.packb(dict(payload, data=_lists(payload["data"])))
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    data = dict(payload, data=_lists(payload["data"]))
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
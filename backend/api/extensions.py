@@ -0,0 +1,13 @@
+"""Flask 扩展实例
+
+这里只创建，不绑定 app；由 app.create_app() 调用 init_app，
+模型和其它模块可以直接 import db，不会反过来 import app。
+"""
+from flask_cors import CORS
+from flask_jwt_extended import JWTManager
+from flask_sqlalchemy import SQLAlchemy
+
+
+db = SQLAlchemy()
+jwt = JWTManager()
+cors = CORS()
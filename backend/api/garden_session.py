@@ -0,0 +1,253 @@
+"""花园编辑会话：增量分类与分配
+
+会话里保存障碍物/水体的计数、每个格子被多少障碍物/水体覆盖（半日照、湿润的依据）、
+每个花卉格子的区域编码和上一次的分配。编辑时只更新改动点周围半径内的覆盖计数，
+只重新分类这些格子，区域变了的和新增的花卉格子才重新挑植物，最后只返回变化的格子。
+分类规则与 zones.classify 一致。random / ratio 模式下结果与整体重算相同；
+no_adjacent / spacing 只在改动的格子上局部修正，约束仍然满足，但具体选择可能与整体重算不同。
+"""
+import math
+import threading
+import time
+import uuid
+from collections import ChainMap, Counter, OrderedDict
+
+from zones import LIGHT_SHADE, LIGHT_HALF, LIGHT_FULL
+
+
+LAYERS = ("flowerPositions", "buildingPositions", "wallPositions", "waterPositions")
+
+# 不在整数格子上的花卉视为全日照干
+OFF_GRID_CODE = LIGHT_FULL * 2
+
+
+class SessionError(ValueError):
+    pass
+
+
+def _as_cell(x, y):
+    """整数格子返回 (int, int)，否则 None"""
+    if x != math.floor(x) or y != math.floor(y):
+        return None
+    return int(x), int(y)
+
+
+def _coords(name, positions):
+    """[{x, y}] -> [(float, float)]；格式不对时抛 SessionError"""
+    if positions is None:
+        return []
+    if not isinstance(positions, list):
+        raise SessionError(f"{name} 必须是列表")
+    coords = []
+    for p in positions:
+        try:
+            x, y = float(p["x"]), float(p["y"])
+        except (TypeError, ValueError, KeyError):
+            raise SessionError(f"{name} 里的点格式错误: {p!r}") from None
+        if not (math.isfinite(x) and math.isfinite(y)):
+            raise SessionError(f"{name} 里的坐标无效: {p!r}")
+        coords.append((x, y))
+    return coords
+
+
+def _points(coords, ceil=False):
+    """[(x, y)] -> 整数格子列表，不在格子上的丢掉；墙坐标在 ±0.5 上，先向上取整"""
+    cells = []
+    for x, y in coords:
+        if ceil:
+            x, y = math.ceil(x), math.ceil(y)
+        cell = _as_cell(x, y)
+        if cell is not None:
+            cells.append(cell)
+    return cells
+
+
+def _flower_key(x, y):
+    """整数格子为 (int, int)；不在格子上的花卉为 (float, float)"""
+    return _as_cell(x, y) or (x, y)
+
+
+def parse_layers(layers):
+    """
+    校验并整理一组增删：{布局字段: [{x, y}]} -> (障碍物格子, 水体格子, 花卉格子)
+    在改动会话之前整体校验，出错时抛 SessionError，会话保持原样
+    """
+    if layers is None:
+        layers = {}
+    if not isinstance(layers, dict):
+        raise SessionError("add / remove 必须是对象")
+    unknown = [k for k in layers if k not in LAYERS]
+    if unknown:
+        raise SessionError(f"未知字段: {', '.join(map(str, unknown))}")
+    obstacles = _points(_coords("buildingPositions", layers.get("buildingPositions")), ceil=True) + \
+        _points(_coords("wallPositions", layers.get("wallPositions")), ceil=True)
+    water = _points(_coords("waterPositions", layers.get("waterPositions")))
+    flowers = [_flower_key(x, y) for x, y in _coords("flowerPositions", layers.get("flowerPositions"))]
+    return obstacles, water, flowers
+
+
+def _plant_id(plant):
+    return None if plant is None else plant.id
+
+
+def _square(cell, radius):
+    x, y = cell
+    for dx in range(-radius, radius + 1):
+        for dy in range(-radius, radius + 1):
+            yield x + dx, y + dy
+
+
+class GardenSession:
+
+    def __init__(self, prop, shade_radius=1, wet_radius=1):
+        self.prop = prop
+        self.shade_radius = shade_radius
+        self.wet_radius = wet_radius
+        self.obstacles = Counter()
+        self.water = Counter()
+        self.shade_cover = Counter()   # 周围（不含自身）障碍物格数
+        self.wet_cover = Counter()     # 周围（不含自身）水体格数
+        self.flowers = {}              # 格子 -> 区域编码，保持加入顺序
+        self.picks = {}                # 格子 -> PlantRecord 或 None
+        self.placed = {}               # 格子 -> 植物 id，只含种了植物的格子
+        self.catalog_version = None
+        self.lock = threading.Lock()
+        self.touched = time.monotonic()
+
+    def code(self, cell):
+        if isinstance(cell[0], float):
+            return OFF_GRID_CODE
+        if self.obstacles[cell]:
+            light = LIGHT_SHADE
+        elif self.shade_cover[cell]:
+            light = LIGHT_HALF
+        else:
+            light = LIGHT_FULL
+        return light * 2 + (1 if self.wet_cover[cell] else 0)
+
+    def _bump(self, counts, cover, cell, radius, delta, affected):
+        """障碍物/水体计数变化；只有格子从无到有、从有到无时才更新周围覆盖"""
+        before = counts[cell]
+        after = max(0, before + delta)
+        if after:
+            counts[cell] = after
+        else:
+            counts.pop(cell, None)
+        if bool(before) == bool(after):
+            return
+        step = 1 if after else -1
+        for near in _square(cell, radius):
+            if near != cell:
+                cover[near] += step
+                if not cover[near]:
+                    del cover[near]
+            affected.add(near)
+
+    def apply(self, add=None, remove=None):
+        """
+        应用增删，返回 (需要重新分类的花卉格子, 被删掉的花卉格子)
+        add / remove 与 /plants_data 的布局字段相同；先整体校验，格式不对时会话不变
+        """
+        remove, add = parse_layers(remove), parse_layers(add)
+        affected = set()
+        removed = []
+
+        for (obstacles, water, _), delta in ((remove, -1), (add, 1)):
+            for cell in obstacles:
+                self._bump(self.obstacles, self.shade_cover, cell, self.shade_radius, delta, affected)
+            for cell in water:
+                self._bump(self.water, self.wet_cover, cell, self.wet_radius, delta, affected)
+
+        for cell in remove[2]:
+            if cell in self.flowers:
+                del self.flowers[cell]
+                self.picks.pop(cell, None)
+                self.placed.pop(cell, None)
+                removed.append(cell)
+                affected.discard(cell)
+        for cell in add[2]:
+            if cell not in self.flowers:
+                self.flowers[cell] = None
+                affected.add(cell)
+
+        # 只重新分类受影响且是花卉的格子，区域不变的不动
+        changed = []
+        for cell in affected:
+            if cell not in self.flowers:
+                continue
+            code = self.code(cell)
+            if code != self.flowers[cell] or cell not in self.picks:
+                self.flowers[cell] = code
+                changed.append(cell)
+        return changed, removed
+
+    def reassign(self, assigner, cells):
+        """为 cells 重新挑植物，返回植物有变化的格子（含新格子）"""
+        if not cells:
+            return []
+        cells = sorted(cells, key=lambda c: (c[1], c[0]))
+        # 待重排的格子在叠加层里视为空，其余格子直接查会话里的 placed，不整表复制
+        placed = ChainMap(dict.fromkeys(cells), self.placed)
+        picks = assigner.assign_cells(
+            [c[0] for c in cells], [c[1] for c in cells],
+            [self.flowers[c] for c in cells], placed,
+        )
+        updated = []
+        for cell, plant in zip(cells, picks):
+            old = self.picks.get(cell, cell)
+            self.picks[cell] = plant
+            if plant is None:
+                self.placed.pop(cell, None)
+            else:
+                self.placed[cell] = plant.id
+            if old is cell or _plant_id(old) != _plant_id(plant):
+                updated.append(cell)
+        return updated
+
+    def cells(self, keys=None):
+        """[(格子, 区域编码, PlantRecord 或 None)]，默认全部（按加入顺序）"""
+        keys = self.flowers if keys is None else keys
+        return [(c, self.flowers[c], self.picks.get(c)) for c in keys]
+
+
+class SessionStore:
+    """内存里的会话表，按最近使用淘汰，闲置超时的丢弃"""
+
+    def __init__(self, max_sessions=256, ttl=3600):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()
+
+    def add(self, session):
+        sid = uuid.uuid4().hex
+        with self._lock:
+            self._expire()
+            self._sessions[sid] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return sid
+
+    def get(self, sid):
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(sid)
+            if session is not None:
+                self._sessions.move_to_end(sid)
+                session.touched = time.monotonic()
+            return session
+
+    def pop(self, sid):
+        with self._lock:
+            return self._sessions.pop(sid, None)
+
+    def _expire(self):
+        deadline = time.monotonic() - self.ttl
+        while self._sessions:
+            sid, session = next(iter(self._sessions.items()))
+            if session.touched >= deadline:
+                break
+            del self._sessions[sid]
+
+    def __len__(self):
+        return len(self._sessions)
@@ -0,0 +1,151 @@
+"""按内容寻址的截图存储
+
+图片边写盘边算 sha256，先写临时文件再原子 rename 到 objects/ab/<hash>，
+相同内容只存一份。旧接口按文件名保存的图片以硬链接别名的形式放在根目录，
+报告和前端既可以用文件名也可以用 hash 引用。
+"""
+import base64
+import hashlib
+import os
+import re
+import tempfile
+
+
+CHUNK_SIZE = 64 * 1024
+
+HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+# 文件头 -> MIME
+MAGIC_TYPES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+def iter_base64(data, chunk_size=CHUNK_SIZE):
+    """
+    分块解码 base64 字符串（可带 data: 前缀）
+    允许换行、空格等空白（如 MIME 按 76 列折行），去掉空白后凑满 4 的倍数再解码
+    """
+    if data.startswith("data:"):
+        data = data.partition(",")[2]
+    step = chunk_size // 3 * 4
+    pending = ""
+    for i in range(0, len(data), step):
+        pending += "".join(data[i:i + step].split())
+        cut = len(pending) - len(pending) % 4
+        if cut:
+            yield base64.b64decode(pending[:cut], validate=True)
+            pending = pending[cut:]
+    if pending:
+        # 剩下不足 4 个字符，长度不对，交给 b64decode 报错
+        yield base64.b64decode(pending, validate=True)
+
+
+def iter_stream(stream, chunk_size=CHUNK_SIZE):
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def sniff_mimetype(path):
+    with open(path, "rb") as f:
+        head = f.read(12)
+    for magic, mimetype in MAGIC_TYPES:
+        if head.startswith(magic):
+            return mimetype
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+# 别名临时文件名会在文件名后加 ".<16 位 hash>.link"，留出余量
+MAX_NAME_BYTES = 200
+
+
+def alias_name(filename):
+    """校验别名用的文件名，返回去掉目录部分的文件名；不合法时抛 ValueError"""
+    name = os.path.basename(filename or "")
+    if (not name or not name.strip(".") or name in ("objects", "tmp")
+            or "\0" in name or len(os.fsencode(name)) > MAX_NAME_BYTES):
+        raise ValueError(f"文件名无效: {filename}")
+    return name
+
+
+class ImageStore:
+
+    def __init__(self, root):
+        self.root = root
+        self.objects = os.path.join(root, "objects")
+        self.tmp = os.path.join(root, "tmp")
+
+    def object_path(self, digest):
+        return os.path.join(self.objects, digest[:2], digest)
+
+    def put(self, chunks):
+        """写入字节块，返回 (hash, 字节数, 是否新写入)"""
+        os.makedirs(self.tmp, exist_ok=True)
+        sha = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    sha.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+
+            if not size:
+                raise ValueError("图片为空")
+            digest = sha.hexdigest()
+            path = self.object_path(digest)
+            if os.path.exists(path):
+                os.unlink(tmp_path)
+                return digest, size, False
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+            return digest, size, True
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def alias(self, filename, digest):
+        """根目录下的文件名指向某个对象（硬链接，原子替换）"""
+        name = alias_name(filename)
+        target = os.path.join(self.root, name)
+        tmp_path = os.path.join(self.tmp, f"{name}.{digest[:16]}.link")
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        os.link(self.object_path(digest), tmp_path)
+        try:
+            os.replace(tmp_path, target)
+        except IsADirectoryError:
+            # 根目录下有同名目录
+            os.unlink(tmp_path)
+            raise ValueError(f"文件名无效: {filename}") from None
+        return target
+
+    def find(self, digest):
+        """hash -> 对象路径，不存在返回 None"""
+        if not HASH_RE.match(digest or ""):
+            return None
+        path = self.object_path(digest)
+        return path if os.path.isfile(path) else None
+
+    def resolve(self, ref):
+        """hash 或文件名 -> 磁盘路径，不存在返回 None"""
+        ref = ref or ""
+        if HASH_RE.match(ref):
+            return self.find(ref)
+        name = os.path.basename(ref)
+        if not name or name in ("objects", "tmp"):
+            return None
+        path = os.path.join(self.root, name)
+        return path if os.path.isfile(path) else None
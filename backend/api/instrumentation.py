@@ -0,0 +1,183 @@
+"""日志、请求 ID 与指标
+
+- 每个请求带一个 ID（沿用客户端的 X-Request-ID，没有就生成），响应头里返回
+- stage("classify") 这样的计时块按阶段累计耗时直方图；关闭时返回共享的空上下文，几乎没有开销
+- 按采样率抽取请求，输出一行结构化日志（含各阶段耗时）
+- /metrics 以 Prometheus 文本格式输出
+不依赖 prometheus_client，指标类型只实现了用到的 Counter 和 Histogram。
+"""
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+
+from flask import Response, g, has_request_context, request
+
+
+log = logging.getLogger("garden")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+_NOOP = nullcontext()
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(n, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for n, v in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Counter:
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [各桶计数, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = (*self.labelnames, "le")
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets, counts):
+                    cumulative += n
+                    lines.append(f"{self.name}_bucket{_labels(names, (*labels, bound))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_labels(names, (*labels, '+Inf'))} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class _Stage:
+    __slots__ = ("inst", "name", "start")
+
+    def __init__(self, inst, name):
+        self.inst = inst
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        self.inst.stage_seconds.observe(elapsed, self.name)
+        if has_request_context():
+            trace = g.get("trace")
+            if trace is not None:
+                trace[self.name] = trace.get(self.name, 0.0) + elapsed
+        return False
+
+
+class Instrumentation:
+
+    def __init__(self, enabled=True, sample_rate=0.0):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.requests = Counter(
+            "garden_http_requests_total", "HTTP 请求数", ("method", "endpoint", "status")
+        )
+        self.request_seconds = Histogram(
+            "garden_http_request_duration_seconds", "HTTP 请求耗时", ("endpoint",)
+        )
+        self.stage_seconds = Histogram(
+            "garden_stage_duration_seconds", "各阶段耗时", ("stage",)
+        )
+        self.metrics = [self.requests, self.request_seconds, self.stage_seconds]
+
+    def stage(self, name):
+        """with inst.stage("assign"): ...，关闭时不计时"""
+        if not self.enabled:
+            return _NOOP
+        return _Stage(self, name)
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def init_app(self, app):
+        app.before_request(self._before)
+        app.after_request(self._after)
+        app.add_url_rule("/metrics", "metrics", self._metrics_view)
+
+    def _before(self):
+        g.request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex[:16]
+        if not self.enabled:
+            return
+        g.request_start = time.perf_counter()
+        if self.sample_rate and random.random() < self.sample_rate:
+            g.trace = {}
+
+    def _after(self, response):
+        response.headers[REQUEST_ID_HEADER] = g.get("request_id", "")
+        start = g.get("request_start")
+        if start is None:
+            return response
+
+        elapsed = time.perf_counter() - start
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        self.requests.inc(request.method, endpoint, response.status_code)
+        self.request_seconds.observe(elapsed, endpoint)
+
+        trace = g.get("trace")
+        if trace is not None:
+            log.info(json.dumps({
+                "request_id": g.request_id,
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "ms": round(elapsed * 1000, 3),
+                "stages_ms": {k: round(v * 1000, 3) for k, v in trace.items()},
+            }, ensure_ascii=False))
+        return response
+
+    def _metrics_view(self):
+        return Response(self.render(), mimetype="text/plain; version=0.0.4")
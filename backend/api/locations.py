@@ -0,0 +1,182 @@
+"""城市数据：省市树与最近城市查询
+
+cn.json 只在启动或文件 mtime 变化时重新解析。省市树的响应体预先序列化，
+并准备好 gzip / brotli 压缩版本和 ETag，请求时直接返回字节。
+最近城市按经纬度网格分桶，从所在格子向外逐圈搜索，用球面距离排序。
+"""
+import gzip
+import hashlib
+import heapq
+import json
+import math
+import os
+import threading
+from collections import defaultdict
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG = math.pi * EARTH_RADIUS_KM / 180
+
+# 网格边长（度）
+GRID_CELL_DEG = 1.0
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def build_tree(cities):
+    """按省份分组，保持文件里的顺序"""
+    tree = defaultdict(list)
+    for city in cities:
+        tree[city["admin_name_zh"]].append({
+            "city": city["city_zh"],
+            "lat": city["lat"],
+            "lng": city["lng"],
+            "population": city["population"],
+            "population_proper": city["population_proper"]
+        })
+    return [{"province": p, "cities": c} for p, c in tree.items()]
+
+
+class EncodedBody:
+    """同一份响应体的各种编码：{编码: (bytes, etag)}，identity 为未压缩"""
+
+    def __init__(self, body):
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.variants = {"identity": (body, digest)}
+        self.variants["gzip"] = (gzip.compress(body, 9, mtime=0), f"{digest}-gz")
+        if brotli is not None:
+            self.variants["br"] = (brotli.compress(body), f"{digest}-br")
+
+    def choose(self, accept_encodings):
+        """按客户端 Accept-Encoding 选最小的可用编码，返回 (编码, bytes, etag)"""
+        best = "identity"
+        for name in ("br", "gzip"):
+            if name in self.variants and accept_encodings[name]:
+                if len(self.variants[name][0]) < len(self.variants[best][0]):
+                    best = name
+        body, etag = self.variants[best]
+        return best, body, etag
+
+
+class GridIndex:
+    """经纬度网格分桶"""
+
+    def __init__(self, points, cell=GRID_CELL_DEG):
+        # points: [(lat, lng, item)]
+        self.cell = cell
+        self.buckets = defaultdict(list)
+        for lat, lng, item in points:
+            self.buckets[self._key(lat, lng)].append((lat, lng, item))
+        keys = list(self.buckets)
+        self.min_row = min((k[0] for k in keys), default=0)
+        self.max_row = max((k[0] for k in keys), default=0)
+        self.min_col = min((k[1] for k in keys), default=0)
+        self.max_col = max((k[1] for k in keys), default=0)
+
+    def _key(self, lat, lng):
+        return math.floor(lat / self.cell), math.floor(lng / self.cell)
+
+    def _ring(self, row, col, r):
+        if r == 0:
+            yield row, col
+            return
+        for c in range(col - r, col + r + 1):
+            yield row - r, c
+            yield row + r, c
+        for rr in range(row - r + 1, row + r):
+            yield rr, col - r
+            yield rr, col + r
+
+    def _ring_bound_km(self, lat, r):
+        """第 r 圈以外的点离查询点的距离下界"""
+        if r <= 0:
+            return 0.0
+        edge = (r - 1) * self.cell
+        # 经度方向按该圈能到达的最高纬度收缩；再留 1% 余量抵消大圆与纬线的差
+        far_lat = min(90.0, abs(lat) + (r + 1) * self.cell)
+        return 0.99 * edge * KM_PER_DEG * math.cos(math.radians(far_lat))
+
+    def nearest(self, lat, lng, k=1):
+        """返回 [(距离km, item)]，按距离升序"""
+        if not self.buckets or k <= 0:
+            return []
+        row, col = self._key(lat, lng)
+        # 查询点可能在网格外，圈数至少要覆盖到最远的格子
+        reach = max(abs(row - self.min_row), abs(row - self.max_row),
+                    abs(col - self.min_col), abs(col - self.max_col))
+        heap = []  # 最大堆（取负距离），保留最近的 k 个
+        for r in range(reach + 1):
+            if len(heap) >= k and -heap[0][0] <= self._ring_bound_km(lat, r):
+                break
+            for key in self._ring(row, col, r):
+                for plat, plng, item in self.buckets.get(key, ()):
+                    d = haversine_km(lat, lng, plat, plng)
+                    entry = (-d, id(item), item)
+                    if len(heap) < k:
+                        heapq.heappush(heap, entry)
+                    elif d < -heap[0][0]:
+                        heapq.heapreplace(heap, entry)
+        return sorted(((-d, item) for d, _, item in heap), key=lambda e: e[0])
+
+
+class _Snapshot:
+
+    def __init__(self, cities):
+        self.tree = build_tree(cities)
+        payload = {"success": True, "message": "获取模型配置成功", "data": self.tree}
+        self.body = EncodedBody(
+            json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        )
+        points = []
+        for city in cities:
+            try:
+                lat, lng = float(city["lat"]), float(city["lng"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            points.append((lat, lng, {
+                "province": city["admin_name_zh"],
+                "city": city["city_zh"],
+                "lat": lat,
+                "lng": lng,
+            }))
+        self.index = GridIndex(points)
+
+
+class LocationService:
+    """cn.json 的内存视图，文件 mtime 变化时自动重建"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._snapshot = None
+
+    def snapshot(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        self._snapshot = _Snapshot(json.load(f))
+                    self._mtime = mtime
+        return self._snapshot
+
+    def tree_body(self, accept_encodings):
+        """(编码, bytes, etag)"""
+        return self.snapshot().body.choose(accept_encodings)
+
+    def nearest(self, lat, lng, k=1):
+        return [
+            dict(item, distance_km=round(d, 3))
+            for d, item in self.snapshot().index.nearest(lat, lng, k)
+        ]
@@ -0,0 +1,114 @@
+"""旧数据库的就地升级
+
+db.create_all() 只会建新表，不会给已有表加列、加索引，这里补上缺失的列和索引并回填数据。
+每一步都可以重复执行。
+
+catalog_meta 里的 plants_version 由触发器在 plants 每次增删改时加一，
+进程外（批量导入、命令行）的写入也能让目录和结果缓存失效。
+"""
+import logging
+
+from sqlalchemy import inspect, text
+
+from parsing import DERIVED_COLUMNS, derive_columns, name_pinyin, pinyin_available
+from search import create_search_index
+
+
+log = logging.getLogger("garden")
+
+
+# plants 表后来新增的列
+PLANT_COLUMNS = {
+    "ornamental_months": "INTEGER",
+    "cold_limit": "INTEGER",
+    "name_pinyin": "TEXT",
+    "sunlight_flags": "INTEGER",
+    "water_flags": "INTEGER",
+    "garden_type_flags": "INTEGER",
+}
+
+
+def add_missing_columns(conn, table, columns):
+    existing = {c["name"] for c in inspect(conn).get_columns(table)}
+    for name, ddl in columns.items():
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+
+
+def backfill_derived_columns(conn):
+    """回填派生列为空的植物行"""
+    sources = sorted({src for src, _ in DERIVED_COLUMNS.values()})
+    missing = " OR ".join(f"{col} IS NULL" for col in DERIVED_COLUMNS)
+    rows = conn.execute(text(
+        f"SELECT id, {', '.join(sources)} FROM plants WHERE {missing}"
+    )).mappings().all()
+    if not rows:
+        return 0
+
+    assignments = ", ".join(f"{col} = :{col}" for col in DERIVED_COLUMNS)
+    conn.execute(
+        text(f"UPDATE plants SET {assignments} WHERE id = :id"),
+        [dict(derive_columns(row.get), id=row["id"]) for row in rows],
+    )
+    return len(rows)
+
+
+def backfill_name_pinyin(conn):
+    """
+    没装 pypinyin 时写入的拼音是空串，装上之后补算这些行
+    拼音列在全文索引里，更新触发器会同步索引
+    """
+    if not pinyin_available():
+        log.warning("没有安装 pypinyin，名称拼音为空，拼音搜索不可用（pip install pypinyin）")
+        return 0
+    rows = conn.execute(text(
+        "SELECT id, name FROM plants WHERE name_pinyin = '' AND COALESCE(name, '') != ''"
+    )).all()
+    updates = [{"id": pid, "py": name_pinyin(name)} for pid, name in rows]
+    updates = [u for u in updates if u["py"]]
+    if updates:
+        conn.execute(text("UPDATE plants SET name_pinyin = :py WHERE id = :id"), updates)
+    return len(updates)
+
+
+PLANTS_VERSION_KEY = "plants_version"
+
+
+def create_version_triggers(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS catalog_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+    ))
+    conn.execute(text(
+        "INSERT OR IGNORE INTO catalog_meta (key, value) VALUES (:key, 0)"
+    ), {"key": PLANTS_VERSION_KEY})
+    for op in ("INSERT", "UPDATE", "DELETE"):
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS plants_version_{op.lower()} AFTER {op} ON plants"
+            f" BEGIN UPDATE catalog_meta SET value = value + 1"
+            f" WHERE key = '{PLANTS_VERSION_KEY}'; END"
+        ))
+
+
+def read_plants_version(conn):
+    """植物表当前版本号，每次写入都会变化"""
+    return conn.execute(
+        text("SELECT value FROM catalog_meta WHERE key = :key"), {"key": PLANTS_VERSION_KEY}
+    ).scalar() or 0
+
+
+def create_missing_indexes(conn, metadata):
+    """模型上声明的索引，已有表里没有的补建"""
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def upgrade(engine, metadata=None):
+    with engine.begin() as conn:
+        add_missing_columns(conn, "plants", PLANT_COLUMNS)
+        backfill_derived_columns(conn)
+        backfill_name_pinyin(conn)
+        create_version_triggers(conn)
+        create_search_index(conn)
+        if metadata is not None:
+            create_missing_indexes(conn, metadata)
@@ -0,0 +1,218 @@
+"""植物三维模型配置
+
+Plants.model_config 存 JSON：按季节列出要摆放的模型
+[{"season": 0-3, "keyPrefix": str, "models": [{resource, name, upAxis, target, offset}]}]
+模型也可以写 {"asset": "crocus/12974_crocus_flower_v1_l3"} 引用 flask build-models 生成的
+manifest，解析时换成 manifest 里的 resource、最精细一级的 name，并附上 lods 列表。
+每种写法只解析、校验一次；为空或不合法时用默认配置。
+配置对象在多个请求间共享，调用方不要修改。
+"""
+import json
+import os
+import threading
+from functools import lru_cache
+
+
+SEASONS = (0, 1, 2, 3)
+UP_AXES = ("x", "y", "z")
+
+
+def _tree(*offsets):
+    return [
+        {"resource": "/models/tree/", "name": "tree", "upAxis": "y", "target": 1, "offset": [x, 0, 0]}
+        for x in offsets
+    ]
+
+
+# 没有配置的植物：每个季节若干棵树
+DEFAULT_MODEL_CONFIG = [
+    {"season": 0, "keyPrefix": "mint1", "models": _tree(-0.1)},
+    {"season": 1, "keyPrefix": "mint1", "models": _tree(-0.1, -0.2)},
+    {"season": 2, "keyPrefix": "mint3", "models": _tree(-0.1, -0.2, -0.3)},
+    {"season": 3, "keyPrefix": "mint4", "models": _tree(-0.1, -0.2, -0.3, -0.4)},
+]
+
+# /get_model_config 返回的示例配置
+SAMPLE_MODEL_CONFIG = [
+    {
+        "season": 0,
+        "keyPrefix": "mint1",
+        "models": [
+            {"resource": "/models/mint/", "name": "mint_1", "upAxis": "y", "target": 1, "offset": [-0.1, 0, 0]},
+            {"resource": "/models/tree/", "name": "tree", "upAxis": "y", "target": 1, "offset": [-0.1, 0, 0]},
+            {"resource": "/models/mint/", "name": "mint_2", "upAxis": "y", "target": 1, "offset": [0.2, 0, 0]},
+        ],
+    },
+    {
+        "season": 1,
+        "keyPrefix": "mint1",
+        "models": [
+            {"resource": "/models/mint/", "name": "mint_2", "upAxis": "y", "target": 1, "offset": [-0.2, 0, 0]},
+        ],
+    },
+    {
+        "season": 2,
+        "keyPrefix": "mint3",
+        "models": [
+            {"resource": "/models/mint/", "name": "mint_3", "upAxis": "y", "target": 1, "offset": [-0.3, 0, 0]},
+            {"resource": "/models/mint/", "name": "mint_1", "upAxis": "y", "target": 1, "offset": [0.4, 0, 0]},
+        ],
+    },
+    {
+        "season": 3,
+        "keyPrefix": "mint4",
+        "models": [
+            {"resource": "/models/mint/", "name": "mint_4", "upAxis": "y", "target": 1, "offset": [-0.5, 0, 0]},
+        ],
+    },
+]
+
+
+class ModelConfigError(ValueError):
+    pass
+
+
+def _number(value, what):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ModelConfigError(f"{what} 必须是数字")
+    return value
+
+
+def validate_model(model):
+    if not isinstance(model, dict):
+        raise ModelConfigError("模型必须是对象")
+    asset = model.get("asset")
+    if asset is not None and (not isinstance(asset, str) or not asset):
+        raise ModelConfigError("asset 必须是字符串")
+    resource, name = model.get("resource"), model.get("name")
+    # 引用 asset 时 resource/name 可省略，由 manifest 补上
+    if asset is None or resource is not None:
+        if not isinstance(resource, str) or not resource:
+            raise ModelConfigError("模型缺少 resource")
+    if asset is None or name is not None:
+        if not isinstance(name, str) or not name:
+            raise ModelConfigError("模型缺少 name")
+    up_axis = model.get("upAxis", "y")
+    if up_axis not in UP_AXES:
+        raise ModelConfigError(f"upAxis 无效: {up_axis}")
+    offset = model.get("offset", [0, 0, 0])
+    if not isinstance(offset, list) or len(offset) != 3:
+        raise ModelConfigError("offset 必须是三个数")
+    result = {
+        "resource": resource,
+        "name": name,
+        "upAxis": up_axis,
+        "target": _number(model.get("target", 1), "target"),
+        "offset": [_number(v, "offset") for v in offset],
+    }
+    if asset is not None:
+        result["asset"] = asset
+    return result
+
+
+def validate(config):
+    """校验并补全默认值，返回新的配置列表"""
+    if not isinstance(config, list):
+        raise ModelConfigError("配置必须是列表")
+    result = []
+    for entry in config:
+        if not isinstance(entry, dict):
+            raise ModelConfigError("季节配置必须是对象")
+        season = entry.get("season")
+        if season not in SEASONS:
+            raise ModelConfigError(f"season 无效: {season}")
+        models = entry.get("models")
+        if not isinstance(models, list):
+            raise ModelConfigError("models 必须是列表")
+        result.append({
+            "season": season,
+            "keyPrefix": str(entry.get("keyPrefix") or f"season{season}"),
+            "models": [validate_model(m) for m in models],
+        })
+    return result
+
+
+class Manifest:
+    """某一时刻的 manifest 内容；按对象身份参与缓存"""
+    __slots__ = ("assets",)
+
+    def __init__(self, assets):
+        self.assets = assets
+
+    def resolve_model(self, model):
+        entry = self.assets.get(model["asset"])
+        if not entry or not entry.get("lods"):
+            return None
+        lods = entry["lods"]
+        return dict(
+            model,
+            resource=entry["resource"],
+            name=lods[0]["name"],
+            lods=[{"name": lod["name"], "distance": lod["distance"]} for lod in lods],
+        )
+
+
+class ModelManifest:
+    """frontend/public/models/manifest.json，文件 mtime 变化时重新读取"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._manifest = None
+
+    def current(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+        if mtime == self._mtime:
+            return self._manifest
+        with self._lock:
+            if mtime != self._mtime:
+                try:
+                    with open(self.path, encoding="utf-8") as f:
+                        self._manifest = Manifest(json.load(f).get("assets", {}))
+                except ValueError:
+                    self._manifest = None
+                self._mtime = mtime
+        return self._manifest
+
+    def version(self):
+        """manifest 文件的 mtime（纳秒），没有时为 None；跨进程、重启后都可比较，用于缓存键"""
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+
+# manifest 里找不到、自己也没写 resource/name 的模型换成默认的树
+_FALLBACK_MODEL = {"resource": "/models/tree/", "name": "tree"}
+
+
+def resolve_assets(config, manifest):
+    """把 asset 引用换成 manifest 里的文件"""
+    result = []
+    for entry in config:
+        models = []
+        for model in entry["models"]:
+            if "asset" in model:
+                resolved = manifest.resolve_model(model) if manifest is not None else None
+                if resolved is None and model["resource"] is None:
+                    resolved = dict(model, **_FALLBACK_MODEL)
+                model = resolved or model
+            models.append(model)
+        result.append(dict(entry, models=models))
+    return result
+
+
+@lru_cache(maxsize=1024)
+def parse_model_config(raw, manifest=None):
+    """JSON 文本 -> 校验过的配置；为空或不合法时返回默认配置"""
+    if not raw or not raw.strip():
+        return DEFAULT_MODEL_CONFIG
+    try:
+        config = validate(json.loads(raw))
+    except ValueError:
+        return DEFAULT_MODEL_CONFIG
+    return resolve_assets(config, manifest)
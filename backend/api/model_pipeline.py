@@ -0,0 +1,521 @@
+"""植物模型离线处理：OBJ/MTL -> 多级 LOD 的 GLB + manifest
+
+flask build-models 调用，处理 frontend/public/models 下的模型：
+- 解析 OBJ/MTL，按材质拆成图元，(v, vt, vn) 组合去重成索引网格
+- 顶点聚类减面：按包围盒网格合并顶点，二分网格精度逼近目标三角形数，UV 接缝处不合并
+- 顶点属性量化（KHR_mesh_quantization）：位置 uint16 + 节点缩放平移，法线 int8，UV uint16
+- 漫反射贴图按 LOD 缩小后嵌进 GLB（需要 Pillow，没装时原样嵌入）
+- 已经是 GLB 的模型不处理，只登记到 manifest
+manifest.json 记录每个模型的各级文件、三角形数和切换距离，model_config 用 asset 引用。
+"""
+import io
+import json
+import logging
+import os
+import re
+import struct
+import tempfile
+
+import numpy as np
+
+
+log = logging.getLogger("garden")
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# 各级 LOD 相对原模型的三角形比例、贴图最大边长、切换距离（包围球半径的倍数）
+LOD_RATIOS = (1.0, 0.4, 0.15, 0.05)
+TEXTURE_SIZES = (1024, 512, 256, 128)
+LOD_DISTANCES = (0, 8, 20, 50)
+
+LOD_NAME_RE = re.compile(r"_lod\d+$")
+
+GLB_MAGIC = 0x46546C67
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+# glTF 常量
+BYTE, UNSIGNED_SHORT, UNSIGNED_INT, FLOAT = 5120, 5123, 5125, 5126
+UNSIGNED_SHORT_MAX = 65535
+ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER = 34962, 34963
+LINEAR, LINEAR_MIPMAP_LINEAR, REPEAT = 9729, 9987, 10497
+
+
+class Primitive:
+    """一个材质对应的索引网格"""
+    __slots__ = ("material", "positions", "normals", "uvs", "indices")
+
+    def __init__(self, material, positions, normals, uvs, indices):
+        self.material = material
+        self.positions = positions  # (n, 3) float64
+        self.normals = normals      # (n, 3) float64
+        self.uvs = uvs              # (n, 2) float64 或 None
+        self.indices = indices      # (m, 3) int64
+
+    @property
+    def triangles(self):
+        return len(self.indices)
+
+
+# —— 读取 ——
+def _index(token, count):
+    """OBJ 下标从 1 开始，负数表示倒数；缺省返回 0"""
+    if not token:
+        return 0
+    i = int(token)
+    return i if i > 0 else count + i + 1
+
+
+def parse_mtl(path):
+    """{材质名: {"color": [r, g, b, a], "shininess": Ns, "texture": 路径或 None}}"""
+    materials, current = {}, None
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            key = parts[0]
+            if key == "newmtl":
+                current = materials[" ".join(parts[1:])] = {
+                    "color": [1.0, 1.0, 1.0, 1.0], "shininess": 0.0, "texture": None,
+                }
+            elif current is None:
+                continue
+            elif key == "Kd":
+                current["color"][:3] = [float(v) for v in parts[1:4]]
+            elif key == "d":
+                current["color"][3] = float(parts[1])
+            elif key == "Ns":
+                current["shininess"] = float(parts[1])
+            elif key == "map_Kd":
+                # 选项（-s 1 1 1 之类）在前，文件名在最后
+                texture = os.path.join(os.path.dirname(path), parts[-1])
+                current["texture"] = texture if os.path.exists(texture) else None
+    return materials
+
+
+def _vertex_normals(positions, indices):
+    a, b, c = (positions[indices[:, i]] for i in range(3))
+    face = np.cross(b - a, c - a)
+    normals = np.zeros_like(positions)
+    weight = np.zeros(len(positions))
+    fallback = np.zeros_like(positions)
+    area = np.linalg.norm(face, axis=1)
+    for i in range(3):
+        np.add.at(normals, indices[:, i], face)
+        np.add.at(weight, indices[:, i], area)
+        fallback[indices[:, i]] = face
+    # 双面叶片正反两面共用顶点，法线相互抵消，改用其中一个面的法线
+    cancelled = np.linalg.norm(normals, axis=1) < weight * 1e-3
+    normals[cancelled] = fallback[cancelled]
+    normals = _normalize(normals)
+    # 只挂在退化三角形上的顶点没有方向，给个朝上的法线
+    normals[~normals.any(axis=1)] = (0.0, 1.0, 0.0)
+    return normals
+
+
+def _normalize(v):
+    length = np.linalg.norm(v, axis=1, keepdims=True)
+    return np.divide(v, length, out=np.zeros_like(v), where=length > 0)
+
+
+def parse_obj(path):
+    """返回 (图元列表, 材质表)；多边形按扇形拆成三角形"""
+    positions, uvs, normals = [], [], []
+    groups = {}
+    corners = groups.setdefault(None, [])
+    materials = {}
+
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            key = parts[0]
+            if key == "v":
+                positions.append(parts[1:4])
+            elif key == "vt":
+                uvs.append(parts[1:3])
+            elif key == "vn":
+                normals.append(parts[1:4])
+            elif key == "f":
+                face = []
+                for token in parts[1:]:
+                    v, _, rest = token.partition("/")
+                    vt, _, vn = rest.partition("/")
+                    face.append((
+                        _index(v, len(positions)), _index(vt, len(uvs)), _index(vn, len(normals)),
+                    ))
+                for i in range(1, len(face) - 1):
+                    corners.extend((face[0], face[i], face[i + 1]))
+            elif key == "usemtl":
+                corners = groups.setdefault(" ".join(parts[1:]), [])
+            elif key == "mtllib":
+                mtl = os.path.join(os.path.dirname(path), " ".join(parts[1:]))
+                if os.path.exists(mtl):
+                    materials.update(parse_mtl(mtl))
+
+    P = np.asarray(positions, dtype=np.float64)
+    T = np.asarray(uvs, dtype=np.float64).reshape(-1, 2)
+    N = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+
+    primitives = []
+    for material, corner_list in groups.items():
+        if not corner_list:
+            continue
+        keys, inverse = np.unique(np.asarray(corner_list, dtype=np.int64), axis=0, return_inverse=True)
+        indices = inverse.reshape(-1, 3)
+        pos = P[keys[:, 0] - 1]
+        uv = None
+        if len(T) and keys[:, 1].all():
+            uv = T[keys[:, 1] - 1].copy()
+            uv[:, 1] = 1.0 - uv[:, 1]  # OBJ 的 v 向上，glTF 向下
+        if len(N) and keys[:, 2].all():
+            nrm = _normalize(N[keys[:, 2] - 1])
+        else:
+            nrm = _vertex_normals(pos, indices)
+        primitives.append(Primitive(material, pos, nrm, uv, indices))
+    return primitives, materials
+
+
+# —— 减面 ——
+def _cluster(prim, origin, cell, uv_cell):
+    """按边长 cell 的网格合并顶点；带 UV 时 UV 也要落在同一格，避免跨接缝合并"""
+    keys = np.floor((prim.positions - origin) / cell).astype(np.int64)
+    if prim.uvs is not None:
+        keys = np.hstack([keys, np.floor(prim.uvs / uv_cell).astype(np.int64)])
+    _, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    count = np.bincount(inverse).astype(np.float64)[:, None]
+
+    def mean(values):
+        out = np.zeros((len(count), values.shape[1]))
+        np.add.at(out, inverse, values)
+        return out / count
+
+    tris = inverse[prim.indices]
+    keep = (tris[:, 0] != tris[:, 1]) & (tris[:, 1] != tris[:, 2]) & (tris[:, 0] != tris[:, 2])
+    tris = tris[keep]
+    # 合并后重复的三角形只留一个（保留第一个的朝向）
+    _, first = np.unique(np.sort(tris, axis=1), axis=0, return_index=True)
+    tris = tris[np.sort(first)]
+
+    # 去掉不再被引用的顶点
+    used, remap = np.unique(tris, return_inverse=True)
+    positions = mean(prim.positions)[used]
+    normals = _normalize(mean(prim.normals))[used]
+    uvs = mean(prim.uvs)[used] if prim.uvs is not None else None
+    return Primitive(prim.material, positions, normals, uvs, remap.reshape(-1, 3))
+
+
+def decimate(primitives, target, bounds):
+    """二分网格精度，让总三角形数尽量接近且不超过 target"""
+    lo_b, hi_b = bounds
+    extent = float((hi_b - lo_b).max()) or 1.0
+    lo, hi = 2, 4096
+    best = None
+    while lo <= hi:
+        resolution = (lo + hi) // 2
+        cell = extent / resolution
+        result = [_cluster(p, lo_b, cell, 1.0 / resolution) for p in primitives]
+        result = [p for p in result if p.triangles]
+        total = sum(p.triangles for p in result)
+        if total <= target:
+            best = result
+            lo = resolution + 1
+        else:
+            hi = resolution - 1
+    return best or []
+
+
+# —— 写 GLB ——
+class _Buffer:
+
+    def __init__(self):
+        self.data = bytearray()
+        self.views = []
+
+    def add(self, raw, target=None, stride=None):
+        while len(self.data) % 4:
+            self.data.append(0)
+        view = {"buffer": 0, "byteOffset": len(self.data), "byteLength": len(raw)}
+        if target:
+            view["target"] = target
+        if stride:
+            view["byteStride"] = stride
+        self.data.extend(raw)
+        self.views.append(view)
+        return len(self.views) - 1
+
+
+def _texture_bytes(path, max_size):
+    """缩小到最长边不超过 max_size，返回 (bytes, mimetype)"""
+    try:
+        from PIL import Image
+    except ImportError:
+        log.warning("未安装 Pillow，贴图原样嵌入: %s", path)
+        with open(path, "rb") as f:
+            data = f.read()
+        return data, "image/png" if data.startswith(b"\x89PNG") else "image/jpeg"
+
+    with Image.open(path) as img:
+        img.load()
+        if max(img.size) > max_size:
+            scale = max_size / max(img.size)
+            img = img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))),
+                             Image.LANCZOS)
+        out = io.BytesIO()
+        if img.mode in ("RGBA", "LA", "P"):
+            img.save(out, "PNG", optimize=True)
+            return out.getvalue(), "image/png"
+        img.convert("RGB").save(out, "JPEG", quality=85, optimize=True, progressive=True)
+        return out.getvalue(), "image/jpeg"
+
+
+def _quantize_positions(positions, origin, scale):
+    q = np.rint((positions - origin) / scale).clip(0, UNSIGNED_SHORT_MAX).astype(np.uint16)
+    # 每个顶点补一个分量凑够 4 字节对齐
+    padded = np.zeros((len(q), 4), dtype=np.uint16)
+    padded[:, :3] = q
+    return padded, q.min(axis=0), q.max(axis=0)
+
+
+def _quantize_normals(normals):
+    padded = np.zeros((len(normals), 4), dtype=np.int8)
+    padded[:, :3] = np.rint(normals * 127).clip(-127, 127)
+    return padded
+
+
+def build_glb(primitives, materials, bounds, texture_size):
+    """图元 -> GLB 字节；位置按整个模型的包围盒量化，节点上的缩放平移还原"""
+    origin, top = bounds
+    scale = (top - origin) / UNSIGNED_SHORT_MAX
+    scale[scale == 0] = 1.0
+
+    buf = _Buffer()
+    accessors, gltf_prims = [], []
+    gltf_materials, material_index = [], {}
+    images, textures = [], []
+    texture_index = {}
+
+    def accessor(view, component, count, kind, normalized=False, **extra):
+        acc = {"bufferView": view, "componentType": component, "count": count, "type": kind}
+        if normalized:
+            acc["normalized"] = True
+        acc.update(extra)
+        accessors.append(acc)
+        return len(accessors) - 1
+
+    def material(name):
+        if name in material_index:
+            return material_index[name]
+        mtl = materials.get(name) or {"color": [1.0, 1.0, 1.0, 1.0], "shininess": 0.0, "texture": None}
+        pbr = {
+            "baseColorFactor": mtl["color"],
+            "metallicFactor": 0.0,
+            # Phong 高光指数换算粗糙度
+            "roughnessFactor": round(float(np.sqrt(2.0 / (mtl["shininess"] + 2.0))), 4),
+        }
+        texture = mtl["texture"]
+        if texture:
+            if texture not in texture_index:
+                data, mimetype = _texture_bytes(texture, texture_size)
+                images.append({"bufferView": buf.add(data), "mimeType": mimetype})
+                textures.append({"source": len(images) - 1, "sampler": 0})
+                texture_index[texture] = len(textures) - 1
+            pbr["baseColorTexture"] = {"index": texture_index[texture]}
+        entry = {"name": name or "default", "pbrMetallicRoughness": pbr, "doubleSided": True}
+        if mtl["color"][3] < 1.0:
+            entry["alphaMode"] = "BLEND"
+        gltf_materials.append(entry)
+        material_index[name] = len(gltf_materials) - 1
+        return material_index[name]
+
+    for prim in primitives:
+        count = len(prim.positions)
+        q, qmin, qmax = _quantize_positions(prim.positions, origin, scale)
+        attributes = {
+            "POSITION": accessor(buf.add(q.tobytes(), ARRAY_BUFFER, 8), UNSIGNED_SHORT, count, "VEC3",
+                                 min=qmin.tolist(), max=qmax.tolist()),
+            "NORMAL": accessor(buf.add(_quantize_normals(prim.normals).tobytes(), ARRAY_BUFFER, 4),
+                               BYTE, count, "VEC3", normalized=True),
+        }
+        if prim.uvs is not None:
+            if prim.uvs.min() >= 0.0 and prim.uvs.max() <= 1.0:
+                uv = np.rint(prim.uvs * UNSIGNED_SHORT_MAX).astype(np.uint16)
+                attributes["TEXCOORD_0"] = accessor(buf.add(uv.tobytes(), ARRAY_BUFFER, 4),
+                                                    UNSIGNED_SHORT, count, "VEC2", normalized=True)
+            else:
+                # 平铺贴图的 UV 超出 [0, 1]，不能归一化量化
+                uv = prim.uvs.astype(np.float32)
+                attributes["TEXCOORD_0"] = accessor(buf.add(uv.tobytes(), ARRAY_BUFFER, 8),
+                                                    FLOAT, count, "VEC2")
+
+        if count <= UNSIGNED_SHORT_MAX:
+            indices, component = prim.indices.astype(np.uint16), UNSIGNED_SHORT
+        else:
+            indices, component = prim.indices.astype(np.uint32), UNSIGNED_INT
+        index_acc = accessor(buf.add(indices.tobytes(), ELEMENT_ARRAY_BUFFER), component,
+                             indices.size, "SCALAR")
+        gltf_prims.append({"attributes": attributes, "indices": index_acc,
+                           "material": material(prim.material)})
+
+    gltf = {
+        "asset": {"version": "2.0", "generator": "garden model_pipeline"},
+        "extensionsUsed": ["KHR_mesh_quantization"],
+        "extensionsRequired": ["KHR_mesh_quantization"],
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0, "translation": origin.tolist(), "scale": scale.tolist()}],
+        "meshes": [{"primitives": gltf_prims}],
+        "materials": gltf_materials,
+        "accessors": accessors,
+        "bufferViews": buf.views,
+        "buffers": [{"byteLength": len(buf.data)}],
+    }
+    if images:
+        gltf.update(images=images, textures=textures, samplers=[{
+            "magFilter": LINEAR, "minFilter": LINEAR_MIPMAP_LINEAR, "wrapS": REPEAT, "wrapT": REPEAT,
+        }])
+    return pack_glb(gltf, bytes(buf.data))
+
+
+def pack_glb(gltf, binary):
+    body = json.dumps(gltf, separators=(",", ":")).encode()
+    body += b" " * (-len(body) % 4)
+    binary += b"\x00" * (-len(binary) % 4)
+    length = 12 + 8 + len(body) + 8 + len(binary)
+    return b"".join((
+        struct.pack("<III", GLB_MAGIC, 2, length),
+        struct.pack("<II", len(body), CHUNK_JSON), body,
+        struct.pack("<II", len(binary), CHUNK_BIN), binary,
+    ))
+
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".model-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        # mkstemp 建的文件只有属主可读，静态文件要让 Web 服务器读到
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+# —— 整体流程 ——
+def _sources(path):
+    """OBJ 及其 MTL、贴图：任何一个比输出新都要重建"""
+    paths, materials = [path], {}
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if line.startswith("mtllib"):
+                mtl = os.path.join(os.path.dirname(path), line[6:].strip())
+                if os.path.exists(mtl):
+                    paths.append(mtl)
+                    materials.update(parse_mtl(mtl))
+    paths.extend(m["texture"] for m in materials.values() if m["texture"])
+    return paths
+
+
+def convert_obj(path, resource, ratios=LOD_RATIOS, texture_sizes=TEXTURE_SIZES, distances=LOD_DISTANCES):
+    """一个 OBJ -> 同目录下的 <名字>_lod<i>.glb，返回 manifest 条目"""
+    primitives, materials = parse_obj(path)
+    if not primitives:
+        raise ValueError(f"模型没有面: {path}")
+    points = np.vstack([p.positions for p in primitives])
+    bounds = (points.min(axis=0), points.max(axis=0))
+    radius = float(np.linalg.norm(bounds[1] - bounds[0]) / 2)
+    total = sum(p.triangles for p in primitives)
+
+    directory, stem = os.path.split(os.path.splitext(path)[0])
+    lods, previous = [], None
+    for level, ratio in enumerate(ratios):
+        if level == 0:
+            mesh = primitives
+        else:
+            mesh = decimate(primitives, int(total * ratio), bounds)
+            triangles = sum(p.triangles for p in mesh)
+            # 减不动了（或减过头成空）就不再往下出级别
+            if not triangles or triangles >= previous * 0.8:
+                break
+        triangles = sum(p.triangles for p in mesh)
+        name = f"{stem}_lod{level}"
+        data = build_glb(mesh, materials, bounds, texture_sizes[min(level, len(texture_sizes) - 1)])
+        _write_atomic(os.path.join(directory, name + ".glb"), data)
+        lods.append({
+            "name": name,
+            "triangles": triangles,
+            "vertices": sum(len(p.positions) for p in mesh),
+            "bytes": len(data),
+            "distance": round(distances[min(level, len(distances) - 1)] * radius, 4),
+        })
+        previous = triangles
+
+    return {
+        "resource": resource,
+        "source": os.path.basename(path),
+        "bounds": {"min": bounds[0].tolist(), "max": bounds[1].tolist()},
+        "lods": lods,
+    }
+
+
+def _glb_entry(path, resource):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return {
+        "resource": resource,
+        "source": os.path.basename(path),
+        "lods": [{"name": name, "bytes": os.path.getsize(path), "distance": 0}],
+    }
+
+
+def _up_to_date(entry, directory, sources):
+    if not entry or not entry.get("lods"):
+        return False
+    newest = max(os.path.getmtime(p) for p in sources)
+    for lod in entry["lods"]:
+        out = os.path.join(directory, lod["name"] + ".glb")
+        if not os.path.exists(out) or os.path.getmtime(out) < newest:
+            return False
+    return True
+
+
+def build_models(models_dir, url_prefix="/models/", force=False, **options):
+    """
+    处理 models_dir 下一级子目录里的模型，写 models_dir/manifest.json
+    asset 键为 "子目录/文件名"，比如 crocus/12974_crocus_flower_v1_l3
+    返回 (manifest, 本次重建的 asset 列表)
+    """
+    manifest_path = os.path.join(models_dir, MANIFEST_NAME)
+    previous = {}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path, encoding="utf-8") as f:
+            previous = json.load(f).get("assets", {})
+
+    assets, rebuilt = {}, []
+    for sub in sorted(os.listdir(models_dir)):
+        directory = os.path.join(models_dir, sub)
+        if not os.path.isdir(directory):
+            continue
+        resource = f"{url_prefix}{sub}/"
+        for filename in sorted(os.listdir(directory)):
+            stem, ext = os.path.splitext(filename)
+            path = os.path.join(directory, filename)
+            key = f"{sub}/{stem}"
+            ext = ext.lower()
+            if ext == ".obj":
+                sources = _sources(path)
+                if _up_to_date(previous.get(key), directory, sources):
+                    assets[key] = previous[key]
+                    continue
+                assets[key] = convert_obj(path, resource, **options)
+                rebuilt.append(key)
+            elif ext == ".glb" and not LOD_NAME_RE.search(stem):
+                assets[key] = _glb_entry(path, resource)
+
+    manifest = {"version": MANIFEST_VERSION, "assets": assets}
+    _write_atomic(manifest_path, json.dumps(manifest, ensure_ascii=False, indent=2).encode())
+    return manifest, rebuilt
@@ -0,0 +1,86 @@
+"""ORM 模型
+
+派生列（观赏月份、最低温度、拼音、位标志）在写入前由 fill_derived_columns 按 parsing.DERIVED_COLUMNS 回填。
+"""
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from extensions import db
+from parsing import derive_columns
+
+
+class Users(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), unique=True, nullable=False)
+    password_hash = db.Column(db.String(128), nullable=False)
+    telephone  = db.Column(db.String(128), nullable=False)
+
+    def set_password(self, password):
+        self.password_hash = generate_password_hash(password)
+
+    def check_password(self, password):
+        return check_password_hash(self.password_hash, password)
+
+
+class Reserve(db.Model):
+    # 按用户名过滤、按 id 翻页
+    __table_args__ = (db.Index("ix_reserve_username_id", "username", "id"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), nullable=False)
+    reserve_type = db.Column(db.String(128), nullable=False)
+    detail = db.Column(db.Text, nullable=False)
+    reserve_time = db.Column(db.String(128), nullable=False)
+    status = db.Column(db.String(128), nullable=False)
+
+
+
+class Plants(db.Model):
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    name = db.Column(db.String, nullable=True, index=True)     # 植物名称
+    family = db.Column(db.String, nullable=True)               # 科
+    genus = db.Column(db.String, nullable=True)                # 属
+    latin_name = db.Column(db.String, nullable=True)           # 拉丁名
+    lifecycle = db.Column(db.String, nullable=True)            # 生命周期
+    classification = db.Column(db.String, nullable=True)       # 植物分类
+    garden_type = db.Column(db.String, nullable=True)          # 花园类型
+    sunlight = db.Column(db.String, nullable=True)             # 日照
+    water_need = db.Column(db.String, nullable=True)           # 需水量
+    cold_resistance = db.Column(db.String, nullable=True)      # 耐寒能力
+    self_sowing = db.Column(db.String, nullable=True)          # 自播能力
+    lodging_resistance = db.Column(db.String, nullable=True)   # 抗倒伏情况
+    crown_width_cm = db.Column(db.String, nullable=True)       # 冠幅（cm）
+    height_spring = db.Column(db.String, nullable=True)        # 植株高度-春
+    height_summer = db.Column(db.String, nullable=True)        # 植株高度-夏
+    height_autumn = db.Column(db.String, nullable=True)        # 植株高度-秋
+    height_winter = db.Column(db.String, nullable=True)        # 植株高度-冬
+    ornamental_period = db.Column(db.String, nullable=True)    # 观赏期
+    flower_color = db.Column(db.String, nullable=True)         # 花朵颜色
+    flower_height_cm = db.Column(db.String, nullable=True)     # 花朵高度（cm）
+    usage = db.Column(db.Text, nullable=True)                  # 用途/特点
+    control_methods = db.Column(db.Text, nullable=True)        # 防治方法
+    common_diseases = db.Column(db.Text, nullable=True)        # 常见病害
+    pruning = db.Column(db.String, nullable=True)              # 修剪节点
+    watering_frequency = db.Column(db.String, nullable=True)   # 浇水频率
+    needs_support = db.Column(db.String, nullable=True)        # 是否需要支架
+    color = db.Column(db.String, nullable=True)                # 颜色
+    model_config = db.Column(db.Text, nullable=True)
+
+    # 派生列：写入时由 ornamental_period / cold_resistance 解析
+    ornamental_months = db.Column(db.Integer, nullable=True)   # 观赏月份位掩码
+    cold_limit = db.Column(db.Integer, nullable=True)          # 最低耐受温度（℃）
+    name_pinyin = db.Column(db.String, nullable=True)          # 名称拼音（全拼 + 首字母），供搜索
+    sunlight_flags = db.Column(db.Integer, nullable=True)      # 日照位标志（低/中/高）
+    water_flags = db.Column(db.Integer, nullable=True)         # 需水位标志（低/中/高）
+    garden_type_flags = db.Column(db.Integer, nullable=True, index=True)  # 花园类型位标志
+
+    # 区域条件按日照、需水的 IN 列表查
+    __table_args__ = (db.Index("ix_plants_zone_flags", "sunlight_flags", "water_flags"),)
+
+
+@event.listens_for(Plants, "before_insert")
+@event.listens_for(Plants, "before_update")
+def fill_derived_columns(mapper, connection, plant):
+    for col, value in derive_columns(lambda c: getattr(plant, c)).items():
+        setattr(plant, col, value)
@@ -0,0 +1,100 @@
+"""列表接口的键集分页、字段投影与过滤
+
+分页按 id 递增：cursor 为上一页最后一条的 id，查询只走主键范围扫描，
+不用 OFFSET，翻到多深代价都一样。fields= 只 SELECT 需要的列。
+"""
+from sqlalchemy import literal, or_, select
+
+
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+
+# 多值字段的分隔符，比如 '高、中'
+VALUE_SEP = "、"
+
+
+class PageArgsError(ValueError):
+    pass
+
+
+def parse_fields(model, raw):
+    """'name,latin_name' -> [Column]，始终带上 id 以便翻页"""
+    table = model.__table__
+    if not raw:
+        return list(table.columns)
+
+    names = [n.strip() for n in raw.split(",") if n.strip()]
+    unknown = [n for n in names if n not in table.columns]
+    if unknown:
+        raise PageArgsError(f"未知字段: {', '.join(unknown)}")
+    if "id" not in names:
+        names.insert(0, "id")
+    return [table.columns[n] for n in dict.fromkeys(names)]
+
+
+def parse_limit(raw):
+    if raw in (None, ""):
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise PageArgsError("limit 必须是整数")
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def parse_cursor(raw):
+    if raw in (None, ""):
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        raise PageArgsError("cursor 无效")
+
+
+def has_value(column, value):
+    """多值字段包含某个值：'、高、中、' LIKE '%、高、%'"""
+    value = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    wrapped = literal(VALUE_SEP) + column + literal(VALUE_SEP)
+    return wrapped.like(f"%{VALUE_SEP}{value}{VALUE_SEP}%", escape="\\")
+
+
+def build_filters(model, args, exact=(), multi=()):
+    """
+    exact: 精确匹配的列；multi: '、' 分隔的多值列
+    同一参数用逗号传多个值时取并集
+    """
+    conditions = []
+    for name in (*exact, *multi):
+        raw = args.get(name)
+        if not raw:
+            continue
+        column = model.__table__.columns[name]
+        values = [v.strip() for v in raw.split(",") if v.strip()]
+        if not values:
+            continue
+        if name in multi:
+            conditions.append(or_(*(has_value(column, v) for v in values)))
+        else:
+            conditions.append(column.in_(values))
+    return conditions
+
+
+def keyset_page(session, model, args, exact=(), multi=()):
+    """返回 (rows, next_cursor)，next_cursor 为 None 表示没有下一页"""
+    columns = parse_fields(model, args.get("fields"))
+    limit = parse_limit(args.get("limit"))
+    cursor = parse_cursor(args.get("cursor"))
+
+    pk = model.__table__.columns["id"]
+    stmt = select(*columns).where(*build_filters(model, args, exact, multi))
+    if cursor is not None:
+        stmt = stmt.where(pk > cursor)
+    # 多取一条判断是否还有下一页
+    stmt = stmt.order_by(pk).limit(limit + 1)
+
+    rows = [dict(r._mapping) for r in session.execute(stmt)]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1]["id"]
+    return rows, next_cursor
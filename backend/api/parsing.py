@@ -0,0 +1,199 @@
+"""植物属性文本解析：观赏期、耐寒能力、纬度最低温、日照/需水/花园类型
+
+日照、需水、花园类型是“、”分隔的多值文本（'高、中'、'混合草甸、雨水花园'），
+解析成位标志存进整数列，筛选可以直接写成 SQL 条件。
+
+正则在模块加载时编译一次；解析结果按原始字段文本做有界 LRU 缓存，
+同样的文本（比如 '6-9月'、'耐寒（可耐 -20℃低温）'）只解析一次。
+"""
+import re
+from functools import lru_cache
+
+try:
+    from pypinyin import lazy_pinyin
+except ImportError:
+    lazy_pinyin = None
+
+
+def pinyin_available():
+    """装了 pypinyin 才能生成名称拼音（见 req.txt），否则拼音搜索不可用"""
+    return lazy_pinyin is not None
+
+
+# 观赏季节 -> 月份
+SEASON_MONTHS = {
+    "spring": range(3, 6 + 1),   # 3-6月
+    "summer": range(6, 9 + 1),   # 6-9月
+    "autumn": range(9, 11 + 1),  # 9-11月
+    "winter": [12, 1, 2],        # 12月,1月,2月
+}
+
+_MONTH_RANGE_RE = re.compile(r"(\d+)-(\d+)月")
+_MONTH_RE = re.compile(r"(\d+)月")
+_TEMP_RE = re.compile(r"(-?\d+)℃")
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+
+PARSE_CACHE_SIZE = 4096
+
+# 日照、需水的取值，第 i 个对应第 i 位
+LEVELS = ("低", "中", "高")
+
+# 花园类型，第 i 个对应第 i 位；不在表里的类型不占位
+GARDEN_TYPES = (
+    "混合草甸", "昆虫友好花园", "雨水花园", "儿童花园", "疗愈花园", "岩石花园", "可食花园",
+)
+
+
+def months_to_mask(months):
+    """[1, 2] -> 0b11，第 m 月对应第 m-1 位"""
+    mask = 0
+    for m in months:
+        mask |= 1 << (m - 1)
+    return mask
+
+
+# 观赏季节 -> 月份位掩码
+SEASON_MASKS = {season: months_to_mask(months) for season, months in SEASON_MONTHS.items()}
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_view_season(text: str):
+    """把观赏期文本解析成月份元组，比如 '5-9月' -> (5, 6, 7, 8, 9)"""
+    text = (text or "").strip()
+
+    # 全年
+    if "全年" in text:
+        return tuple(range(1, 13))
+    # 秋冬
+    if "秋冬" in text:
+        return (9, 10, 11, 12)
+    # 食用/药用类不算观赏期
+    if "食用" in text:
+        return ()
+
+    # 匹配 "5-9月" 这种
+    m = _MONTH_RANGE_RE.match(text)
+    if m:
+        start, end = int(m.group(1)), int(m.group(2))
+        if start <= end:
+            return tuple(range(start, end + 1))
+        else:  # 跨年，比如 11-2月
+            return tuple(range(start, 13)) + tuple(range(1, end + 1))
+
+    # 单月 "6月"
+    m = _MONTH_RE.match(text)
+    if m:
+        return (int(m.group(1)),)
+
+    return ()
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_month_mask(text: str) -> int:
+    """观赏期文本 -> 月份位掩码"""
+    return months_to_mask(parse_view_season(text))
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_cold_tolerance(text: str) -> int:
+    """
+    提取耐寒字段里的最低温度（摄氏度）
+    比如 '耐寒（可耐 -20℃低温）' -> -20
+    '不耐寒（10℃以下生长受影响）' -> 5
+    """
+    text = (text or "").strip()
+
+    # 匹配 -20℃ 这类
+    m = _TEMP_RE.search(text)
+    if m:
+        return int(m.group(1))
+
+    # 特殊处理
+    if "不耐寒" in text:
+        # 默认 5℃ 作为临界
+        return 5
+    if "较耐寒" in text:
+        return -5
+
+    return 99  # 无法识别时，给个大温度，表示要求不严格
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_crown_width(text: str):
+    """冠幅文本取上限（厘米），比如 '40-100' -> 100；'需支架攀爬' 等无数字时返回 None"""
+    numbers = _NUMBER_RE.findall(text or "")
+    if not numbers:
+        return None
+    return max(float(n) for n in numbers)
+
+
+def split_values(text):
+    """'混合草甸、雨水花园' -> {'混合草甸', '雨水花园'}"""
+    return frozenset((text or "").split("、"))
+
+
+def values_to_flags(values, vocabulary):
+    """取值集合 -> 位标志，不认识的值忽略"""
+    flags = 0
+    for i, value in enumerate(vocabulary):
+        if value in values:
+            flags |= 1 << i
+    return flags
+
+
+def masks_with_any(flags, width):
+    """width 位内与 flags 有交集的所有取值，用来把位运算条件写成可走索引的 IN"""
+    return [m for m in range(1 << width) if m & flags]
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_level_flags(text: str) -> int:
+    """日照/需水文本 -> 位标志，比如 '高、中' -> 0b110"""
+    return values_to_flags(split_values(text), LEVELS)
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_garden_type_flags(text: str) -> int:
+    """花园类型文本 -> 位标志"""
+    return values_to_flags(split_values(text), GARDEN_TYPES)
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def name_pinyin(text: str) -> str:
+    """
+    植物名的拼音全拼和首字母，供搜索用，比如 '玫瑰' -> 'meigui mg'
+    没装 pypinyin 时为空串（不是 None，免得每次启动都回填）
+    """
+    if not text or lazy_pinyin is None:
+        return ""
+    syllables = [s for s in lazy_pinyin(text.strip()) if s.strip()]
+    return "".join(syllables).lower() + " " + "".join(s[0] for s in syllables).lower()
+
+
+def get_min_temp_by_location(lat):
+    if lat >= 50:   # 比如东北/内蒙古寒区
+        return -35
+    elif lat >= 40: # 北京、山东、陕西
+        return -20
+    elif lat >= 30: # 长江流域
+        return -10
+    elif lat >= 20: # 两广/云南
+        return 0
+    else:           # 海南等
+        return 5
+
+
+# 派生列 -> (来源列, 解析函数)，植物写入时回填到 Plants 行上
+DERIVED_COLUMNS = {
+    "ornamental_months": ("ornamental_period", parse_month_mask),
+    "cold_limit": ("cold_resistance", parse_cold_tolerance),
+    "name_pinyin": ("name", name_pinyin),
+    "sunlight_flags": ("sunlight", parse_level_flags),
+    "water_flags": ("water_need", parse_level_flags),
+    "garden_type_flags": ("garden_type", parse_garden_type_flags),
+}
+
+
+def derive_columns(get):
+    """get(列名) -> 原始值；返回 {派生列: 解析结果}"""
+    return {col: parse(get(src)) for col, (src, parse) in DERIVED_COLUMNS.items()}
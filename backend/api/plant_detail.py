@@ -0,0 +1,237 @@
+"""植物详情（DeepSeek）服务
+
+- 所有请求共用一个 OpenAI 客户端（内部复用 HTTP 连接池），第一次请求时才导入 openai
+- 同一植物名的并发请求合并成一次上游调用
+- 结果存在 SQLite 持久缓存里，带 TTL 和条数上限（按最近访问淘汰）
+- 可以为所有植物名预热缓存
+- 上游统一流式请求，stream() 可边生成边转发给浏览器
+base_url 可配置，测试时指向本地 mock 服务即可。
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+log = logging.getLogger(__name__)
+
+FAILED_ANSWER = "植物信息获取失败，请稍后再试。"
+
+SYSTEM_PROMPT = "你是一个植物专家"
+USER_PROMPT = "给出{name}的详细信息，包括基本特征、生长习性、常见病害、修剪建议、防治方法。"
+
+
+class DetailCache:
+    """SQLite 持久缓存：name -> answer"""
+
+    def __init__(self, path, ttl=30 * 24 * 3600, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS plant_detail ("
+            " name TEXT PRIMARY KEY,"
+            " answer TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_plant_detail_accessed ON plant_detail (accessed_at)"
+        )
+
+    def get(self, name):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT answer, created_at FROM plant_detail WHERE name = ?", (name,)
+            ).fetchone()
+            if row is None:
+                return None
+            answer, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM plant_detail WHERE name = ?", (name,))
+                return None
+            self._conn.execute(
+                "UPDATE plant_detail SET accessed_at = ? WHERE name = ?", (now, name)
+            )
+            return answer
+
+    def put(self, name, answer):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO plant_detail (name, answer, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?)",
+                (name, answer, now, now),
+            )
+            self._evict()
+
+    def _evict(self):
+        # 过期的先删，再按最近访问时间裁到上限
+        if self.ttl:
+            self._conn.execute(
+                "DELETE FROM plant_detail WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM plant_detail").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM plant_detail WHERE name IN ("
+                " SELECT name FROM plant_detail ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM plant_detail").fetchone()[0]
+
+
+class _Pending:
+    """一次进行中的上游请求：累积的片段 + 完成后的 Future"""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.failed = False
+        self.cond = threading.Condition()
+        self.future = Future()
+
+    def push(self, text):
+        with self.cond:
+            self.chunks.append(text)
+            self.cond.notify_all()
+
+    def finish(self, answer, failed=False):
+        with self.cond:
+            self.done = True
+            self.failed = failed
+            self.cond.notify_all()
+        self.future.set_result(answer)
+
+    def follow(self):
+        """从头产出片段，直到请求结束"""
+        i = 0
+        while True:
+            with self.cond:
+                while i >= len(self.chunks) and not self.done:
+                    self.cond.wait()
+                new = self.chunks[i:]
+                done = self.done
+            i += len(new)
+            yield from new
+            if done and i >= len(self.chunks):
+                return
+
+
+class PlantDetailService:
+
+    def __init__(self, api_key, base_url, cache, model="deepseek-chat",
+                 timeout=60, max_workers=4):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.timeout = timeout
+        self.cache = cache
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="plant-detail")
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    # openai 导入要半秒多，不放在模块顶层拖慢启动
+                    from openai import OpenAI
+                    self._client = OpenAI(
+                        api_key=self.api_key, base_url=self.base_url, timeout=self.timeout
+                    )
+        return self._client
+
+    def messages(self, name):
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": USER_PROMPT.format(name=name)},
+        ]
+
+    def _pending(self, name):
+        """取同名进行中的请求，没有就新发起一个"""
+        with self._inflight_lock:
+            pending = self._inflight.get(name)
+            if pending is None:
+                pending = _Pending()
+                self._inflight[name] = pending
+                self._executor.submit(self._fetch, name, pending)
+            return pending
+
+    def _done(self, name, pending):
+        with self._inflight_lock:
+            if self._inflight.get(name) is pending:
+                del self._inflight[name]
+
+    def submit(self, name):
+        """返回 Future；缓存命中时已完成，同名请求共享同一个 Future"""
+        answer = self.cache.get(name)
+        if answer is not None:
+            future = Future()
+            future.set_result(answer)
+            return future
+        return self._pending(name).future
+
+    def stream(self, name):
+        """
+        产出 (事件, 文本)：('delta', 片段) ... ('done', 完整答案) 或 ('error', 提示)
+        缓存命中时一次性回放整段答案
+        """
+        answer = self.cache.get(name)
+        if answer is not None:
+            yield "delta", answer
+            yield "done", answer
+            return
+
+        pending = self._pending(name)
+        for text in pending.follow():
+            yield "delta", text
+        answer = pending.future.result()
+        if pending.failed:
+            yield "error", answer
+        else:
+            yield "done", answer
+
+    def get(self, name, timeout=None):
+        return self.submit(name).result(timeout)
+
+    def _fetch(self, name, pending):
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=self.messages(name),
+                stream=True,
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    pending.push(chunk.choices[0].delta.content)
+            answer = "".join(pending.chunks).strip()
+            if not answer:
+                raise ValueError("空回答")
+        except Exception as e:
+            log.warning("DeepSeek API 调用失败: %s", e)
+            # 失败结果不写缓存，下次再试
+            self._done(name, pending)
+            pending.finish(FAILED_ANSWER, failed=True)
+            return
+
+        # 先写缓存再移出进行中，避免间隙里重复请求上游
+        self.cache.put(name, answer)
+        self._done(name, pending)
+        pending.finish(answer)
+
+    def prewarm(self, names):
+        """为未缓存的植物名发起请求，返回 Future 列表"""
+        return [self.submit(n) for n in dict.fromkeys(names) if n and self.cache.get(n) is None]
@@ -0,0 +1,225 @@
+"""植物批量导入
+
+CSV / JSON Lines 流式读取，按块批量写入 plants 表，每块一个事务。
+列名按 Plants.__table__.columns 校验；单行出错只记录该行，不影响整批。
+upsert 模式下按 latin_name 匹配已有植物并更新。
+"""
+import csv
+import io
+import json
+
+from sqlalchemy import insert, select, update
+
+from parsing import DERIVED_COLUMNS, derive_columns
+
+
+FORMATS = ("csv", "jsonl")
+
+# 导入时忽略的列：主键与派生列由数据库/解析生成
+IGNORED_COLUMNS = {"id", *DERIVED_COLUMNS}
+
+# 派生列的来源列；upsert 更新时从已有行取缺失的来源列
+SOURCE_COLUMNS = tuple(dict.fromkeys(src for src, _ in DERIVED_COLUMNS.values()))
+
+# 错误明细最多返回多少条
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportFormatError(ValueError):
+    """整个文件无法导入（格式/表头错误）"""
+
+
+def detect_format(filename=None, content_type=None):
+    name = (filename or "").lower()
+    ctype = (content_type or "").lower()
+    if name.endswith(".csv") or "csv" in ctype:
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson")) or "ndjson" in ctype or "jsonl" in ctype:
+        return "jsonl"
+    return None
+
+
+def iter_rows(stream, fmt, columns):
+    """逐行产出 (行号, dict 或 None, 错误信息)，stream 为二进制流"""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        if not reader.fieldnames:
+            raise ImportFormatError("CSV 缺少表头")
+        unknown = [c for c in reader.fieldnames if c not in columns]
+        if unknown:
+            raise ImportFormatError(f"未知列: {', '.join(unknown)}")
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+
+    if fmt == "jsonl":
+        for line_no, line in enumerate(text, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_no, None, f"JSON 解析失败: {e}"
+                continue
+            if not isinstance(row, dict):
+                yield line_no, None, "每行必须是 JSON 对象"
+                continue
+            yield line_no, row, None
+        return
+
+    raise ImportFormatError(f"不支持的格式: {fmt}")
+
+
+def clean_row(row, columns):
+    """校验并整理一行，返回 (values, 错误信息)"""
+    unknown = [k for k in row if k not in columns]
+    if unknown:
+        return None, f"未知列: {', '.join(map(str, unknown))}"
+
+    values = {}
+    for k, v in row.items():
+        if k in IGNORED_COLUMNS:
+            continue
+        if isinstance(v, (dict, list)):
+            v = json.dumps(v, ensure_ascii=False)
+        elif v is not None and not isinstance(v, str):
+            v = str(v)
+        values[k] = v
+
+    if not values.get("name"):
+        return None, "缺少 name"
+    return values, None
+
+
+def with_derived(values, stored=None):
+    """
+    补上全部派生列，与 models.fill_derived_columns 一致
+    stored 为已有行的来源列（upsert 更新时），本行没给的来源列按它解析，都没有时按空值
+    """
+    source = dict(stored or {}, **values)
+    values.update(derive_columns(source.get))
+    return values
+
+
+class PlantImporter:
+
+    def __init__(self, session, model, chunk_size=500, upsert=False):
+        self.session = session
+        self.model = model
+        self.chunk_size = max(1, int(chunk_size))
+        self.upsert = upsert
+        self.columns = {c.name for c in model.__table__.columns}
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def _error(self, line_no, msg):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_no, "error": msg})
+
+    def run(self, stream, fmt):
+        chunk = []
+        for line_no, row, error in iter_rows(stream, fmt, self.columns):
+            if error is None:
+                row, error = clean_row(row, self.columns)
+            if error is not None:
+                self._error(line_no, error)
+                continue
+            chunk.append((line_no, row))
+            if len(chunk) >= self.chunk_size:
+                self._flush(chunk)
+                chunk = []
+        if chunk:
+            self._flush(chunk)
+        return self.summary()
+
+    def summary(self):
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+    def _split(self, chunk):
+        """
+        拆成 (新增, 更新) 并补上派生列；upsert 模式下同一块内重复的 latin_name 后者覆盖前者，
+        派生列在合并之后、按已有行叠加本次的值计算
+        """
+        if not self.upsert:
+            return [(line_no, with_derived(values)) for line_no, values in chunk], []
+
+        merged = {}
+        inserts = []
+        for line_no, values in chunk:
+            key = values.get("latin_name")
+            if not key:
+                inserts.append((line_no, values))
+            elif key in merged:
+                merged[key][1].update(values)
+            else:
+                merged[key] = (line_no, values)
+
+        existing = {}
+        if merged:
+            stmt = (
+                select(self.model.latin_name, self.model.id,
+                       *(getattr(self.model, c) for c in SOURCE_COLUMNS))
+                .where(self.model.latin_name.in_(list(merged)))
+                .order_by(self.model.id.desc())
+            )
+            # 倒序遍历，重复 latin_name 时保留 id 最小的一行
+            existing = {row.latin_name: row for row in self.session.execute(stmt)}
+
+        inserts = [(line_no, with_derived(values)) for line_no, values in inserts]
+        updates = []
+        for key, (line_no, values) in merged.items():
+            row = existing.get(key)
+            if row is None:
+                inserts.append((line_no, with_derived(values)))
+                continue
+            stored = {c: getattr(row, c) for c in SOURCE_COLUMNS}
+            updates.append((line_no, dict(with_derived(values, stored), id=row.id)))
+        return inserts, updates
+
+    def _write(self, inserts, updates):
+        # ORM 批量写入：insert 按行批量执行，update 按主键批量执行
+        if inserts:
+            self.session.execute(insert(self.model), [v for _, v in inserts])
+        if updates:
+            self.session.execute(update(self.model), [v for _, v in updates])
+
+    def _flush(self, chunk):
+        inserts, updates = self._split(chunk)
+        try:
+            self._write(inserts, updates)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            # 整块失败时逐行重试，定位出错的行
+            self._flush_rows(inserts, updates)
+            return
+        self.inserted += len(inserts)
+        self.updated += len(updates)
+
+    def _flush_rows(self, inserts, updates):
+        for kind, rows in (("insert", inserts), ("update", updates)):
+            for line_no, values in rows:
+                try:
+                    if kind == "insert":
+                        self._write([(line_no, values)], [])
+                    else:
+                        self._write([], [(line_no, values)])
+                    self.session.commit()
+                except Exception as e:
+                    self.session.rollback()
+                    self._error(line_no, str(e.__cause__ or e))
+                    continue
+                if kind == "insert":
+                    self.inserted += 1
+                else:
+                    self.updated += 1
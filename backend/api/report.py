@@ -0,0 +1,218 @@
+"""花园报告 PDF
+
+图片逐页解码、嵌入：每张图片用完即释放，不再把所有图片一次性解码到内存。
+生成完的 PDF 先落到临时文件，再分块流式返回给客户端。
+fpdf 在第一次生成报告时才导入，不影响启动时间；字体每个进程只解析一次，各份报告复用。
+"""
+import base64
+import copy
+import io
+import os
+import tempfile
+from functools import lru_cache
+
+
+FONT_FAMILY = "NotoSans"
+
+SEASON_TITLES = {
+    '0': '春', '1': '夏', '2': '秋', '3': '冬'
+}
+
+
+@lru_cache(maxsize=None)
+def resolve_font(path):
+    """每个进程只解析、检查一次字体路径"""
+    path = os.path.abspath(path)
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"报告字体不存在: {path}")
+    return path
+
+
+@lru_cache(maxsize=None)
+def load_font(path):
+    """
+    每个进程只解析一次字体（cmap、字宽表），返回 (模板 TTFFont, 字体文件内容)
+    模板本身不用于生成文档，由 attach_font 复制给各份报告
+    """
+    from fpdf import FPDF
+
+    path = resolve_font(path)
+    pdf = FPDF()
+    pdf.add_font(FONT_FAMILY, "", path)
+    with open(path, "rb") as f:
+        data = f.read()
+    return pdf.fonts[FONT_FAMILY.lower()], data
+
+
+def attach_font(pdf, path):
+    """
+    把解析好的字体挂到新文档上
+    fpdf 的 TTFFont.__deepcopy__ 共享只读的 cmap 等，复制字宽表等按文档变化的状态；
+    输出时会就地子集化 ttfont 并关闭它，所以每份文档从内存里的字体文件另开一个，
+    已用字符表也按文档重建
+    """
+    from fontTools import ttLib
+    from fpdf.fonts import SubsetMap
+
+    template, data = load_font(path)
+    font = copy.deepcopy(template)
+    font.ttfont = ttLib.TTFont(io.BytesIO(data), recalcTimestamp=False, lazy=True)
+    font.subset = SubsetMap(font)
+    font.i = len(pdf.fonts) + 1
+    pdf.fonts[font.fontkey] = font
+
+
+class ReportImageError(ValueError):
+    """图片无法解码（base64 损坏、不是图片）"""
+
+
+def image_title(filename):
+    season = SEASON_TITLES.get(filename.split(".")[0])
+    if season is None:
+        return "花园平面效果"
+    return f"{season}季实景效果"
+
+
+def parse_count(value):
+    """数量转成整数，前端可能传 "3" 这样的字符串；不是数字时抛 ValueError"""
+    if isinstance(value, bool):
+        raise ValueError(f"数量不是数字: {value!r}")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"数量不是数字: {value!r}") from None
+
+
+def normalize_plantlist(plantlist):
+    """校验种植清单，count 统一成整数；格式不对时抛 ValueError，由接口返回 400"""
+    if not isinstance(plantlist, list):
+        raise ValueError("plantlist 必须是列表")
+    items = []
+    for item in plantlist:
+        if not isinstance(item, dict) or not isinstance(item.get("name"), str):
+            raise ValueError(f"清单条目格式错误: {item!r}")
+        items.append({**item, "count": parse_count(item.get("count"))})
+    return items
+
+
+def aggregate_counts(plantlist):
+    """同名条目合并数量，保持首次出现的顺序：[(name, count), ...]"""
+    counts = {}
+    for item in plantlist:
+        counts[item["name"]] = counts.get(item["name"], 0) + parse_count(item["count"])
+    return list(counts.items())
+
+
+class ReportImage:
+    """一张待嵌入的图片，open() 时才读取/解码"""
+
+    def __init__(self, filename, opener):
+        self.filename = filename
+        self._opener = opener
+
+    def open(self):
+        return self._opener()
+
+    @classmethod
+    def from_base64(cls, filename, data):
+        return cls(filename, lambda: io.BytesIO(base64.b64decode(data)))
+
+    @classmethod
+    def from_upload(cls, upload):
+        # werkzeug 会把较大的上传文件落盘，这里直接读它的流
+        return cls(upload.filename, lambda: upload.stream)
+
+    @classmethod
+    def from_path(cls, filename, path):
+        return cls(filename, lambda: open(path, "rb"))
+
+
+class ReportBuilder:
+
+    def __init__(self, font_path):
+        from fpdf import FPDF
+
+        pdf = FPDF()
+        pdf.set_auto_page_break(auto=True, margin=15)
+        attach_font(pdf, font_path)
+        self.pdf = pdf
+
+    def plant_list(self, plantlist):
+        pdf = self.pdf
+        pdf.set_font(FONT_FAMILY, size=14)
+        pdf.add_page()
+        pdf.multi_cell(0, 10, "种植清单", align="C")
+        pdf.ln(5)
+
+        # 表头
+        pdf.set_font(FONT_FAMILY, size=12)
+        pdf.cell(100, 10, "植物名称", border=1, align="C")
+        pdf.cell(40, 10, "数量", border=1, align="C")
+        pdf.ln()
+
+        # 渲染列表
+        for item in plantlist:
+            pdf.cell(100, 10, item["name"], border=1, align="C")
+            pdf.cell(40, 10, str(item["count"]), border=1, align="C")
+            pdf.ln()
+
+    def care_list(self, plantlist, plants_by_name):
+        """plants_by_name: {名称: 植物}，由调用方一次查好"""
+        pdf = self.pdf
+        pdf.add_page()
+        pdf.set_font(FONT_FAMILY, size=14)
+        pdf.multi_cell(0, 10, "养护清单", align="C")
+        pdf.ln(5)
+
+        pdf.set_fill_color(200, 220, 255)  # 淡蓝色背景
+        pdf.cell(40, 10, "植物名称", border=1, align="C", fill=True)
+        pdf.cell(50, 10, "常见病害", border=1, align="C", fill=True)
+        pdf.cell(50, 10, "修剪建议", border=1, align="C", fill=True)
+        pdf.cell(50, 10, "防治方法", border=1, align="C", fill=True)
+        pdf.ln()
+
+        # 表格内容
+        pdf.set_font(FONT_FAMILY, size=10)
+
+        for name, count in aggregate_counts(plantlist):
+            plant = plants_by_name.get(name)
+            if not plant:
+                continue
+
+            # 名称（带数量）
+            pdf.cell(40, 10, f"{plant.name} × {count}", border=1, align="L")
+
+            # 常见病害
+            pdf.cell(50, 10, plant.common_diseases or "-", border=1, align="L")
+
+            # 修剪建议
+            pdf.cell(50, 10, plant.pruning or "-", border=1, align="L")
+
+            # 防治方法
+            pdf.cell(50, 10, plant.control_methods or "-", border=1, align="L")
+
+            pdf.ln()
+
+    def image_page(self, image):
+        pdf = self.pdf
+        pdf.add_page()
+        pdf.multi_cell(0, 10, image_title(image.filename), align="C")
+        pdf.ln(5)  # 空一行
+        try:
+            src = image.open()
+            try:
+                pdf.image(src, x=10, y=50, w=180)  # 调整位置和宽度
+            finally:
+                src.close()
+        except (ValueError, OSError, SyntaxError) as e:
+            # base64 解码失败是 binascii.Error（ValueError）；Pillow 认不出的图片是
+            # UnidentifiedImageError（OSError），部分损坏的 PNG 会抛 SyntaxError
+            raise ReportImageError(f"图片无法解码: {image.filename or '未命名'}") from e
+
+    def to_tempfile(self):
+        """把 PDF 写到临时文件并释放文档对象，返回定位到开头的文件"""
+        out = tempfile.TemporaryFile()
+        out.write(self.pdf.output())
+        self.pdf = None
+        out.seek(0)
+        return out
@@ -0,0 +1,161 @@
+"""/plants_data 结果缓存
+
+键 = 请求体的规范化 JSON（键排序、紧凑）+ 植物表版本号 + 响应格式等附加参数 的 sha256。
+值是已经序列化好的响应字节，命中时连序列化都省了。
+内存层按字节数做 LRU；可选的磁盘层（SQLite）放内存里淘汰掉的和进程重启前的结果。
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def request_key(body, version, **extra):
+    """同样的请求体（不论键顺序）+ 同样的版本号和附加参数 -> 同一个键"""
+    material = {"body": body, "version": version, **extra}
+    text = json.dumps(material, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class DiskTier:
+    """SQLite 磁盘层：key -> (mimetype, body)，按最近访问淘汰到字节上限"""
+
+    def __init__(self, path, max_bytes):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS result_cache ("
+            " key TEXT PRIMARY KEY,"
+            " mimetype TEXT NOT NULL,"
+            " body BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_result_cache_accessed ON result_cache (accessed_at)"
+        )
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mimetype, body FROM result_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE result_cache SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            return row[0], bytes(row[1])
+
+    def put(self, key, mimetype, body):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO result_cache (key, mimetype, body, size, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, mimetype, body, len(body), time.time()),
+            )
+            self._evict()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM result_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # 从最久未访问的开始删，直到总量回到上限以内
+        drop = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM result_cache ORDER BY accessed_at"
+        ):
+            if total <= self.max_bytes:
+                break
+            drop.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM result_cache WHERE key = ?", drop)
+
+    def stats(self):
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM result_cache"
+            ).fetchone()
+        return {"entries": count, "bytes": size, "max_bytes": self.max_bytes}
+
+
+class ResultCache:
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, disk=None):
+        self.max_bytes = max_bytes
+        self.disk = disk
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (mimetype, body)
+        self._bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """返回 (mimetype, body) 或 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self.disk.get(key) if self.disk else None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, entry)
+        return entry
+
+    def put(self, key, mimetype, body):
+        entry = (mimetype, body)
+        with self._lock:
+            self._store(key, entry)
+        if self.disk:
+            self.disk.put(key, mimetype, body)
+
+    def _store(self, key, entry):
+        size = len(entry[1])
+        # 单条就超过上限的不进内存层
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old[1])
+        self._entries[key] = entry
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, dropped) = self._entries.popitem(last=False)
+            self._bytes -= len(dropped)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            result = {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+        if self.disk:
+            result["disk"] = self.disk.stats()
+        return result
@@ -0,0 +1,229 @@
+"""植物全文搜索
+
+plants_fts 是 FTS5 外部内容表（content=plants），内容不另存一份，
+由 plants 上的触发器在增删改时同步，进程外的写入也一样。
+分词用 trigram：任意连续 3 个字符都能命中，中文不需要分词，前缀、中间片段都能搜。
+name_pinyin 列是名称的全拼和首字母（见 parsing.name_pinyin），拼音也能搜。
+结果按 bm25 排序，名称完全相同、前缀相同的排最前。
+bm25 要统计词在全表的命中数，几乎每行都有的词（比如 '白粉病'）打分要上百毫秒，
+而这种词的区分度本来就接近零：命中超过 MAX_CANDIDATES 条的词不参与打分，只用来过滤；
+全是这种词时只取前 MAX_CANDIDATES 条命中，不打分。
+
+trigram 匹配不了少于 3 个字符的词（比如两个字的中文名），这时退回：
+先用 ix_plants_name 做名称前缀的范围查询，不够再按 id 顺序扫描做子串匹配，凑够一页即停。
+"""
+import logging
+
+from sqlalchemy import text
+
+
+log = logging.getLogger("garden")
+
+FTS_TABLE = "plants_fts"
+
+# 索引的列及其 bm25 权重（顺序即 FTS 表的列顺序）
+SEARCH_COLUMNS = {
+    "name": 10.0,
+    "latin_name": 6.0,
+    "name_pinyin": 6.0,
+    "family": 2.0,
+    "genus": 2.0,
+    "usage": 1.0,
+    "common_diseases": 1.0,
+    "control_methods": 1.0,
+}
+
+# 短词回退时只在这些列里找
+SHORT_QUERY_COLUMNS = ("name", "latin_name", "name_pinyin", "family", "genus")
+
+# 结果返回的列
+RESULT_COLUMNS = ("id", "name", "latin_name", "family", "genus")
+
+TRIGRAM = 3
+MAX_QUERY_LENGTH = 64
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MAX_OFFSET = 1000
+MAX_CANDIDATES = 2000
+
+
+class SearchArgsError(ValueError):
+    pass
+
+
+def create_search_index(conn):
+    """建 FTS 表和同步触发器；表是新建的就从 plants 全量灌一次。FTS5 不可用时返回 False"""
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": FTS_TABLE}
+    ).scalar()
+    columns = ", ".join(SEARCH_COLUMNS)
+    new = ", ".join(f"new.{c}" for c in SEARCH_COLUMNS)
+    old = ", ".join(f"old.{c}" for c in SEARCH_COLUMNS)
+    try:
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5({columns},"
+            f" content='plants', content_rowid='id', tokenize='trigram')"
+        ))
+    except Exception as e:  # 编译时没带 FTS5 / trigram（SQLite < 3.34）
+        log.warning("全文搜索不可用，搜索退回 LIKE: %s", e)
+        return False
+
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON plants BEGIN"
+        f" INSERT INTO {FTS_TABLE} (rowid, {columns}) VALUES (new.id, {new}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON plants BEGIN"
+        f" INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old}); END"
+    ))
+    # 只有被索引的列变化时才重建这一行
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE OF {columns} ON plants BEGIN"
+        f" INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old});"
+        f" INSERT INTO {FTS_TABLE} (rowid, {columns}) VALUES (new.id, {new}); END"
+    ))
+    if not exists:
+        rebuild_search_index(conn)
+    return True
+
+
+def rebuild_search_index(conn):
+    conn.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def has_search_index(conn):
+    return bool(conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": FTS_TABLE}
+    ).scalar())
+
+
+def parse_args(args):
+    """(q, limit, offset)"""
+    q = " ".join((args.get("q") or "").split())[:MAX_QUERY_LENGTH]
+    if not q:
+        raise SearchArgsError("缺少搜索词 q")
+    try:
+        limit = int(args.get("limit") or DEFAULT_LIMIT)
+        offset = int(args.get("offset") or 0)
+    except ValueError:
+        raise SearchArgsError("limit / offset 必须是整数")
+    if offset < 0 or offset > MAX_OFFSET:
+        raise SearchArgsError(f"offset 范围 0-{MAX_OFFSET}")
+    return q, max(1, min(limit, MAX_LIMIT)), offset
+
+
+def _like_pattern(value):
+    value = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{value}%"
+
+
+def _short_filters(terms, params):
+    """短词：每个词都要出现在 SHORT_QUERY_COLUMNS 的某一列里"""
+    clauses = []
+    for i, term in enumerate(terms):
+        params[f"s{i}"] = _like_pattern(term)
+        clauses.append("(" + " OR ".join(
+            f"p.{c} LIKE :s{i} ESCAPE '\\'" for c in SHORT_QUERY_COLUMNS
+        ) + ")")
+    return clauses
+
+
+def _page(rows, limit):
+    rows = [dict(r._mapping) for r in rows]
+    has_more = len(rows) > limit
+    return rows[:limit], has_more
+
+
+def _phrase(term):
+    """词当作短语；双引号转义成两个"""
+    return '"{}"'.format(term.replace('"', '""'))
+
+
+def _hit_count(conn, match, cap=MAX_CANDIDATES):
+    """命中数，最多数到 cap + 1"""
+    return conn.execute(text(
+        f"SELECT count(*) FROM (SELECT 1 FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match LIMIT :cap)"
+    ), {"match": match, "cap": cap + 1}).scalar()
+
+
+def _fts_search(conn, q, long_terms, short_terms, limit, offset):
+    select_cols = ", ".join(f"p.{c}" for c in RESULT_COLUMNS)
+    weights = ", ".join(str(w) for w in SEARCH_COLUMNS.values())
+    # 区分度高的词参与打分；命中太多的词只用来过滤（按 rowid 查，不参与 bm25）
+    selective, common = [], []
+    for term in long_terms:
+        (selective if _hit_count(conn, _phrase(term)) <= MAX_CANDIDATES else common).append(term)
+
+    params = {
+        "q": q, "prefix": _like_pattern(q)[1:],
+        "candidates": MAX_CANDIDATES, "limit": limit + 1, "offset": offset,
+    }
+    where = _short_filters(short_terms, params)
+    order = "CASE WHEN p.name = :q THEN 0 WHEN p.name LIKE :prefix ESCAPE '\\' THEN 1 ELSE 2 END"
+
+    if selective:
+        params["match"] = " ".join(_phrase(t) for t in selective)
+        if common:
+            params["common"] = " ".join(_phrase(t) for t in common)
+            where.append(
+                f"EXISTS (SELECT 1 FROM {FTS_TABLE} f WHERE f.{FTS_TABLE} MATCH :common AND f.rowid = p.id)"
+            )
+        # 先在 FTS 里取命中并打分（物化，免得规划器反过来扫 plants），再回表
+        sql = (
+            f"WITH hits AS MATERIALIZED ("
+            f"SELECT rowid AS id, bm25({FTS_TABLE}, {weights}) AS score FROM {FTS_TABLE}"
+            f" WHERE {FTS_TABLE} MATCH :match)"
+            f" SELECT {select_cols}, hits.score FROM hits JOIN plants p ON p.id = hits.id"
+            f" WHERE {' AND '.join(where) or '1'}"
+            f" ORDER BY {order}, hits.score, p.id LIMIT :limit OFFSET :offset"
+        )
+    else:
+        params["match"] = " ".join(_phrase(t) for t in common)
+        sql = (
+            f"SELECT {select_cols}, NULL AS score FROM plants p WHERE p.id IN ("
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match LIMIT :candidates)"
+            f" AND {' AND '.join(where) or '1'}"
+            f" ORDER BY {order}, p.id LIMIT :limit OFFSET :offset"
+        )
+    rows, has_more = _page(conn.execute(text(sql), params), limit)
+    for row in rows:
+        if row["score"] is not None:
+            row["score"] = round(-row["score"], 4)  # bm25 越小越相关，翻成越大越相关
+    return rows, has_more
+
+
+def _short_search(conn, q, terms, limit, offset):
+    """不够 3 个字符：名称前缀（走索引）在前，其余子串匹配按 id 排在后"""
+    select_cols = ", ".join(f"p.{c}" for c in RESULT_COLUMNS)
+    want = offset + limit + 1
+    prefix = conn.execute(text(
+        f"SELECT {select_cols} FROM plants p WHERE p.name >= :lo AND p.name < :hi"
+        f" ORDER BY p.name, p.id LIMIT :n"
+    ), {"lo": q, "hi": q + "\U0010ffff", "n": want}).all()
+
+    rows = list(prefix)
+    if len(rows) < want:
+        params = {"lo": q, "hi": q + "\U0010ffff", "n": want - len(rows)}
+        where = _short_filters(terms, params)
+        where.append("NOT (p.name >= :lo AND p.name < :hi)")
+        rows += conn.execute(text(
+            f"SELECT {select_cols} FROM plants p WHERE {' AND '.join(where)}"
+            f" ORDER BY p.id LIMIT :n"
+        ), params).all()
+
+    rows, has_more = _page(rows[offset:], limit)
+    for row in rows:
+        row["score"] = None
+    return rows, has_more
+
+
+def search_plants(conn, q, limit=DEFAULT_LIMIT, offset=0, fts=True):
+    """返回 (rows, next_offset)；next_offset 为 None 表示没有下一页"""
+    terms = q.split()
+    long_terms = [t for t in terms if len(t) >= TRIGRAM]
+    short_terms = [t for t in terms if len(t) < TRIGRAM]
+    if fts and long_terms:
+        rows, has_more = _fts_search(conn, q, long_terms, short_terms, limit, offset)
+    else:
+        rows, has_more = _short_search(conn, q, terms, limit, offset)
+    return rows, (offset + limit if has_more and offset + limit <= MAX_OFFSET else None)
@@ -0,0 +1,257 @@
+"""前端静态资源
+
+目录只在启动和内容变化时扫描一次，之后按路径查表，不再每个请求去 stat 文件。
+内容变化靠各级子目录的 mtime 发现（新建、替换、删除文件都会改所在目录的 mtime），
+另外带扩展名的路径查不到时也会立刻重扫一次，新生成的模型不用等下一次检查。
+- vite 构建输出 assets/ 下带指纹的文件（assets/index-DiwrgTda.js）长期缓存：max-age 一年 + immutable；
+  只认 immutable_dirs 里的目录，public 下碰巧叫 tulip-variant1.glb 的文件不算
+- 其它文件（index.html、public/models 下的模型等）no-cache，靠 ETag 返回 304
+- 旁边有预压缩的 .br / .gz 时按 Accept-Encoding 选用（flask precompress-assets 生成）
+- Range 请求走未压缩的原文件，大模型可以断点续传、分段加载
+- 没有扩展名的路径查不到时回退到 index.html（前端路由），带扩展名的返回 404
+"""
+import gzip
+import mimetypes
+import os
+import re
+import tempfile
+import threading
+import time
+
+from flask import abort, send_file
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# vite 的输出文件名：name-<8 位 base64url 哈希>.ext
+FINGERPRINT_RE = re.compile(r"-[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$")
+
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# 值得预压缩的类型（图片、已压缩的纹理不在内）
+COMPRESSIBLE = {
+    ".html", ".js", ".mjs", ".css", ".json", ".map", ".svg", ".txt", ".xml",
+    ".wasm", ".obj", ".mtl", ".gltf", ".glb",
+}
+
+for _ext, _type in ((".obj", "model/obj"), (".mtl", "model/mtl"),
+                    (".glb", "model/gltf-binary"), (".gltf", "model/gltf+json")):
+    mimetypes.add_type(_type, _ext)
+
+
+class Asset:
+    __slots__ = ("path", "size", "mtime", "etag", "mimetype", "immutable", "variants")
+
+    def __init__(self, path, st, rel, immutable=False):
+        self.path = path
+        self.size = st.st_size
+        self.mtime = st.st_mtime
+        self.etag = f"{st.st_mtime_ns:x}-{st.st_size:x}"
+        self.mimetype = mimetypes.guess_type(rel)[0] or "application/octet-stream"
+        self.immutable = immutable and bool(FINGERPRINT_RE.search(rel))
+        self.variants = {}  # 编码 -> (路径, etag)
+
+
+def _under(path, dirs):
+    return any(path.startswith(d + os.sep) for d in dirs)
+
+
+def _scan(roots, immutable_dirs=()):
+    """{相对路径: Asset}，靠前的目录优先；immutable_dirs 下带指纹的文件可长期缓存"""
+    assets = {}
+    for root in roots:
+        if not os.path.isdir(root):
+            continue
+        for dirpath, _, filenames in os.walk(root):
+            names = set(filenames)
+            for name in filenames:
+                if any(name.endswith(suffix) and name[:-len(suffix)] in names
+                       for _, suffix in ENCODINGS):
+                    continue
+                path = os.path.join(dirpath, name)
+                rel = os.path.relpath(path, root).replace(os.sep, "/")
+                if rel in assets:
+                    continue
+                asset = Asset(path, os.stat(path), rel, _under(path, immutable_dirs))
+                for encoding, suffix in ENCODINGS:
+                    if name + suffix in names:
+                        variant = path + suffix
+                        vst = os.stat(variant)
+                        # 原文件比压缩版新，说明压缩版过期了
+                        if vst.st_mtime >= asset.mtime:
+                            asset.variants[encoding] = (variant, f"{asset.etag}-{suffix[1:]}")
+                assets[rel] = asset
+    return assets
+
+
+def _stamp(roots):
+    """各目录及其所有子目录的 (路径, inode, mtime)；只 stat 目录，不 stat 文件"""
+    stamp = []
+    for root in roots:
+        if not os.path.isdir(root):
+            stamp.append(None)
+            continue
+        for dirpath, _, _ in os.walk(root):
+            try:
+                st = os.stat(dirpath)
+            except OSError:
+                continue
+            stamp.append((dirpath, st.st_ino, st.st_mtime_ns))
+    return tuple(stamp)
+
+
+class StaticAssets:
+    """
+    roots: 依次查找的目录（构建产物 dist 在前）
+    immutable_dirs: 内容哈希命名的构建输出目录，默认是第一个目录下的 assets/
+    任一级目录的 inode/mtime 变化时重扫，最多每 check_interval 秒检查一次；
+    带扩展名的路径查不到时也重扫，同样最多每 check_interval 秒一次
+    """
+
+    def __init__(self, roots, index="index.html", check_interval=1.0, immutable_dirs=None):
+        self.roots = [os.path.abspath(r) for r in roots]
+        if immutable_dirs is None:
+            immutable_dirs = [os.path.join(self.roots[0], "assets")] if self.roots else []
+        self.immutable_dirs = [os.path.abspath(d) for d in immutable_dirs]
+        self.index = index
+        self.check_interval = check_interval
+        self._assets = {}
+        self._stamp = None
+        self._checked = 0.0
+        self._miss_scanned = 0.0
+        self._lock = threading.Lock()
+
+    def assets(self):
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return self._assets
+        with self._lock:
+            self._checked = now
+            stamp = _stamp(self.roots)
+            if stamp != self._stamp:
+                self._assets = _scan(self.roots, self.immutable_dirs)
+                self._stamp = stamp
+        return self._assets
+
+    def refresh(self):
+        with self._lock:
+            self._assets = _scan(self.roots, self.immutable_dirs)
+            self._stamp = _stamp(self.roots)
+            self._checked = time.monotonic()
+
+    def lookup(self, path):
+        asset = self.assets().get(path)
+        if asset is None and path:
+            asset = self._rescan_on_miss(path)
+        return asset
+
+    def _rescan_on_miss(self, path):
+        """刚生成的文件可能还没扫到；按间隔限流，免得不存在的路径反复触发全量扫描"""
+        now = time.monotonic()
+        if now - self._miss_scanned < self.check_interval:
+            return None
+        self._miss_scanned = now
+        self.refresh()
+        return self._assets.get(path)
+
+    def response(self, path, req):
+        """没有扩展名的路径不存在时回退到 index.html（前端路由）；文件路径不存在返回 404"""
+        asset = self.lookup(path) if path else None
+        if asset is None:
+            # 模型、脚本等文件路径不能拿到 200 的 HTML
+            if os.path.splitext(path.rsplit("/", 1)[-1])[1]:
+                abort(404)
+            asset = self.assets().get(self.index)
+            if asset is None:
+                abort(404)
+
+        file_path, etag, encoding = asset.path, asset.etag, None
+        # Range 针对原文件的字节，带 Range 时不用压缩版
+        if asset.variants and "Range" not in req.headers:
+            for name, _ in ENCODINGS:
+                if name in asset.variants and req.accept_encodings[name]:
+                    file_path, etag = asset.variants[name]
+                    encoding = name
+                    break
+
+        try:
+            resp = send_file(
+                file_path, mimetype=asset.mimetype, conditional=True,
+                etag=etag, last_modified=asset.mtime, max_age=None,
+            )
+        except FileNotFoundError:
+            # 目录里的文件被替换了但还没重扫
+            self.refresh()
+            abort(404)
+        if encoding:
+            resp.headers["Content-Encoding"] = encoding
+        if asset.variants:
+            resp.vary.add("Accept-Encoding")
+
+        cc = resp.cache_control
+        cc.public = True
+        if asset.immutable:
+            # send_file 在 max_age=None 时会加 no-cache
+            cc.no_cache = None
+            cc.max_age = IMMUTABLE_MAX_AGE
+            cc.immutable = True
+        else:
+            cc.no_cache = True
+        return resp
+
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".precompress-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        # mkstemp 建的文件只有属主可读
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def precompress(root, min_size=1024, min_ratio=0.9):
+    """
+    给 root 下可压缩的文件生成 .gz（以及装了 brotli 时的 .br）
+    已有且不比原文件旧的跳过；压缩后省不到 1 - min_ratio 的不留
+    返回 [(相对路径, 编码, 原大小, 压缩后大小)]
+    """
+    written = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            ext = os.path.splitext(name)[1].lower()
+            if ext not in COMPRESSIBLE:
+                continue
+            path = os.path.join(dirpath, name)
+            st = os.stat(path)
+            if st.st_size < min_size:
+                continue
+            data = None
+            for encoding, suffix in ENCODINGS:
+                if encoding == "br" and brotli is None:
+                    continue
+                variant = path + suffix
+                if os.path.exists(variant) and os.stat(variant).st_mtime >= st.st_mtime:
+                    continue
+                if data is None:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                if encoding == "br":
+                    packed = brotli.compress(data, quality=11)
+                else:
+                    packed = gzip.compress(data, 9, mtime=0)
+                if len(packed) > len(data) * min_ratio:
+                    if os.path.exists(variant):
+                        os.unlink(variant)
+                    continue
+                _write_atomic(variant, packed)
+                written.append((os.path.relpath(path, root), encoding, len(data), len(packed)))
+    return written
@@ -0,0 +1,95 @@
+"""SQLite 连接配置与查询计划检查
+
+每个新连接执行一遍 PRAGMA：
+- journal_mode=WAL：读写不互相阻塞，多个 worker 同时读时写入不会报 database is locked
+- synchronous=NORMAL：WAL 下只在检查点 fsync，断电最多丢最后几个事务，不会损坏
+- cache_size / mmap_size：页缓存和内存映射，热数据不走 read()
+- busy_timeout：写锁被占用时等待而不是立刻报错
+非 SQLite 的库（DATABASE_URL 指向别的数据库）不做任何事。
+
+HOT_QUERIES 列出热点查询和应当用到的索引，flask check-queries 用 EXPLAIN QUERY PLAN 验证。
+"""
+from sqlalchemy import event, text
+
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64 * 1024,       # 负数单位是 KiB，即 64 MiB
+    "mmap_size": 256 * 1024 * 1024,
+    "busy_timeout": 5000,           # 毫秒
+    "temp_store": "MEMORY",
+}
+
+
+def configure_engine(engine, pragmas=None):
+    """给 engine 的每个新连接设置 PRAGMA；需在第一次连接前调用"""
+    if engine.dialect.name != "sqlite":
+        return False
+    pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_conn, _):
+        cursor = dbapi_conn.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    return True
+
+
+def current_pragmas(conn, names=DEFAULT_PRAGMAS):
+    return {name: conn.execute(text(f"PRAGMA {name}")).scalar() for name in names}
+
+
+# (名称, SQL, 参数, 期望的索引)
+HOT_QUERIES = (
+    (
+        "save_pdf 按名称查植物",
+        "SELECT id, name, common_diseases, pruning, control_methods FROM plants WHERE name IN (:a, :b)",
+        {"a": "", "b": ""},
+        "ix_plants_name",
+    ),
+    (
+        "植物名称去重（预热详情缓存）",
+        "SELECT DISTINCT name FROM plants",
+        {},
+        "ix_plants_name",
+    ),
+    (
+        "按用户名分页查预约",
+        "SELECT * FROM reserve WHERE username IN (:u) AND id > :cursor ORDER BY id LIMIT 201",
+        {"u": "", "cursor": 0},
+        "ix_reserve_username_id",
+    ),
+    (
+        "花园候选植物（筛选下推）",
+        "SELECT id FROM plants WHERE (sunlight_flags IN (4, 5, 6, 7) AND water_flags IN (1))"
+        " AND (ornamental_months & 480) != 0 AND cold_limit <= :t",
+        {"t": -20},
+        "ix_plants_zone_flags",
+    ),
+    (
+        "登录按用户名查用户",
+        "SELECT * FROM users WHERE username = :u LIMIT 1",
+        {"u": ""},
+        "sqlite_autoindex_users_1",
+    ),
+)
+
+
+def explain(conn, sql, params=None):
+    """EXPLAIN QUERY PLAN 的 detail 列"""
+    rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params or {})
+    return [row[-1] for row in rows]
+
+
+def check_query_plans(conn, queries=HOT_QUERIES):
+    """返回 [(名称, 是否用到期望的索引, 查询计划)]"""
+    results = []
+    for name, sql, params, index in queries:
+        plan = explain(conn, sql, params)
+        results.append((name, any(index in step for step in plan), plan))
+    return results
@@ -0,0 +1,169 @@
+"""花园网格区域分类（NumPy 栅格）
+
+建筑、墙、水体坐标先栅格化成布尔掩码，按可配置半径膨胀，
+再一次性对所有花卉格子查表分类。结果保持数组形式，
+只在接口返回时才转换成 dict。
+"""
+from itertools import chain
+from operator import itemgetter
+
+import numpy as np
+
+
+# 区域编码 = 光照 * 2 + 湿度（0 干 / 1 湿）
+ZONE_TYPES = ["全阴干", "全阴湿", "半日照干", "半日照湿", "全日照干", "全日照湿"]
+
+# 颜色映射（可以再扩展6类颜色）
+COLOR_MAP = {
+    "全阴干": "#6BAF92",
+    "全阴湿": "#A88ED0",
+    "半日照干": "#F3A6B0",
+    "半日照湿": "#E58B4A",
+    "全日照干": "#FFD166",
+    "全日照湿": "#118AB2",
+}
+ZONE_COLORS = [COLOR_MAP[z] for z in ZONE_TYPES]
+
+LIGHT_SHADE, LIGHT_HALF, LIGHT_FULL = 0, 1, 2
+
+# 栅格最多的格子数（每张布尔掩码约 4MB）；花卉分散、包围盒超过这个大小时改用集合查找
+MAX_RASTER_CELLS = 4_000_000
+
+# 超过这个绝对值的坐标转 int64 会溢出或失去精度，视为不在格子上
+MAX_COORD = 2 ** 53
+
+
+class ZoneGrid:
+    """分类结果：花卉格子坐标与区域编码，三个等长数组"""
+    __slots__ = ("xs", "ys", "codes")
+
+    def __init__(self, xs, ys, codes):
+        self.xs = xs
+        self.ys = ys
+        self.codes = codes
+
+    def __len__(self):
+        return len(self.codes)
+
+    def to_dicts(self):
+        return [
+            {
+                "position": {"x": x, "y": y},
+                "type": ZONE_TYPES[c],
+                "color": ZONE_COLORS[c],
+            }
+            for x, y, c in zip(self.xs.tolist(), self.ys.tolist(), self.codes.tolist())
+        ]
+
+
+def positions_array(positions, ceil=False):
+    """[{x, y}, ...] -> (N, 2) float 数组"""
+    if not positions:
+        return np.empty((0, 2), dtype=float)
+    flat = chain.from_iterable(map(itemgetter("x", "y"), positions))
+    pts = np.fromiter(flat, dtype=float, count=2 * len(positions)).reshape(-1, 2)
+    if ceil:
+        pts = np.ceil(pts)
+    return pts
+
+
+def _on_grid(pts):
+    """每个点是否落在整数格子上（有限、整数、不超过 MAX_COORD）"""
+    return ((pts == np.floor(pts)) & (np.abs(pts) <= MAX_COORD)).all(axis=1)
+
+
+def _grid_points(pts):
+    """只保留落在整数格子上的点"""
+    return pts[_on_grid(pts)].astype(np.int64)
+
+
+def rasterize(points, origin, shape):
+    mask = np.zeros(shape, dtype=bool)
+    if len(points):
+        ix = points[:, 0] - origin[0]
+        iy = points[:, 1] - origin[1]
+        keep = (ix >= 0) & (ix < shape[0]) & (iy >= 0) & (iy < shape[1])
+        mask[ix[keep], iy[keep]] = True
+    return mask
+
+
+def dilate(mask, radius, include_center=False):
+    """方形核膨胀：out[x, y] = mask 中 (x, y) 周围 radius 内是否有 True"""
+    out = np.zeros_like(mask)
+    w, h = mask.shape
+    for dx in range(-radius, radius + 1):
+        for dy in range(-radius, radius + 1):
+            if dx == 0 and dy == 0 and not include_center:
+                continue
+            out[max(0, -dx):w - max(0, dx), max(0, -dy):h - max(0, dy)] |= \
+                mask[max(0, dx):w - max(0, -dx), max(0, dy):h - max(0, -dy)]
+    return out
+
+
+def near(points, cells, radius, include_center=False):
+    """
+    集合查找版的 rasterize + dilate：cells 中每格周围 radius 内是否有 points 中的点
+    不建栅格，内存只和点数有关，用于包围盒很大但点很稀疏的布局
+    """
+    occupied = set(map(tuple, points.tolist()))
+    if not occupied:
+        return np.zeros(len(cells), dtype=bool)
+    offsets = [(dx, dy)
+               for dx in range(-radius, radius + 1)
+               for dy in range(-radius, radius + 1)
+               if include_center or dx or dy]
+    return np.fromiter(
+        (any((x + dx, y + dy) in occupied for dx, dy in offsets) for x, y in cells.tolist()),
+        dtype=bool, count=len(cells),
+    )
+
+
+def classify(data, shade_radius=1, wet_radius=1):
+    """
+    对 data["flowerPositions"] 分类
+    建筑/墙所在格为全阴，其周围 shade_radius 内为半日照；
+    水体周围 wet_radius 内（不含水体本身）为湿
+    """
+    flowers = positions_array(data.get("flowerPositions"))
+    xs, ys = flowers[:, 0], flowers[:, 1]
+    if not len(flowers):
+        return ZoneGrid(xs, ys, np.empty(0, dtype=np.int8))
+
+    obstacles = _grid_points(np.concatenate([
+        positions_array(data.get("buildingPositions"), ceil=True),
+        positions_array(data.get("wallPositions"), ceil=True),
+    ]))
+    water = _grid_points(positions_array(data.get("waterPositions")))
+
+    # 只栅格化花卉包围盒 + 半径范围，范围外的障碍物影响不到花卉
+    on_grid = _on_grid(flowers)
+    cells = flowers[on_grid].astype(np.int64)
+    pad = max(shade_radius, wet_radius)
+    if len(cells):
+        origin = cells.min(axis=0) - pad
+        shape = tuple(int(n) for n in cells.max(axis=0) + pad - origin + 1)
+    else:
+        origin, shape = np.zeros(2, dtype=np.int64), (1, 1)
+
+    if shape[0] * shape[1] <= MAX_RASTER_CELLS:
+        shade = rasterize(obstacles, origin, shape)
+        half_shade = dilate(shade, shade_radius)
+        wet = dilate(rasterize(water, origin, shape), wet_radius)
+        ix, iy = cells[:, 0] - origin[0], cells[:, 1] - origin[1]
+        at_shade, near_shade, near_wet = shade[ix, iy], half_shade[ix, iy], wet[ix, iy]
+    else:
+        # 包围盒太大，按集合逐格查，避免一次请求分配上 GB 的掩码
+        at_shade = near(obstacles, cells, 0, include_center=True)
+        near_shade = near(obstacles, cells, shade_radius)
+        near_wet = near(water, cells, wet_radius)
+
+    # 不在整数格子上的花卉视为全日照干
+    light = np.full(len(flowers), LIGHT_FULL, dtype=np.int8)
+    is_wet = np.zeros(len(flowers), dtype=np.int8)
+    light[on_grid] = np.where(at_shade, LIGHT_SHADE,
+                              np.where(near_shade, LIGHT_HALF, LIGHT_FULL))
+    is_wet[on_grid] = near_wet
+
+    if on_grid.all():
+        xs, ys = xs.astype(np.int64), ys.astype(np.int64)
+    return ZoneGrid(xs, ys, light * 2 + is_wet)
@@ -0,0 +1,59 @@
+"""对比两次基准测试结果
+
+    python backend/bench/compare.py old.json new.json [--threshold 1.1]
+
+按 (name, params) 配对，打印 p50 / p99 / 峰值内存的比值（新/旧），
+比值超过阈值的标记为变慢。
+"""
+import argparse
+import json
+
+
+def key(entry):
+    return entry["name"], tuple(sorted(entry["params"].items()))
+
+
+def ratio(new, old):
+    if new is None or old in (None, 0):
+        return None
+    return new / old
+
+
+def fmt(value):
+    return f"{value:6.2f}x" if value is not None else "     - "
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="对比两次基准测试结果")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=1.1, help="p50 比值超过它算变慢")
+    args = parser.parse_args(argv)
+
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    before = {key(e): e for e in old["results"] if not e.get("skipped")}
+
+    print(f"{old['meta'].get('commit')} -> {new['meta'].get('commit')}")
+    slower = 0
+    for entry in new["results"]:
+        base = before.get(key(entry))
+        if base is None or entry.get("skipped"):
+            continue
+        p50 = ratio(entry["p50_ms"], base["p50_ms"])
+        mark = ""
+        if p50 is not None and p50 > args.threshold:
+            mark = "  <- 变慢"
+            slower += 1
+        label = " ".join(f"{k}={v}" for k, v in entry["params"].items())
+        print(
+            f"{entry['name']:<28} {label:<36} p50 {fmt(p50)}  p99 {fmt(ratio(entry['p99_ms'], base['p99_ms']))}"
+            f"  mem {fmt(ratio(entry['peak_mem_bytes'], base['peak_mem_bytes']))}{mark}"
+        )
+    return 1 if slower else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
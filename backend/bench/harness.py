@@ -0,0 +1,108 @@
+"""计时、百分位、峰值内存与结果文件"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+
+def percentile(sorted_values, q):
+    """线性插值百分位，q 取 0-100"""
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * q / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def measure(fn, repeat=10, warmup=1, memory=True):
+    """
+    运行 fn：先预热，再计时 repeat 次；另跑一次开 tracemalloc 取峰值内存
+    （tracemalloc 会拖慢执行，不和计时混在一起）
+    """
+    for _ in range(warmup):
+        fn()
+
+    times = []
+    total_start = time.perf_counter()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    total = time.perf_counter() - total_start
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    times.sort()
+    ms = [t * 1000 for t in times]
+    return {
+        "repeat": repeat,
+        "mean_ms": round(statistics.fmean(ms), 4),
+        "min_ms": round(ms[0], 4),
+        "p50_ms": round(percentile(ms, 50), 4),
+        "p90_ms": round(percentile(ms, 90), 4),
+        "p99_ms": round(percentile(ms, 99), 4),
+        "max_ms": round(ms[-1], 4),
+        "ops_per_s": round(repeat / total, 3) if total else None,
+        "peak_mem_bytes": peak,
+    }
+
+
+def git_commit(cwd):
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=cwd,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata(preset, cwd):
+    import numpy
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(cwd),
+        "preset": preset,
+        "python": sys.version.split()[0],
+        "numpy": numpy.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+class Results:
+
+    def __init__(self, meta):
+        self.meta = meta
+        self.results = []
+
+    def add(self, name, params, stats):
+        entry = {"name": name, "params": params, **stats}
+        self.results.append(entry)
+        label = " ".join(f"{k}={v}" for k, v in params.items())
+        if stats.get("skipped"):
+            print(f"{name:<28} {label:<36} skipped: {stats['skipped']}")
+            return
+        mem = stats.get("peak_mem_bytes")
+        mem = f"{mem / 1024 / 1024:8.1f} MiB" if mem is not None else ""
+        print(
+            f"{name:<28} {label:<36} p50 {stats['p50_ms']:10.3f} ms"
+            f"  p99 {stats['p99_ms']:10.3f} ms  {stats['ops_per_s']:10.2f}/s {mem}"
+        )
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"meta": self.meta, "results": self.results}, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,313 @@
+"""基准测试
+
+    python backend/bench/run.py                     # quick 预设
+    python backend/bench/run.py --preset full --out full.json
+    python backend/bench/run.py --only classify --only plants_data
+    python backend/bench/compare.py old.json new.json
+
+函数级：区域分类、目录构建/筛选、分配、序列化、partition()、match_season()/match_lat()
+接口级（Flask test client）：/plants_data、/api/plants、/api/plants/search、/location_msg、/api/save_pdf
+启动：新进程导入 app 的耗时（按模块拆开见 startup.py）
+数据全部是合成的，写在临时 SQLite 库里，不碰 instance/users11.db。
+结果（百分位、吞吐、峰值内存）打印到终端并写成 JSON，便于跨提交对比。
+"""
+import argparse
+import os
+import struct
+import sys
+import tempfile
+import zlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(HERE, "..", "api")
+sys.path.insert(0, API_DIR)
+
+from harness import Results, measure, run_metadata  # noqa: E402
+
+
+PRESETS = {
+    "quick": {
+        "catalogs": [1000],
+        "layouts": [100, 10_000],
+        "client_layouts": [100, 10_000],
+        "repeat": 5,
+    },
+    "full": {
+        "catalogs": [1000, 10_000, 100_000],
+        "layouts": [100, 10_000, 100_000, 1_000_000],
+        "client_layouts": [100, 10_000, 100_000],
+        "repeat": 10,
+    },
+}
+
+
+def repeats_for(size, base):
+    """大规模用例少跑几次"""
+    if size >= 1_000_000:
+        return min(base, 3)
+    if size >= 100_000:
+        return min(base, 5)
+    return base
+
+
+def png_bytes(width=256, height=256):
+    """不依赖 Pillow 生成一张灰度渐变 PNG"""
+    raw = b"".join(b"\x00" + bytes((x + y) % 256 for x in range(width)) for y in range(height))
+
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw))
+        + chunk(b"IEND", b"")
+    )
+
+
+class Suite:
+
+    def __init__(self, preset, only, results, repeat=None):
+        self.preset = PRESETS[preset]
+        self.only = only
+        self.results = results
+        self.repeat = repeat or self.preset["repeat"]
+
+    def enabled(self, name):
+        return not self.only or any(o in name for o in self.only)
+
+    def bench(self, name, params, fn, size=0, memory=True):
+        if not self.enabled(name):
+            return
+        stats = measure(fn, repeat=repeats_for(size, self.repeat), memory=memory)
+        self.results.add(name, params, stats)
+
+    def skip(self, name, params, reason):
+        if self.enabled(name):
+            self.results.add(name, params, {"skipped": reason})
+
+    # —— 函数级（不依赖数据库） ——
+    def pure(self):
+        import synthetic
+        import compact
+        from assign import Assigner, MODES
+        from catalog import PlantCatalog
+        from zones import classify
+
+        for n in self.preset["layouts"]:
+            data = synthetic.layout(n)
+            self.bench("classify", {"cells": n}, lambda: classify(data), size=n)
+
+        for rows_n in self.preset["catalogs"]:
+            rows = synthetic.catalog_rows(rows_n)
+            self.bench(
+                "catalog_build", {"plants": rows_n},
+                lambda: PlantCatalog(lambda: rows).snapshot(), size=rows_n,
+            )
+            catalog = PlantCatalog(lambda: rows)
+            catalog.snapshot()
+            for filters in ({}, {"style": "meadow", "view_season": "summer", "lat": 40}):
+                label = "filtered" if filters else "all"
+                self.bench(
+                    "catalog_candidates", {"plants": rows_n, "filters": label},
+                    lambda: catalog.candidates(**filters), size=rows_n,
+                )
+
+        rows = synthetic.catalog_rows(self.preset["catalogs"][0])
+        plants_by_zone = PlantCatalog(lambda: rows).candidates()
+        for n in self.preset["layouts"]:
+            grid = classify(synthetic.layout(n))
+            for mode in MODES:
+                assigner = Assigner(plants_by_zone, seed=1, mode=mode)
+                self.bench("assign", {"cells": n, "mode": mode}, lambda: assigner.assign(grid), size=n)
+            picks = Assigner(plants_by_zone, seed=1).assign(grid)
+            payload = {"data": compact.to_columns(grid, picks)}
+            self.bench("encode_columns", {"cells": n}, lambda: compact.encode(payload), size=n)
+            self.bench("zone_dicts", {"cells": n}, grid.to_dicts, size=n)
+
+    def startup(self):
+        from startup import cold_start
+        self.bench("startup_import", {}, cold_start, memory=False)
+
+    # —— 依赖 app（临时库） ——
+    def load_catalog(self, A, rows):
+        from sqlalchemy import delete, insert
+        with A.app.app_context():
+            A.db.session.execute(delete(A.Plants))
+            for i in range(0, len(rows), 5000):
+                A.db.session.execute(insert(A.Plants), rows[i:i + 5000])
+            A.db.session.commit()
+            A.plant_catalog.invalidate()
+        A.result_cache.clear()
+
+    def app_level(self, font=None):
+        import synthetic
+        import app as A
+
+        with A.app.app_context():
+            A.init_db()
+        client = A.app.test_client()
+        for rows_n in self.preset["catalogs"]:
+            rows = synthetic.plant_rows(rows_n)
+            self.load_catalog(A, rows)
+
+            periods = [r["ornamental_period"] for r in rows]
+            colds = [r["cold_resistance"] for r in rows]
+            self.bench(
+                "match_season", {"plants": rows_n},
+                lambda: [A.match_season("summer", p) for p in periods], size=rows_n,
+            )
+            self.bench(
+                "match_lat", {"plants": rows_n},
+                lambda: [A.match_lat(35, c) for c in colds], size=rows_n,
+            )
+
+            for n in self.preset["layouts"]:
+                data = synthetic.layout(n)
+                if self.enabled("partition"):
+                    with A.app.app_context():
+                        self.bench("partition", {"plants": rows_n, "cells": n},
+                                   lambda: A.partition(data), size=n)
+
+            # 内存目录索引 vs 筛选下推到 SQL（内存索引的构建不计在内）
+            with A.app.app_context():
+                A.plant_catalog.snapshot()
+                for filters in ({}, {"style": "meadow", "view_season": "summer", "lat": 40}):
+                    for pushdown in (False, True):
+                        self.bench(
+                            "app_candidates",
+                            {"plants": rows_n, "filters": "filtered" if filters else "all", "pushdown": pushdown},
+                            lambda: A.plant_catalog.candidates(**filters, pushdown=pushdown), size=rows_n,
+                        )
+
+            for n in self.preset["client_layouts"]:
+                self.client_plants_data(client, synthetic.layout(n), rows_n, n)
+
+            self.client_list_plants(client, rows_n)
+            self.client_search(client, rows_n)
+            self.client_save_pdf(client, A, rows, rows_n, font)
+
+        self.client_locations(client)
+
+    def client_plants_data(self, client, data, rows_n, n):
+        params = {"plants": rows_n, "cells": n}
+        seed = iter(range(10 ** 9))
+
+        def cold(query=None):
+            # 每次换种子，结果缓存不会命中
+            body = dict(data, property={"seed": next(seed)})
+            r = client.post("/plants_data", json=body, query_string=query)
+            assert r.status_code == 200, r.status_code
+
+        def warm():
+            r = client.post("/plants_data", json=data)
+            assert r.status_code == 200, r.status_code
+
+        self.bench("plants_data_json", params, cold, size=n)
+        self.bench("plants_data_columns", params, lambda: cold({"format": "columns"}), size=n)
+        self.bench("plants_data_cached", params, warm, size=n)
+
+    def client_list_plants(self, client, rows_n):
+        def first_page():
+            r = client.get("/api/plants", query_string={"limit": 200})
+            assert r.status_code == 200, r.status_code
+
+        def deep_page():
+            r = client.get("/api/plants", query_string={"limit": 200, "cursor": max(0, rows_n - 200)})
+            assert r.status_code == 200, r.status_code
+
+        def filtered():
+            r = client.get("/api/plants", query_string={
+                "limit": 200, "sunlight": "高", "fields": "id,name,latin_name",
+            })
+            assert r.status_code == 200, r.status_code
+
+        self.bench("list_plants", {"plants": rows_n, "page": "first"}, first_page, size=rows_n)
+        self.bench("list_plants", {"plants": rows_n, "page": "deep"}, deep_page, size=rows_n)
+        self.bench("list_plants", {"plants": rows_n, "page": "filtered"}, filtered, size=rows_n)
+
+    def client_search(self, client, rows_n):
+        # 长词走 FTS，短词走名称前缀 + 子串扫描
+        cases = {
+            "fts": "Planta synthetica 4242", "fts_common": "synthetica",
+            "prefix": "植物", "short_rare": "zz",
+        }
+        for label, q in cases.items():
+            def run(q=q):
+                r = client.get("/api/plants/search", query_string={"q": q, "limit": 20})
+                assert r.status_code == 200, r.status_code
+            self.bench("search_plants", {"plants": rows_n, "query": label}, run, size=rows_n)
+
+    def client_save_pdf(self, client, A, rows, rows_n, font):
+        import base64
+        import synthetic
+
+        params = {"plants": rows_n, "items": 50, "images": 4}
+        font = font or A.app.config["REPORT_FONT"]
+        if not os.path.isfile(font):
+            self.skip("save_pdf", params, f"字体不存在: {font}（用 --font 指定）")
+            return
+        A.app.config["REPORT_FONT"] = font
+
+        image = base64.b64encode(png_bytes()).decode()
+        body = {
+            "plantlist": synthetic.plantlist(50, [r["name"] for r in rows[:200]]),
+            "images": [{"filename": f"{i}.png", "data": image} for i in range(4)],
+        }
+
+        def save():
+            r = client.post("/api/save_pdf", json=body)
+            assert r.status_code == 200, r.status_code
+            r.get_data()
+
+        self.bench("save_pdf", params, save)
+
+    def client_locations(self, client):
+        etag = client.get("/location_msg").headers["ETag"]
+
+        def fetch(headers):
+            def run():
+                r = client.get("/location_msg", headers=headers)
+                assert r.status_code in (200, 304), r.status_code
+            return run
+
+        self.bench("location_msg", {"encoding": "identity"}, fetch({}))
+        self.bench("location_msg", {"encoding": "gzip"}, fetch({"Accept-Encoding": "gzip"}))
+        self.bench("location_msg", {"encoding": "304"}, fetch({"If-None-Match": etag}))
+        self.bench(
+            "location_nearest", {},
+            lambda: client.get("/location_nearest", query_string={"lat": 31.2, "lng": 121.5}),
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="花园后端基准测试")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    parser.add_argument("--only", action="append", default=[], help="只跑名字包含该字符串的用例，可多次指定")
+    parser.add_argument("--repeat", type=int, help="覆盖预设的计时次数")
+    parser.add_argument("--font", help="报告字体（TTF），默认用 app 配置的 REPORT_FONT")
+    parser.add_argument("--out", help="结果 JSON 路径，默认 bench-<commit>-<preset>.json")
+    parser.add_argument("--no-app", action="store_true", help="只跑不依赖 app 的函数级用例")
+    args = parser.parse_args(argv)
+
+    # app 导入时读取 DATABASE_URL，必须先把库指向临时文件
+    tmp = tempfile.mkdtemp(prefix="garden-bench-")
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tmp, "bench.db")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    meta = run_metadata(args.preset, HERE)
+    results = Results(meta)
+    suite = Suite(args.preset, args.only, results, args.repeat)
+    suite.pure()
+    if not args.no_app:
+        suite.startup()
+        suite.app_level(args.font)
+
+    out = args.out or f"bench-{meta['commit'] or 'local'}-{args.preset}.json"
+    results.save(out)
+    print(f"结果已写入 {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""启动时间：新进程导入 app 的耗时，按模块拆开
+
+    python backend/bench/startup.py               # 总耗时 + app 直接导入的各模块
+    python backend/bench/startup.py --repeat 5 --top 20
+
+每次起一个新的 Python 进程跑 python -X importtime -c "import app"，数据库指向临时文件。
+子进程里另外计时一次 create_app() 和第一个请求，并检查 fpdf / openai 有没有被提前导入。
+run.py 的 startup 用例也调用这里的 cold_start()。
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(HERE, "..", "api")
+
+# 应当按需导入、不出现在启动路径上的模块
+LAZY_MODULES = ("fpdf", "openai")
+
+CHILD = f"""
+import sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+app.create_app()
+t2 = time.perf_counter()
+app.app.test_client().get("/health")
+t3 = time.perf_counter()
+eager = [m for m in {LAZY_MODULES!r} if m in sys.modules]
+print("STARTUP", t1 - t0, t2 - t1, t3 - t2, ",".join(eager) or "-")
+"""
+
+
+def cold_start(importtime=False):
+    """
+    在新进程里导入 app，返回 {import_s, create_app_s, first_request_s, eager, modules}
+    modules 为 importtime 的 [(模块, 自身微秒, 累计微秒, 深度)]，importtime=False 时为空
+    """
+    tmp = tempfile.mkdtemp(prefix="garden-startup-")
+    env = dict(
+        os.environ,
+        DATABASE_URL="sqlite:///" + os.path.join(tmp, "startup.db"),
+        LOG_LEVEL="WARNING",
+    )
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", CHILD]
+    proc = subprocess.run(cmd, cwd=API_DIR, env=env, capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(proc.stderr[-2000:])
+
+    line = next(ln for ln in proc.stdout.splitlines() if ln.startswith("STARTUP "))
+    _, import_s, create_s, request_s, eager = line.split()
+    return {
+        "import_s": float(import_s),
+        "create_app_s": float(create_s),
+        "first_request_s": float(request_s),
+        "eager": [] if eager == "-" else eager.split(","),
+        "modules": parse_importtime(proc.stderr) if importtime else [],
+    }
+
+
+def parse_importtime(stderr):
+    """-X importtime 的输出 -> [(模块, 自身微秒, 累计微秒, 深度)]，顺序同输出（子模块在前）"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        self_us, cumulative_us, name = int(parts[0]), int(parts[1]), parts[2]
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((name.strip(), self_us, cumulative_us, depth))
+    return rows
+
+
+def children_of(rows, parent):
+    """parent 直接导入的模块（只算第一次导入，已导入过的不会出现在输出里）"""
+    pending = {}
+    for name, self_us, cumulative_us, depth in rows:
+        children = pending.pop(depth + 1, [])
+        if name == parent:
+            return children
+        pending.setdefault(depth, []).append((name, self_us, cumulative_us))
+    return []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="app 冷启动耗时")
+    parser.add_argument("--repeat", type=int, default=3, help="冷启动次数，取中位数")
+    parser.add_argument("--top", type=int, default=15, help="列出的模块数")
+    args = parser.parse_args(argv)
+
+    runs = [cold_start() for _ in range(args.repeat)]
+    for key in ("import_s", "create_app_s", "first_request_s"):
+        print(f"{key:<16} {statistics.median(r[key] for r in runs) * 1000:9.1f} ms")
+    eager = sorted({m for r in runs for m in r["eager"]})
+    print(f"启动时已导入的按需模块: {', '.join(eager) or '无'}")
+
+    modules = cold_start(importtime=True)["modules"]
+    print(f"\napp 直接导入的模块（累计耗时前 {args.top}）")
+    children = sorted(children_of(modules, "app"), key=lambda c: -c[2])
+    for name, self_us, cumulative_us in children[:args.top]:
+        print(f"  {name:<32} {cumulative_us / 1000:9.1f} ms  (自身 {self_us / 1000:.1f} ms)")
+    print(f"\n自身耗时最多的模块（前 {args.top}）")
+    for name, self_us, _, _ in sorted(modules, key=lambda m: -m[1])[:args.top]:
+        print(f"  {name:<32} {self_us / 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""基准测试用的合成数据：植物目录与花园布局
+
+用固定种子的 random.Random 生成，同样的参数每次得到同样的数据。
+"""
+import math
+import random
+from types import SimpleNamespace
+
+from catalog import STYLE_MAP
+from parsing import derive_columns
+
+
+SUNLIGHT = ["低", "中", "高", "中、高", "低、中"]
+WATER_NEED = ["低", "中", "高", "中、低", "高、中"]
+GARDEN_TYPES = list(STYLE_MAP.values())
+COLD = [
+    "耐寒（可耐 -20℃低温）", "较耐寒", "不耐寒（10℃以下生长受影响）",
+    "耐寒（可耐 -35℃低温）", "半耐寒（可耐 -5℃）",
+]
+CROWN = ["10-30", "20-40", "30-60", "40-100", "60-150", "需支架攀爬"]
+
+
+def ornamental_period(rng):
+    roll = rng.random()
+    if roll < 0.05:
+        return "全年"
+    if roll < 0.1:
+        return "秋冬"
+    if roll < 0.2:
+        return f"{rng.randint(1, 12)}月"
+    start = rng.randint(1, 12)
+    return f"{start}-{(start + rng.randint(1, 5) - 1) % 12 + 1}月"
+
+
+def plant_rows(n, seed=0):
+    """n 行植物数据（dict，列名同 plants 表），派生列已填好"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        row = {
+            "name": f"植物{i}",
+            "latin_name": f"Planta synthetica {i}",
+            "family": f"科{i % 97}",
+            "genus": f"属{i % 389}",
+            "garden_type": "、".join(rng.sample(GARDEN_TYPES, rng.randint(1, 3))),
+            "sunlight": rng.choice(SUNLIGHT),
+            "water_need": rng.choice(WATER_NEED),
+            "cold_resistance": rng.choice(COLD),
+            "ornamental_period": ornamental_period(rng),
+            "crown_width_cm": rng.choice(CROWN),
+            "common_diseases": "白粉病",
+            "pruning": "花后修剪",
+            "control_methods": "通风",
+        }
+        row.update(derive_columns(row.get))
+        rows.append(row)
+    return rows
+
+
+def catalog_rows(n, seed=0):
+    """PlantCatalog 的 loader 用的行：带 CATALOG_COLUMNS 属性的对象"""
+    return [
+        SimpleNamespace(id=i + 1, model_config=None, **row)
+        for i, row in enumerate(plant_rows(n, seed))
+    ]
+
+
+def layout(cells, seed=0, obstacle_ratio=0.01, water_ratio=0.01):
+    """
+    大约 cells 个花卉格子的正方形花园，
+    另按比例随机放建筑、水体和墙（墙在半格上，和前端一致）
+    """
+    rng = random.Random(seed)
+    side = max(1, math.isqrt(cells))
+    flowers = [{"x": x, "y": y} for x in range(side) for y in range(side)][:cells]
+    while len(flowers) < cells:
+        flowers.append({"x": side, "y": len(flowers) - side * side})
+
+    def scatter(ratio):
+        return [
+            {"x": rng.randrange(side), "y": rng.randrange(side)}
+            for _ in range(max(1, int(cells * ratio)))
+        ]
+
+    walls = [
+        {"x": rng.randrange(side) + 0.5, "y": rng.randrange(side), "rotation": 0}
+        for _ in range(max(1, int(cells * obstacle_ratio / 4)))
+    ]
+    return {
+        "flowerPositions": flowers,
+        "buildingPositions": scatter(obstacle_ratio),
+        "waterPositions": scatter(water_ratio),
+        "wallPositions": walls,
+        "property": {},
+    }
+
+
+def plantlist(n, names):
+    """报告用的种植清单"""
+    return [{"name": names[i % len(names)], "count": i % 5 + 1} for i in range(n)]
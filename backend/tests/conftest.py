@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+import app as garden  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    """临时库上的 app，已建表"""
+    app = garden.create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + str(tmp_path / "garden.db"),
+        "SAVED_IMAGE_DIR": str(tmp_path / "saved_image"),
+        "PLANT_DETAIL_CACHE": str(tmp_path / "plant_detail_cache.db"),
+        "METRICS_ENABLED": False,
+    })
+    with app.app_context():
+        garden.init_db()
+        yield app
+        garden.db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
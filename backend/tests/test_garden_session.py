@@ -0,0 +1,62 @@
+import pytest
+
+from garden_session import GardenSession, SessionError
+
+
+def snapshot(session):
+    return (dict(session.obstacles), dict(session.water), dict(session.shade_cover),
+            dict(session.wet_cover), dict(session.flowers))
+
+
+@pytest.fixture
+def session():
+    session = GardenSession({})
+    session.apply(add={
+        "flowerPositions": [{"x": x, "y": 0} for x in range(5)],
+        "buildingPositions": [{"x": 2, "y": 1}],
+        "waterPositions": [{"x": 0, "y": 1}],
+    })
+    return session
+
+
+@pytest.mark.parametrize("add", [
+    {"flowerPositions": [{"x": 1}]},
+    {"flowerPositions": {"x": 1, "y": 2}},
+    {"flowerPositions": [None]},
+    {"waterPositions": [{"x": "a", "y": 0}]},
+    {"wallPositions": [{"x": float("inf"), "y": 0}]},
+    {"treePositions": []},
+    ["flowerPositions"],
+])
+def test_invalid_add_leaves_session_unchanged(session, add):
+    before = snapshot(session)
+    remove = {"buildingPositions": [{"x": 2, "y": 1}], "flowerPositions": [{"x": 0, "y": 0}]}
+    with pytest.raises(SessionError):
+        session.apply(add=add, remove=remove)
+    assert snapshot(session) == before
+
+
+def test_valid_delta_applies(session):
+    changed, removed = session.apply(
+        add={"flowerPositions": [{"x": 9, "y": 9}]},
+        remove={"buildingPositions": [{"x": 2, "y": 1}], "flowerPositions": [{"x": 0, "y": 0}]},
+    )
+    assert removed == [(0, 0)]
+    assert (9, 9) in changed
+    assert not session.obstacles
+
+
+def test_malformed_delta_is_400(client):
+    body = client.post("/api/garden_sessions", json={
+        "flowerPositions": [{"x": 0, "y": 0}], "buildingPositions": [{"x": 1, "y": 0}],
+    }).get_json()
+    sid = body["data"]["session_id"]
+    r = client.post(f"/api/garden_sessions/{sid}/delta", json={
+        "remove": {"buildingPositions": [{"x": 1, "y": 0}]},
+        "add": {"flowerPositions": [{"y": 3}]},
+    })
+    assert r.status_code == 400
+    r = client.post(f"/api/garden_sessions/{sid}/delta", json={"add": {"flowerPositions": [{"x": 2, "y": 0}]}})
+    assert r.status_code == 200
+    # 前一次失败的请求没有删掉建筑，(2, 0) 在建筑旁边，是半日照
+    assert [c["type"] for c in r.get_json()["data"]["cells"]] == ["半日照干"]
@@ -0,0 +1,70 @@
+import io
+import json
+
+from extensions import db
+from models import Plants
+from plant_import import PlantImporter
+
+ROSA = {
+    "name": "月季",
+    "latin_name": "Rosa chinensis",
+    "sunlight": "高",
+    "water_need": "中",
+    "garden_type": "混合草甸",
+    "cold_resistance": "耐寒（-15℃左右）",
+    "ornamental_period": "4-10月",
+    "usage": "花境",
+}
+
+DERIVED = ("ornamental_months", "cold_limit", "name_pinyin",
+           "sunlight_flags", "water_flags", "garden_type_flags")
+
+
+def run_import(rows, upsert=False):
+    stream = io.BytesIO("\n".join(json.dumps(r, ensure_ascii=False) for r in rows).encode())
+    return PlantImporter(db.session, Plants, upsert=upsert).run(stream, "jsonl")
+
+
+def derived(plant):
+    return {c: getattr(plant, c) for c in DERIVED}
+
+
+def test_insert_fills_derived_columns(app):
+    run_import([ROSA])
+    plant = Plants.query.one()
+    assert plant.sunlight_flags and plant.cold_limit == -15 and plant.ornamental_months
+
+
+def test_partial_upsert_keeps_derived_columns(app):
+    run_import([ROSA])
+    before = derived(Plants.query.one())
+
+    result = run_import([{"latin_name": "Rosa chinensis", "name": "月季", "usage": "切花"}], upsert=True)
+
+    assert result["updated"] == 1
+    db.session.expire_all()
+    plant = Plants.query.one()
+    assert plant.usage == "切花"
+    assert plant.sunlight == "高"
+    assert derived(plant) == before
+
+
+def test_upsert_recomputes_changed_source(app):
+    run_import([ROSA])
+    run_import([{"latin_name": "Rosa chinensis", "name": "月季", "cold_resistance": "耐寒（-30℃左右）"}], upsert=True)
+    db.session.expire_all()
+    assert Plants.query.one().cold_limit == -30
+
+
+def test_same_latin_rows_in_chunk_merge_before_deriving(app):
+    run_import([ROSA])
+    before = derived(Plants.query.one())
+    run_import([
+        {"latin_name": "Rosa chinensis", "name": "月季", "cold_resistance": "耐寒（-30℃左右）"},
+        {"latin_name": "Rosa chinensis", "name": "月季", "usage": "切花"},
+    ], upsert=True)
+    db.session.expire_all()
+    plant = Plants.query.one()
+    assert plant.cold_limit == -30
+    assert plant.sunlight_flags == before["sunlight_flags"]
+    assert plant.ornamental_months == before["ornamental_months"]
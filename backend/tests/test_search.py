@@ -0,0 +1,39 @@
+from sqlalchemy import text
+
+import app as garden
+from extensions import db
+from models import Plants
+
+
+def add_plants(*names):
+    db.session.add_all(Plants(name=n, latin_name=n) for n in names)
+    db.session.commit()
+
+
+def search_names(client, q):
+    body = client.get("/api/plants/search", query_string={"q": q}).get_json()
+    assert body["code"] == 0, body
+    return [row["name"] for row in body["data"]]
+
+
+def test_pinyin_finds_chinese_name(app, client):
+    add_plants("玫瑰", "月季")
+    assert Plants.query.filter_by(name="玫瑰").one().name_pinyin == "meigui mg"
+    assert search_names(client, "meigui") == ["玫瑰"]
+    assert search_names(client, "yueji") == ["月季"]
+
+
+def test_pinyin_initials_find_chinese_name(app, client):
+    add_plants("玫瑰", "月季")
+    assert search_names(client, "mg") == ["玫瑰"]
+
+
+def test_init_db_backfills_empty_pinyin(app, client):
+    # 没装 pypinyin 时写入的行拼音为空串
+    add_plants("玫瑰")
+    db.session.execute(text("UPDATE plants SET name_pinyin = ''"))
+    db.session.commit()
+    assert search_names(client, "meigui") == []
+
+    garden.init_db()
+    assert search_names(client, "meigui") == ["玫瑰"]
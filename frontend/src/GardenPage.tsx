@@ -9,7 +9,7 @@ import SunCalc from "suncalc";
 import { Html } from "@react-three/drei";
 import * as THREE from 'three';
 import { ChevronRightIcon, MinusIcon } from '@chakra-ui/icons';
-import { getLocationMsg, computePlantsData, getPlants, savePdf, getPlantDetail } from './api';
+import { getLocationMsg, computePlantsColumns, expandColumns, getPlants, searchPlants, savePdf, streamPlantDetail } from './api';
 import { renderToStaticMarkup } from "react-dom/server";
 
 import {
@@ -55,7 +55,8 @@ import {
   Tr,
   Th,
   Td,
-  Divider
+  Divider,
+  Input
 } from "@chakra-ui/react";
 
 
@@ -297,7 +298,8 @@ export function GardenDrawer({
 }: GardenDrawerProps) {
   const { isOpen, onOpen, onClose } = useDisclosure();
   const [step, setStep] = useState(0);
-  const [plantNames, setPlantNames] = useState([]);
+  const [plantNames, setPlantNames] = useState<{name: string}[]>([]);
+  const [plantQuery, setPlantQuery] = useState("");
   const [plantList, setPlantList] = useState<{name: string; count: number}[]>([]);
 
 
@@ -306,12 +308,25 @@ export function GardenDrawer({
     onClose();
   };
 
-   useEffect(() => {
-     getPlants().then((res) => {
-      // const plantMsg = res.data.data.map((p: any) => ({name: p.name}));
-      setPlantNames(res.data.data.map((p: any) => ({name: p.name})))
-     });
-   }, []);
+  // 没有搜索词时列出第一页植物名，有搜索词时走后端全文搜索（输入停顿 200ms 后再请求）
+  useEffect(() => {
+    const q = plantQuery.trim();
+    const timer = window.setTimeout(() => {
+      const request = q
+        ? searchPlants({ q, limit: 50 })
+        : getPlants({ fields: "name", limit: 200 });
+      request.then((res) => {
+        setPlantNames((res.data.data || []).map((p: any) => ({name: p.name})));
+      });
+    }, q ? 200 : 0);
+    return () => window.clearTimeout(timer);
+  }, [plantQuery]);
+
+  // 已选的植物始终排在前面，即使不在当前搜索结果里
+  const plantOptions = useMemo(() => {
+    const rest = plantNames.filter((o) => !selectedPlants.includes(o.name));
+    return [...selectedPlants.map((name) => ({name})), ...rest];
+  }, [plantNames, selectedPlants]);
 
   
 
@@ -605,13 +620,21 @@ export function GardenDrawer({
                   <MenuButton as={Button} w="100%" textAlign="left" whiteSpace="normal"  wordBreak="break-word" 
                   h="auto" minH="40px" py={2}>
                     {selectedPlants.length > 0
-                      ? selectedPlants.map((v) => plantNames.find((o) => o.name === v)?.name).join(", ")
+                      ? selectedPlants.join(", ")
                       : "请选择植物"}
                   </MenuButton>
                   <MenuList maxH="200px" overflowY="auto">
                     <Box p={2} border="1px solid" borderColor="gray.200" rounded="md">
+                      <Input
+                        size="sm"
+                        mb={2}
+                        placeholder="搜索名称、拉丁名、拼音"
+                        value={plantQuery}
+                        onChange={(e) => setPlantQuery(e.target.value)}
+                        onKeyDown={(e) => e.stopPropagation()}
+                      />
                       <Stack spacing={2}>
-                        {plantNames.map((option) => (
+                        {plantOptions.map((option) => (
                           <Checkbox
                             key={option.name}
                             isChecked={selectedPlants.includes(option.name)}
@@ -808,22 +831,17 @@ const PlantModal: React.FC<PlantModalProps> = ({ isOpen, onClose, plantName }) =
   const [plantDetails, setPlantDetails] = useState<string>("");
 
   useEffect(() => {
-    if (isOpen) {
-      fetchPlantDetails();
-    }
+    if (!isOpen) return;
+    setPlantDetails(""); // 每次打开先清空
+    // 边生成边显示
+    return streamPlantDetail(
+      plantName,
+      (text) => setPlantDetails(prev => prev + text),
+      (answer) => setPlantDetails(answer),
+      (msg) => setPlantDetails(msg),
+    );
   }, [isOpen]);
 
-  const fetchPlantDetails = async () => {
-    try {
-      setPlantDetails(""); // 每次打开先清空
-      const response = await getPlantDetail(plantName);
-      setPlantDetails(response.data.data);
-    } catch (err) {
-      console.log(err);
-      setPlantDetails("获取植物信息失败，请稍后再试。");
-    }
-  };
-
   if (!isOpen) return null;
 
   return (
@@ -1454,8 +1472,9 @@ export function GardenModal(
   const handleOpen = async () => {
     try {
       // const data = {}
-      const res = await computePlantsData(PositionDatas);
-      setPlantsData(res.data.data);
+      // 列式结果体积小得多，拿到后在前端还原成格子列表
+      const res = await computePlantsColumns(PositionDatas);
+      setPlantsData(expandColumns(res.data.data));
     } catch (err) {
       console.error("计算出错:", err);
     }
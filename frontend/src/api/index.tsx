@@ -44,6 +44,38 @@ export const computePlantsData= (data: any) => {
 }
 
 
+// 紧凑列式格式：x/y/zone/plant 几列 + 区域表、植物表
+export const computePlantsColumns= (data: any) => {
+    return axios.request({
+        url: '/plants_data',
+        method: 'post',
+        params: { format: 'columns' },
+        data
+    })
+}
+
+
+const EMPTY_PLANT = { id: "", name: "无", latin_name: "", family: "", genus: "", color: "#FFFFFF" }
+
+// 列式结果还原成格子列表，models 按 plant id 取共享配置
+export const expandColumns = (cols: any) => {
+    const cells = []
+    for (let i = 0; i < cols.n; i++) {
+        const zone = cols.zones[cols.zone[i]]
+        const plant = cols.plant[i] >= 0 ? cols.plants[cols.plant[i]] : EMPTY_PLANT
+        cells.push({
+            position: { x: cols.x[i], y: cols.y[i] },
+            type: zone.type,
+            color: zone.color,
+            plant,
+            model_id: plant.id === "" ? null : plant.id,
+            models: plant.id === "" ? [] : (cols.model_configs[plant.id] ?? []),
+        })
+    }
+    return cells
+}
+
+
 export const getUsers = () => {
     return axios.request({
         url: '/api/users',
@@ -62,10 +94,29 @@ export const deleteUser = (data: any) => {
 }
 
 
-export const getPlants= () => {
+// params: { limit, cursor, fields, family, genus, sunlight, water_need, garden_type }
+export const getPlants= (params?: any) => {
     return axios.request({
         url: '/api/plants',
         method: 'get',
+        params
+    })
+}
+
+// 单个植物的全部列（列表页只取表格里显示的列，详情、编辑时再取）
+export const getPlant= (id: number) => {
+    return axios.request({
+        url: `/api/plants/${id}`,
+        method: 'get',
+    })
+}
+
+// 全文搜索植物，params: { q, limit, offset }，按相关度排序，返回 next_offset
+export const searchPlants = (params: { q: string; limit?: number; offset?: number }) => {
+    return axios.request({
+        url: '/api/plants/search',
+        method: 'get',
+        params
     })
 }
 
@@ -96,10 +147,11 @@ export const deletePlant= (data: any) => {
 
 
 
-export const getReserves= () => {
+export const getReserves= (params?: any) => {
     return axios.request({
         url: '/api/reserves',
         method: 'get',
+        params
     })
 }
 
@@ -158,4 +210,27 @@ export const getPlantDetail = (name: string) => {
         method: 'get',
         params: { name }
     })
+}
+
+
+// 流式获取植物详情（server-sent events），返回关闭函数
+export const streamPlantDetail = (
+    name: string,
+    onDelta: (text: string) => void,
+    onDone: (answer: string) => void,
+    onError: (msg: string) => void,
+) => {
+    const url = `${axios.baseUrl}/api/get_plant_detail?stream=1&name=${encodeURIComponent(name)}`
+    const source = new EventSource(url)
+    source.addEventListener('delta', (e) => onDelta(JSON.parse((e as MessageEvent).data).text))
+    source.addEventListener('done', (e) => {
+        source.close()
+        onDone(JSON.parse((e as MessageEvent).data).text)
+    })
+    source.addEventListener('error', (e) => {
+        source.close()
+        const data = (e as MessageEvent).data
+        onError(data ? JSON.parse(data).text : '获取植物信息失败，请稍后再试。')
+    })
+    return () => source.close()
 }
\ No newline at end of file
@@ -1,4 +1,4 @@
-import { useState, useEffect, useRef } from "react";
+import { useState, useRef } from "react";
 import {
   Box,
   Button,
@@ -31,7 +31,8 @@ import {
   VStack,
 } from "@chakra-ui/react";
 
-import { getPlants, createPlant, updatePlant, deletePlant } from "../api";
+import { getPlants, getPlant, createPlant, updatePlant, deletePlant } from "../api";
+import usePagedList from "../utils/usePagedList";
 
 interface Plant {
   id: number;
@@ -65,13 +66,37 @@ interface Plant {
   model_config?: string;
 }
 
+// 列表只取表格里显示的列，每页 200 条
+const LIST_PARAMS = {
+  limit: 200,
+  fields: "id,name,family,genus,latin_name,lifecycle,classification,garden_type",
+};
+
 export default function PlantsManager() {
-  const [plants, setPlants] = useState<Plant[]>([]);
+  const {
+    rows: plants,
+    setRows: setPlants,
+    loading,
+    hasMore,
+    loadMore,
+    reload,
+  } = usePagedList<Plant>(getPlants, LIST_PARAMS);
+  // 展开详情、编辑时按 id 取的整行
+  const [details, setDetails] = useState<Record<number, Plant>>({});
   const [currentPlant, setCurrentPlant] = useState<Plant | null>(null);
   const [isEditing, setIsEditing] = useState(false);
   const [openRow, setOpenRow] = useState<number | null>(null);
 
+  const loadDetail = async (id: number): Promise<Plant> => {
+    if (details[id]) return details[id];
+    const res = await getPlant(id);
+    const plant: Plant = res.data.data;
+    setDetails((prev) => ({ ...prev, [id]: plant }));
+    return plant;
+  };
+
   const toggleRow = (id: number) => {
+    if (openRow !== id) loadDetail(id);
     setOpenRow(openRow === id ? null : id);
   };
 
@@ -85,11 +110,6 @@ export default function PlantsManager() {
   const cancelRef = useRef<HTMLButtonElement>(null);
   const [deletePlantId, setDeletePlantId] = useState<number | null>(null);
 
-  // 获取植物列表
-  useEffect(() => {
-    getPlants().then((res) => setPlants(res.data.data));
-  }, []);
-
   // 新增
   const handleAdd = () => {
     setIsEditing(false);
@@ -98,9 +118,9 @@ export default function PlantsManager() {
   };
 
   // 编辑
-  const handleEdit = (plant: Plant) => {
+  const handleEdit = async (plant: Plant) => {
     setIsEditing(true);
-    setCurrentPlant({ ...plant });
+    setCurrentPlant({ ...(await loadDetail(plant.id)) });
     onOpen();
   };
 
@@ -114,7 +134,8 @@ export default function PlantsManager() {
       await createPlant(currentPlant);
     //   setPlants([...plants, res.data]);
     }
-    getPlants().then((res) => setPlants(res.data.data));
+    setDetails({});
+    reload();
     onClose();
   };
 
@@ -156,7 +177,9 @@ export default function PlantsManager() {
           </Tr>
         </Thead>
         <Tbody>
-        {plants.map((plant, index) => (
+        {plants.map((plant, index) => {
+            const detail = details[plant.id] ?? plant;
+            return (
             <>
             {/* 主行 */}
             <Tr key={plant.id}>
@@ -184,37 +207,37 @@ export default function PlantsManager() {
                 <Box p={4} bg="gray.50" border="1px solid #eee">
                     <VStack align="start" spacing={3}>
                     <Box fontWeight="bold">生长特性</Box>
-                    <Box>生命周期: {plant.lifecycle}</Box>
-                    <Box>植物分类: {plant.classification}</Box>
-                    <Box>花园类型: {plant.garden_type}</Box>
-                    <Box>日照: {plant.sunlight}</Box>
-                    <Box>需水量: {plant.water_need}</Box>
-                    <Box>耐寒能力: {plant.cold_resistance}</Box>
-                    <Box>自播能力: {plant.self_sowing}</Box>
-                    <Box>抗倒伏情况: {plant.lodging_resistance}</Box>
-                    <Box>冠幅(cm): {plant.crown_width_cm}</Box>
-                    <Box>高度-春: {plant.height_spring}</Box>
-                    <Box>高度-夏: {plant.height_summer}</Box>
-                    <Box>高度-秋: {plant.height_autumn}</Box>
-                    <Box>高度-冬: {plant.height_winter}</Box>
-                    <Box>是否需要支架: {plant.needs_support}</Box>
-                    <Box>浇水频率: {plant.watering_frequency}</Box>
+                    <Box>生命周期: {detail.lifecycle}</Box>
+                    <Box>植物分类: {detail.classification}</Box>
+                    <Box>花园类型: {detail.garden_type}</Box>
+                    <Box>日照: {detail.sunlight}</Box>
+                    <Box>需水量: {detail.water_need}</Box>
+                    <Box>耐寒能力: {detail.cold_resistance}</Box>
+                    <Box>自播能力: {detail.self_sowing}</Box>
+                    <Box>抗倒伏情况: {detail.lodging_resistance}</Box>
+                    <Box>冠幅(cm): {detail.crown_width_cm}</Box>
+                    <Box>高度-春: {detail.height_spring}</Box>
+                    <Box>高度-夏: {detail.height_summer}</Box>
+                    <Box>高度-秋: {detail.height_autumn}</Box>
+                    <Box>高度-冬: {detail.height_winter}</Box>
+                    <Box>是否需要支架: {detail.needs_support}</Box>
+                    <Box>浇水频率: {detail.watering_frequency}</Box>
 
                     <Box fontWeight="bold" mt={3}>观赏属性</Box>
-                    <Box>观赏期: {plant.ornamental_period}</Box>
-                    <Box>花朵颜色: {plant.flower_color}</Box>
-                    <Box>花朵高度(cm): {plant.flower_height_cm}</Box>
+                    <Box>观赏期: {detail.ornamental_period}</Box>
+                    <Box>花朵颜色: {detail.flower_color}</Box>
+                    <Box>花朵高度(cm): {detail.flower_height_cm}</Box>
 
                     <Box fontWeight="bold" mt={3}>防治管理</Box>
-                    <Box>用途/特点: {plant.usage}</Box>
-                    <Box>防治方法: {plant.control_methods}</Box>
-                    <Box>常见病害: {plant.common_diseases}</Box>
-                    <Box>修剪节点: {plant.pruning}</Box>
+                    <Box>用途/特点: {detail.usage}</Box>
+                    <Box>防治方法: {detail.control_methods}</Box>
+                    <Box>常见病害: {detail.common_diseases}</Box>
+                    <Box>修剪节点: {detail.pruning}</Box>
 
-                    {plant.model_config && (
+                    {detail.model_config && (
                         <>
                         <Box fontWeight="bold" mt={3}>模型配置</Box>
-                        <Box>{plant.model_config}</Box>
+                        <Box>{detail.model_config}</Box>
                         </>
                     )}
                     </VStack>
@@ -224,12 +247,19 @@ export default function PlantsManager() {
                 </Td>
             </Tr>
             </>
-        ))}
+            );
+        })}
         </Tbody>
 
       </Table>
     </Box>
 
+      {hasMore && (
+        <Flex mt={4} justify="center">
+          <Button onClick={loadMore} isLoading={loading}>加载更多</Button>
+        </Flex>
+      )}
+
 
 
       {/* 新增/编辑 Modal */}
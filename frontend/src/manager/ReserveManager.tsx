@@ -1,4 +1,4 @@
-import { useState, useEffect } from "react";
+import { useState } from "react";
 import {
   Box,
   Button,
@@ -19,6 +19,7 @@ import {
 } from "@chakra-ui/react";
 
 import { getReserves, deleteReserve } from "../api";
+import usePagedList from "../utils/usePagedList";
 
 interface Reserve {
   id: number;
@@ -28,8 +29,20 @@ interface Reserve {
   reserve_time: string;
 }
 
+// 列表只取表格里显示的列，每页 200 条
+const LIST_PARAMS = {
+  limit: 200,
+  fields: "id,username,reserve_type,detail,reserve_time",
+};
+
 export default function ReservePage() {
-  const [reserves, setReserves] = useState<Reserve[]>([]);
+  const {
+    rows: reserves,
+    setRows: setReserves,
+    loading,
+    hasMore,
+    loadMore,
+  } = usePagedList<Reserve>(getReserves, LIST_PARAMS);
   const [deleteReserveId, setDeleteReserveId] = useState<number | null>(null);
 
   const {
@@ -38,12 +51,6 @@ export default function ReservePage() {
     onClose: onDeleteClose,
   } = useDisclosure(); // 删除确认
 
-  useEffect(() => {
-    getReserves().then((res) => {
-      setReserves(res.data.data);
-    });
-  }, []);
-
   // 删除操作
   const handleDelete = (id: number) => {
     setDeleteReserveId(id);
@@ -100,6 +107,12 @@ export default function ReservePage() {
         </Tbody>
       </Table>
 
+      {hasMore && (
+        <Flex mt={4} justify="center">
+          <Button onClick={loadMore} isLoading={loading}>加载更多</Button>
+        </Flex>
+      )}
+
       {/* 删除确认对话框 */}
       <AlertDialog
         isOpen={isDeleteOpen}
@@ -0,0 +1,36 @@
+import { useCallback, useEffect, useRef, useState } from "react";
+
+// 按 next_cursor 分页加载列表：先取第一页，点"加载更多"时再取下一页
+// params 里放 limit、fields 等固定参数，需在组件外定义，避免每次渲染都变
+export default function usePagedList<T>(
+  fetchPage: (params: any) => Promise<any>,
+  params: Record<string, any>,
+) {
+  const [rows, setRows] = useState<T[]>([]);
+  const [loading, setLoading] = useState(false);
+  const cursor = useRef<number | null>(null);
+  const [hasMore, setHasMore] = useState(false);
+
+  const load = useCallback(async (reset: boolean) => {
+    setLoading(true);
+    try {
+      const res = await fetchPage({ ...params, cursor: reset ? undefined : cursor.current ?? undefined });
+      const page: T[] = res.data.data;
+      setRows((prev) => (reset ? page : [...prev, ...page]));
+      cursor.current = res.data.next_cursor ?? null;
+      setHasMore(cursor.current !== null);
+    } finally {
+      setLoading(false);
+    }
+  }, [fetchPage, params]);
+
+  // 重新从第一页加载（新增、编辑之后）
+  const reload = useCallback(() => load(true), [load]);
+  const loadMore = useCallback(() => load(false), [load]);
+
+  useEffect(() => {
+    reload();
+  }, [reload]);
+
+  return { rows, setRows, loading, hasMore, loadMore, reload };
+}